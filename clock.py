@@ -0,0 +1,64 @@
+"""
+Time source for the attack loop and the packet waits in app.py
+Clock is the real thing. VirtualClock only moves when something sleeps on
+it, so with dhcpsim.SimulatedTransport a whole session, including its
+offer timeouts and the saturation timeout, runs in milliseconds:
+
+    vclock = VirtualClock()
+    server = SimulatedDhcpServer(clock=vclock.monotonic)
+    transport = SimulatedTransport(server, sleep=vclock.sleep)
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class Clock:
+    """Wall and monotonic time plus sleep, from the time module"""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """Clock that advances only through sleep() and advance()
+
+    call_at(when, fn) runs fn once the clock reaches `when`, e.g. to stop a
+    session after a number of virtual seconds.
+    """
+
+    def __init__(self, start=1700000000.0):
+        self.now = start
+        self._timers = []  # heap of (when, order, fn)
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.advance(max(0.0, seconds))
+
+    def advance(self, seconds):
+        with self._lock:
+            self.now += seconds
+            due = []
+            while self._timers and self._timers[0][0] <= self.now:
+                due.append(heapq.heappop(self._timers)[2])
+        for fn in due:
+            fn()
+
+    def call_at(self, when, fn):
+        with self._lock:
+            heapq.heappush(self._timers, (when, next(self._order), fn))
@@ -0,0 +1,406 @@
+"""
+Passive DHCP starvation detector
+Watches DHCP broadcast traffic on an interface without sending anything and
+keeps per-second counters over a sliding window:
+
+  - DISCOVER rate
+  - unique client hardware addresses (HyperLogLog sketch, bounded memory)
+  - OUI entropy of those addresses (random MACs spread over many vendors)
+  - Ethernet source vs BOOTP chaddr mismatches
+  - OFFER/DISCOVER and NAK/REQUEST ratios (pool depletion)
+
+On Linux frames are read from an AF_PACKET socket with a kernel BPF filter,
+so only DHCP traffic ever reaches Python, and are drained in batches.
+"""
+
+import ctypes
+import hashlib
+import logging
+import math
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+import packets
+from dhcpwire import MESSAGE_TYPES, parse_frame, summarize_options
+from logconfig import fields
+
+logger = logging.getLogger('starve.detector')
+
+DHCP_FILTER = "udp and (port 67 or 68)"
+
+# Classic BPF for "udp and (port 67 or 68)" over IPv4 (tcpdump -dd, trimmed)
+DHCP_BPF = (
+    (0x28, 0, 0, 12),          # ldh [12]            ethertype
+    (0x15, 0, 11, 0x0800),     # jeq IPv4           else drop
+    (0x30, 0, 0, 23),          # ldb [23]            protocol
+    (0x15, 0, 9, 17),          # jeq UDP            else drop
+    (0x28, 0, 0, 20),          # ldh [20]            fragment offset
+    (0x45, 7, 0, 0x1fff),      # jset               non-first fragment: drop
+    (0xb1, 0, 0, 14),          # ldxb 4*([14]&0xf)   IP header length
+    (0x48, 0, 0, 14),          # ldh [x+14]          source port
+    (0x15, 5, 0, 67),
+    (0x15, 4, 0, 68),
+    (0x48, 0, 0, 16),          # ldh [x+16]          destination port
+    (0x15, 2, 0, 67),
+    (0x15, 1, 0, 68),
+    (0x06, 0, 0, 0),           # drop
+    (0x06, 0, 0, 262144),      # accept whole frame
+)
+
+SO_ATTACH_FILTER = 26
+ETH_P_ALL = 0x0003
+
+# Defaults for the detection thresholds (all evaluated over the window)
+THRESHOLDS = {
+    'discover_rate': 20.0,      # DISCOVERs per second
+    'unique_clients': 100,      # distinct chaddrs
+    'oui_entropy': 5.0,         # bits, with at least min_clients_for_entropy clients
+    'min_clients_for_entropy': 32,
+    'mismatch_ratio': 0.2,      # client frames whose Ethernet source != chaddr
+    'offer_ratio': 0.5,         # OFFERs per DISCOVER below this looks like depletion
+    'nak_ratio': 0.3,           # NAKs per REQUEST
+    'min_discovers': 20,        # ignore ratios until this many DISCOVERs were seen
+}
+
+# Distinct OUIs tracked per one-second bucket; the rest count as singletons
+MAX_OUIS_PER_BUCKET = 4096
+
+
+class HyperLogLog:
+    """Cardinality sketch with 2**p one-byte registers (~1.04/sqrt(2**p) error)"""
+
+    def __init__(self, p=10):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, value):
+        x = int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), 'big')
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Fold another sketch of the same size into this one"""
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))  # Small range correction
+        return int(round(estimate))
+
+
+class Bucket:
+    """Counters for one second of traffic"""
+
+    def __init__(self, second):
+        self.second = second
+        self.messages = Counter()
+        self.client_frames = 0
+        self.mismatches = 0
+        self.clients = HyperLogLog()
+        self.ouis = Counter()
+        self.oui_overflow = 0
+
+    def add_client(self, chaddr):
+        self.clients.add(chaddr.encode())
+        oui = chaddr[:8]
+        if oui in self.ouis or len(self.ouis) < MAX_OUIS_PER_BUCKET:
+            self.ouis[oui] += 1
+        else:
+            self.oui_overflow += 1
+
+
+def shannon_entropy(counts, singletons=0):
+    """Entropy in bits of a distribution given as counts (plus count-1 extras)"""
+    total = sum(counts) + singletons
+    if not total:
+        return 0.0
+    entropy = -sum(c / total * math.log2(c / total) for c in counts if c)
+    if singletons:
+        entropy -= singletons * (1 / total) * math.log2(1 / total)
+    return entropy
+
+
+class StarvationDetector:
+    """Sliding-window statistics and alerting over decoded DHCP frames"""
+
+    def __init__(self, window=30, thresholds=None, clock=time.time, history=50):
+        self.window = window
+        self.thresholds = dict(THRESHOLDS, **(thresholds or {}))
+        self.clock = clock
+        self.frames = 0
+        self.alerts = deque(maxlen=history)
+        self.active = {}  # kind -> alert currently raised
+        self._buckets = deque()
+        self._lock = threading.Lock()
+
+    def observe(self, frame, timestamp=None):
+        """Account one raw frame; returns False if it was not DHCP"""
+        return self.observe_batch([(timestamp, frame)]) == 1
+
+    def observe_batch(self, records, link_offset=0):
+        """Account a batch of (timestamp, frame) records; returns DHCP frames seen"""
+        decoded = []
+        for timestamp, frame in records:
+            info = parse_frame(frame, link_offset)
+            if info is not None:
+                decoded.append((timestamp, info))
+        if not decoded:
+            return 0
+
+        with self._lock:
+            self.frames += len(decoded)
+            for timestamp, info in decoded:
+                bucket = self._bucket(int(timestamp if timestamp is not None else self.clock()))
+                kind = MESSAGE_TYPES.get(summarize_options(info['options'])['message_type'], 'unknown')
+                bucket.messages[kind] += 1
+                if info['op'] == 1:  # Client to server
+                    bucket.add_client(info['chaddr'])
+                    # Relayed frames legitimately carry the relay's source address
+                    if info['ip_src'] == '0.0.0.0' and info['src_mac']:
+                        bucket.client_frames += 1
+                        if info['src_mac'] != info['chaddr']:
+                            bucket.mismatches += 1
+        return len(decoded)
+
+    def stats(self, now=None):
+        """Aggregate the buckets inside the window"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._expire(now)
+            buckets = list(self._buckets)
+            active = sorted(self.active)
+
+        messages = Counter()
+        clients = HyperLogLog()
+        ouis = Counter()
+        oui_overflow = client_frames = mismatches = 0
+        for bucket in buckets:
+            messages.update(bucket.messages)
+            clients.merge(bucket.clients)
+            ouis.update(bucket.ouis)
+            oui_overflow += bucket.oui_overflow
+            client_frames += bucket.client_frames
+            mismatches += bucket.mismatches
+
+        discovers = messages['discover']
+        return {
+            'window': self.window,
+            'frames': self.frames,
+            'messages': dict(messages),
+            'discover_rate': round(discovers / self.window, 2),
+            'unique_clients': clients.count() if buckets else 0,
+            'oui_entropy': round(shannon_entropy(ouis.values(), oui_overflow), 2),
+            'mismatch_ratio': round(mismatches / client_frames, 3) if client_frames else 0.0,
+            'offer_ratio': round(messages['offer'] / discovers, 3) if discovers else None,
+            'nak_ratio': round(messages['nak'] / messages['request'], 3) if messages['request'] else None,
+            'active_alerts': active
+        }
+
+    def evaluate(self, now=None):
+        """Compute window stats and raise/clear alerts; returns (stats, new_alerts)"""
+        now = self.clock() if now is None else now
+        stats = self.stats(now)
+        t = self.thresholds
+        enough = stats['messages'].get('discover', 0) >= t['min_discovers']
+
+        checks = {
+            'discover-flood': (
+                stats['discover_rate'] > t['discover_rate'], 'high',
+                f"DISCOVER rate {stats['discover_rate']}/s exceeds {t['discover_rate']}/s"),
+            'client-churn': (
+                stats['unique_clients'] > t['unique_clients'], 'high',
+                f"{stats['unique_clients']} distinct client MACs in {self.window}s"),
+            'random-macs': (
+                stats['unique_clients'] >= t['min_clients_for_entropy'] and stats['oui_entropy'] > t['oui_entropy'],
+                'medium', f"Client MAC vendor entropy {stats['oui_entropy']} bits suggests randomized MACs"),
+            'chaddr-spoofing': (
+                stats['mismatch_ratio'] > t['mismatch_ratio'], 'medium',
+                f"{stats['mismatch_ratio']:.0%} of client frames have chaddr != Ethernet source"),
+            'pool-depletion': (
+                enough and stats['offer_ratio'] is not None and stats['offer_ratio'] < t['offer_ratio'], 'high',
+                f"Only {stats['offer_ratio']} OFFERs per DISCOVER - pool likely exhausted"),
+            'nak-storm': (
+                enough and stats['nak_ratio'] is not None and stats['nak_ratio'] > t['nak_ratio'], 'medium',
+                f"{stats['nak_ratio']} NAKs per REQUEST"),
+        }
+
+        raised = []
+        with self._lock:
+            for kind, (triggered, severity, message) in checks.items():
+                if triggered and kind not in self.active:
+                    alert = {'kind': kind, 'severity': severity, 'message': message, 'time': now}
+                    self.active[kind] = alert
+                    self.alerts.append(alert)
+                    raised.append(alert)
+                elif not triggered:
+                    self.active.pop(kind, None)
+            stats['active_alerts'] = sorted(self.active)
+        return stats, raised
+
+    def recent_alerts(self):
+        with self._lock:
+            return list(self.alerts)
+
+    def _bucket(self, second):
+        # Caller holds the lock
+        buckets = self._buckets
+        if buckets and buckets[-1].second == second:
+            return buckets[-1]
+        for bucket in reversed(buckets):  # Slightly out-of-order timestamp
+            if bucket.second == second:
+                return bucket
+            if bucket.second < second:
+                break
+        bucket = Bucket(second)
+        buckets.append(bucket)
+        if len(buckets) > 1 and buckets[-2].second > second:
+            self._buckets = deque(sorted(buckets, key=lambda b: b.second))
+        self._expire(second)
+        return bucket
+
+    def _expire(self, now):
+        # Caller holds the lock
+        horizon = now - self.window
+        while self._buckets and self._buckets[0].second <= horizon:
+            self._buckets.popleft()
+
+
+def compile_bpf(program=DHCP_BPF):
+    """Pack a classic BPF program as a sock_fprog; returns (fprog, buffer)"""
+    buffer = ctypes.create_string_buffer(b"".join(struct.pack("HBBI", *insn) for insn in program))
+    fprog = struct.pack("HL", len(program), ctypes.addressof(buffer))
+    return fprog, buffer  # The buffer must outlive the setsockopt call
+
+
+class RawCapture:
+    """AF_PACKET socket with the DHCP BPF filter attached (Linux)"""
+
+    def __init__(self, interface):
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            fprog, _buffer = compile_bpf()
+            self.sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+            self.sock.bind((interface, 0))
+        except OSError:
+            self.sock.close()
+            raise
+
+    def recv_batch(self, size, timeout):
+        """Block up to `timeout` for one frame, then drain up to `size` without blocking"""
+        self.sock.settimeout(timeout)
+        try:
+            batch = [(time.time(), self.sock.recv(65535))]
+        except socket.timeout:
+            return []
+        self.sock.setblocking(False)
+        while len(batch) < size:
+            try:
+                batch.append((time.time(), self.sock.recv(65535)))
+            except (BlockingIOError, InterruptedError):
+                break
+        return batch
+
+    def close(self):
+        self.sock.close()
+
+
+class ScapyCapture:
+    """Fallback for platforms without AF_PACKET: Scapy listen socket with a BPF filter"""
+
+    def __init__(self, interface):
+        self.sock = packets.conf.L2listen(iface=interface, filter=DHCP_FILTER)
+
+    def recv_batch(self, size, timeout):
+        from scapy.automaton import select_objects  # Only needed on this path
+        batch = []
+        deadline = time.time() + timeout
+        while len(batch) < size:
+            wait = deadline - time.time() if not batch else 0
+            if not select_objects([self.sock], max(wait, 0)):
+                break
+            packet = self.sock.recv()
+            if packet is not None:
+                batch.append((float(packet.time), bytes(packet)))
+        return batch
+
+    def close(self):
+        self.sock.close()
+
+
+def open_capture(interface):
+    if sys.platform.startswith('linux') and hasattr(socket, 'AF_PACKET'):
+        return RawCapture(interface)
+    return ScapyCapture(interface)
+
+
+class PassiveMonitor:
+    """Background thread feeding captured frames to a StarvationDetector"""
+
+    def __init__(self, interface, detector=None, on_stats=None, on_alert=None,
+                 capture_factory=open_capture, batch_size=256, interval=1.0):
+        self.interface = interface
+        self.detector = detector or StarvationDetector()
+        self.on_stats = on_stats
+        self.on_alert = on_alert
+        self.capture_factory = capture_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.error = None
+        self.started = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Open the capture and start the reader thread; raises OSError on failure"""
+        capture = self.capture_factory(self.interface)
+        self.started = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(capture,), daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self, capture):
+        next_report = time.monotonic() + self.interval
+        try:
+            while not self._stop.is_set():
+                batch = capture.recv_batch(self.batch_size, timeout=min(self.interval, 0.5))
+                if batch:
+                    self.detector.observe_batch(batch)
+                if time.monotonic() >= next_report:
+                    next_report += self.interval
+                    self._report()
+        except Exception as e:
+            self.error = str(e)
+            logger.exception("[-] Monitor error on %s: %s", self.interface, e)
+        finally:
+            capture.close()
+
+    def _report(self):
+        stats, raised = self.detector.evaluate()
+        if self.on_stats:
+            self.on_stats(stats)
+        for alert in raised:
+            logger.warning("[!] Starvation alert (%s): %s", alert['kind'], alert['message'],
+                           extra=fields('starvation-alert', kind=alert['kind'], severity=alert['severity']))
+            if self.on_alert:
+                self.on_alert(alert)
@@ -0,0 +1,330 @@
+"""
+In-process DHCP server stand-in
+SimulatedTransport plugs in where ScapyTransport would go, so discovery, the
+starvation loop and the release paths can run end to end without root or a
+real LAN. Pool size, lease time, offer latency and packet loss are
+configurable, all randomness comes from a seeded RNG, and the transport
+takes its time from the server's clock.
+"""
+
+import heapq
+import ipaddress
+import random
+import threading
+import time
+
+from scapy.layers.dhcp import DHCP, BOOTP
+from scapy.layers.inet import IP, UDP
+from scapy.layers.l2 import Ether, ARP
+from scapy.utils import str2mac
+
+MESSAGE_TYPES = {1: 'discover', 2: 'offer', 3: 'request', 4: 'decline',
+                 5: 'ack', 6: 'nak', 7: 'release', 8: 'inform'}
+
+
+def dhcp_options(packet):
+    """Return a packet's DHCP options as a dict"""
+    return {option[0]: option[1] for option in packet[DHCP].options if isinstance(option, tuple)}
+
+
+class SimulatedDhcpServer:
+    """Minimal DHCP server state machine: DISCOVER/OFFER, REQUEST/ACK|NAK, RELEASE"""
+
+    def __init__(self, network='192.168.50.0/24', pool_start=100, pool_size=50,
+                 server_ip=None, server_mac='02:00:00:00:00:01', lease_time=3600,
+                 offer_latency=0.0, loss_rate=0.0, offer_hold=10.0, seed=0,
+                 clock=time.monotonic):
+        self.network = ipaddress.IPv4Network(network)
+        hosts = list(self.network.hosts())
+        self.server_ip = server_ip or str(hosts[0])
+        self.server_mac = server_mac
+        self.router_ip = str(hosts[0])
+        self.pool = [str(ip) for ip in hosts[pool_start - 1:pool_start - 1 + pool_size]]
+        self.lease_time = lease_time
+        self.offer_latency = offer_latency
+        self.loss_rate = loss_rate
+        self.offer_hold = offer_hold
+        self.clock = clock
+        self.rng = random.Random(seed)
+
+        self.leases = {}   # ip -> (chaddr, expires)
+        self.offers = {}   # chaddr -> (ip, expires)
+        self.stats = {'discover': 0, 'offer': 0, 'request': 0, 'ack': 0,
+                      'nak': 0, 'release': 0, 'arp': 0, 'dropped': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def free_addresses(self):
+        with self._lock:
+            self._expire()
+            return len(self.pool) - len(self.leases) - len(self._offered_free())
+
+    def handle(self, frame):
+        """Process one frame from a client; returns [(delay, reply_frame), ...]
+
+        Frames must be dissected from bytes (see normalize_frame) so option
+        values are numeric, exactly as they would arrive off the wire.
+        """
+        if ARP in frame:
+            return self._handle_arp(frame)
+        if DHCP not in frame:
+            return []
+
+        # Decide the loss before touching any state, so a lost frame leaves
+        # the server exactly as if it had never been sent
+        if self.loss_rate and self.rng.random() < self.loss_rate:
+            self.stats['dropped'] += 1
+            return []
+
+        options = dhcp_options(frame)
+        message_type = MESSAGE_TYPES.get(options.get('message-type'))
+        chaddr = str2mac(frame[BOOTP].chaddr[:6])
+
+        with self._lock:
+            self._expire()
+            if message_type == 'discover':
+                reply = self._handle_discover(frame, chaddr)
+            elif message_type == 'request':
+                reply = self._handle_request(frame, chaddr, options)
+            elif message_type == 'release':
+                reply = self._handle_release(frame, chaddr)
+            else:
+                reply = None
+
+        if reply is None:
+            return []
+        return [(self.offer_latency, reply)]
+
+    def _handle_discover(self, frame, chaddr):
+        self.stats['discover'] += 1
+        ip = self._offer_for(chaddr) or self._lease_for(chaddr) or self._next_free()
+        if ip is None:
+            # Pool exhausted - real servers just stay silent
+            return None
+        self.offers[chaddr] = (ip, self.clock() + self.offer_hold)
+        self.stats['offer'] += 1
+        return self._reply(frame, 'offer', ip)
+
+    def _handle_request(self, frame, chaddr, options):
+        self.stats['request'] += 1
+        if options.get('server_id', self.server_ip) != self.server_ip:
+            # Client picked another server's offer
+            self.offers.pop(chaddr, None)
+            return None
+
+        ip = options.get('requested_addr') or frame[BOOTP].ciaddr
+        holder = self.leases.get(ip)
+        if self._offer_for(chaddr) == ip or (holder and holder[0] == chaddr):
+            self.offers.pop(chaddr, None)
+            self.leases[ip] = (chaddr, self.clock() + self.lease_time)
+            self.stats['ack'] += 1
+            return self._reply(frame, 'ack', ip)
+
+        self.stats['nak'] += 1
+        return self._reply(frame, 'nak', '0.0.0.0')
+
+    def _handle_release(self, frame, chaddr):
+        ip = frame[BOOTP].ciaddr
+        holder = self.leases.get(ip)
+        if holder and holder[0] == chaddr:
+            del self.leases[ip]
+            self.stats['release'] += 1
+        return None
+
+    def _handle_arp(self, frame):
+        arp = frame[ARP]
+        if arp.op != 1 or arp.pdst != self.server_ip:
+            return []
+        self.stats['arp'] += 1
+        reply = Ether(src=self.server_mac, dst=arp.hwsrc) / ARP(
+            op=2, hwsrc=self.server_mac, psrc=self.server_ip, hwdst=arp.hwsrc, pdst=arp.psrc)
+        return [(self.offer_latency, Ether(bytes(reply)))]
+
+    def _reply(self, frame, message_type, yiaddr):
+        options = [("message-type", message_type), ("server_id", self.server_ip)]
+        if message_type != 'nak':
+            options += [
+                ("lease_time", self.lease_time),
+                ("subnet_mask", str(self.network.netmask)),
+                ("router", self.router_ip)
+            ]
+        options.append("end")
+
+        reply = Ether(src=self.server_mac, dst="ff:ff:ff:ff:ff:ff")
+        reply /= IP(src=self.server_ip, dst="255.255.255.255")
+        reply /= UDP(sport=67, dport=68)
+        reply /= BOOTP(op=2, xid=frame[BOOTP].xid, yiaddr=yiaddr,
+                       siaddr=self.server_ip, chaddr=frame[BOOTP].chaddr)
+        reply /= DHCP(options=options)
+        # Round-trip through bytes so replies look exactly like sniffed frames
+        return Ether(bytes(reply))
+
+    def _offer_for(self, chaddr):
+        offer = self.offers.get(chaddr)
+        return offer[0] if offer else None
+
+    def _lease_for(self, chaddr):
+        for ip, (holder, _) in self.leases.items():
+            if holder == chaddr:
+                return ip
+        return None
+
+    def _offered_free(self):
+        return [ip for ip, _ in self.offers.values() if ip not in self.leases]
+
+    def _next_free(self):
+        taken = set(self.leases) | {ip for ip, _ in self.offers.values()}
+        for ip in self.pool:
+            if ip not in taken:
+                return ip
+        return None
+
+    def _expire(self):
+        now = self.clock()
+        for ip in [ip for ip, (_, expires) in self.leases.items() if expires <= now]:
+            del self.leases[ip]
+        # Unclaimed offers go back to the pool after offer_hold seconds
+        for chaddr in [chaddr for chaddr, (_, expires) in self.offers.items() if expires <= now]:
+            del self.offers[chaddr]
+
+
+def normalize_frame(frame):
+    """Dissect a frame from its bytes, as a real sniffer would see it
+
+    Frames built in app.py still hold symbolic values such as
+    ('message-type', 'discover') until they are serialized.
+    """
+    if isinstance(frame, (bytes, bytearray)):
+        return Ether(bytes(frame))
+    if Ether not in frame:
+        frame = Ether() / frame
+    return Ether(bytes(frame))
+
+
+class SimulatedTransport:
+    """Drop-in replacement for ScapyTransport backed by a SimulatedDhcpServer
+
+    Delivery times and timeouts use the server's clock. With the default
+    real clock, waits block on a condition variable; pass `sleep` for a
+    virtual clock and waits call it instead, so they take no real time.
+    Sniff filters are not interpreted: only frames sent by the simulated
+    servers are ever delivered. A sniff or sr1 without a timeout gives up
+    after `max_wait` with TimeoutError rather than hanging forever.
+    extra_servers share the segment with `server`, e.g. a rogue DHCP server
+    that also answers every broadcast.
+    """
+
+    def __init__(self, server, sleep=None, max_wait=30.0, extra_servers=()):
+        self.server = server
+        self.servers = [server] + list(extra_servers)
+        self.clock = server.clock
+        self.sleep = sleep
+        self.max_wait = max_wait
+        self.sent = []
+        self._inbox = []  # heap of (deliver_at, order, frame)
+        self._order = 0
+        self._cond = threading.Condition()
+
+    def sendp(self, frame, iface=None):
+        frame = normalize_frame(frame)
+        self.sent.append(frame)
+        for server in self.servers:
+            self._deliver(server.handle(frame))
+
+    def send(self, packet, iface=None):
+        self.sent.append(normalize_frame(packet))
+
+    def sniff(self, iface=None, filter=None, count=0, timeout=None, **kwargs):
+        guarded = timeout is None
+        deadline = self.clock() + (self.max_wait if guarded else timeout)
+        packets = []
+        with self._cond:
+            while not count or len(packets) < count:
+                now = self.clock()
+                if self._inbox and self._inbox[0][0] <= now:
+                    packets.append(heapq.heappop(self._inbox)[2])
+                    continue
+                if now >= deadline:
+                    if guarded and not packets:
+                        raise TimeoutError(f"no frame from simulated server within {self.max_wait}s")
+                    break
+                wake = min(self._inbox[0][0], deadline) if self._inbox else deadline
+                self._wait(wake - now)
+        return packets
+
+    def sr1(self, packet, timeout=None, iface=None):
+        frame = normalize_frame(packet)
+        self.sent.append(frame)
+        replies = []
+        for server in self.servers:
+            replies = replies or server.handle(frame)
+        limit = self.max_wait if timeout is None else timeout
+
+        if not replies or replies[0][0] > limit:
+            self._pause(limit)
+            if timeout is None:
+                raise TimeoutError(f"no answer from simulated server within {self.max_wait}s")
+            return None
+
+        delay, reply = replies[0]
+        self._pause(delay)
+        return reply
+
+    def l2socket(self, iface=None):
+        return SimulatedSocket(self)
+
+    def listen(self, iface=None, filter=None):
+        return SimulatedListener(self)
+
+    def _wait(self, duration):
+        # Caller holds the condition
+        if self.sleep:
+            self.sleep(max(0, duration))
+        else:
+            self._cond.wait(max(0, duration))
+
+    def _pause(self, duration):
+        if duration <= 0:
+            return
+        if self.sleep:
+            self.sleep(duration)
+        else:
+            time.sleep(duration)
+
+    def _deliver(self, replies):
+        if not replies:
+            return
+        now = self.clock()
+        with self._cond:
+            for delay, reply in replies:
+                self._order += 1
+                heapq.heappush(self._inbox, (now + delay, self._order, reply))
+            self._cond.notify_all()
+
+
+class SimulatedListener:
+    """Capture socket handed out by SimulatedTransport.listen()"""
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def recv(self, timeout):
+        frames = self.transport.sniff(count=1, timeout=max(timeout, 0))
+        return frames[0] if frames else None
+
+    def close(self):
+        pass
+
+
+class SimulatedSocket:
+    """Reusable L2 socket handed out by SimulatedTransport.l2socket()"""
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def send(self, frame):
+        self.transport.sendp(frame)
+        return len(frame)
+
+    def close(self):
+        pass
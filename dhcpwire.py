@@ -0,0 +1,163 @@
+"""
+DHCP wire format helpers shared by discovery, the pcap analyzer and the
+passive detector
+parse_frame() decodes Ether/IPv4/UDP/BOOTP/DHCP straight from bytes with
+struct, which is far cheaper than a full Scapy dissection when going
+through millions of captured frames. Options come back as (name, value)
+tuples named the way Scapy names them, so summarize_options() works on
+either source.
+"""
+
+import socket
+import struct
+
+MESSAGE_TYPES = {1: 'discover', 2: 'offer', 3: 'request', 4: 'decline',
+                 5: 'ack', 6: 'nak', 7: 'release', 8: 'inform'}
+
+DHCP_MAGIC = b"\x63\x82\x53\x63"
+
+ETH_P_IP = 0x0800
+ETH_P_8021Q = 0x8100
+
+BOOTP_HEADER = struct.Struct("!BBBBIHH4s4s4s4s16s")  # op .. chaddr, 44 bytes
+BOOTP_FIXED_LEN = 236  # Header plus sname/file
+
+
+def _ip(value):
+    return socket.inet_ntoa(value[:4])
+
+
+def _u32(value):
+    return struct.unpack("!I", value[:4])[0]
+
+
+# code -> (Scapy option name, decoder)
+OPTIONS = {
+    1: ('subnet_mask', _ip),
+    3: ('router', _ip),
+    6: ('name_server', _ip),
+    12: ('hostname', bytes),
+    50: ('requested_addr', _ip),
+    51: ('lease_time', _u32),
+    53: ('message-type', lambda value: value[0]),
+    54: ('server_id', _ip),
+    58: ('renewal_time', _u32),
+    59: ('rebinding_time', _u32),
+    61: ('client_id', bytes),
+}
+
+
+def summarize_options(options):
+    """Collect the options we care about from a list of (name, value) tuples
+
+    Accepts Scapy's packet[DHCP].options as well as parse_options() output.
+    """
+    summary = {
+        'message_type': None,
+        'server_id': None,
+        'router': None,
+        'subnet_mask': None,
+        'lease_time': None,
+        'requested_addr': None
+    }
+    for option in options:
+        if not isinstance(option, tuple) or len(option) < 2:
+            continue
+        name = 'message_type' if option[0] == 'message-type' else option[0]
+        if name in summary and summary[name] is None:
+            value = option[1]
+            # Scapy may expand list-valued options such as router
+            summary[name] = value[0] if isinstance(value, list) and value else value
+    return summary
+
+
+def parse_options(data):
+    """Decode a DHCP options field into (name, value) tuples"""
+    options = []
+    i = 0
+    end = len(data)
+    while i < end:
+        code = data[i]
+        if code == 0:  # pad
+            i += 1
+            continue
+        if code == 255 or i + 1 >= end:
+            break
+        length = data[i + 1]
+        value = data[i + 2:i + 2 + length]
+        i += 2 + length
+        known = OPTIONS.get(code)
+        if known and len(value) >= 1:
+            try:
+                options.append((known[0], known[1](value)))
+            except (struct.error, OSError, IndexError):
+                pass
+        else:
+            options.append((code, bytes(value)))
+    return options
+
+
+def parse_frame(frame, link_offset=0):
+    """Decode a DHCP frame from raw bytes
+
+    Returns a dict with the Ethernet source, IP addresses, BOOTP fields and
+    decoded options, or None if the frame is not IPv4/UDP DHCP.
+    link_offset skips a non-Ethernet link header (e.g. Linux cooked capture)
+    whose last two bytes are the EtherType.
+    """
+    if link_offset:
+        if len(frame) < link_offset:
+            return None
+        src_mac = None
+        ethertype = struct.unpack_from("!H", frame, link_offset - 2)[0]
+        offset = link_offset
+    else:
+        if len(frame) < 14:
+            return None
+        src_mac = frame[6:12]
+        ethertype = struct.unpack_from("!H", frame, 12)[0]
+        offset = 14
+        if ethertype == ETH_P_8021Q and len(frame) >= 18:
+            ethertype = struct.unpack_from("!H", frame, 16)[0]
+            offset = 18
+
+    if ethertype != ETH_P_IP or len(frame) < offset + 20:
+        return None
+
+    version_ihl = frame[offset]
+    ihl = (version_ihl & 0x0F) * 4
+    if version_ihl >> 4 != 4 or frame[offset + 9] != 17:  # IPv4 / UDP
+        return None
+    ip_src = frame[offset + 12:offset + 16]
+    ip_dst = frame[offset + 16:offset + 20]
+
+    udp = offset + ihl
+    if len(frame) < udp + 8:
+        return None
+    sport, dport = struct.unpack_from("!HH", frame, udp)
+    if not ({sport, dport} & {67, 68}):
+        return None
+
+    bootp = udp + 8
+    if len(frame) < bootp + BOOTP_FIXED_LEN + 4:
+        return None
+    op, _, _, _, xid, _, flags, ciaddr, yiaddr, siaddr, _, chaddr = BOOTP_HEADER.unpack_from(frame, bootp)
+
+    magic = bootp + BOOTP_FIXED_LEN
+    if frame[magic:magic + 4] != DHCP_MAGIC:
+        return None
+    options = parse_options(frame[magic + 4:])
+
+    return {
+        'src_mac': ':'.join(f'{b:02x}' for b in src_mac) if src_mac else None,
+        'ip_src': socket.inet_ntoa(ip_src),
+        'ip_dst': socket.inet_ntoa(ip_dst),
+        'op': op,
+        'xid': xid,
+        'flags': flags,
+        'ciaddr': socket.inet_ntoa(ciaddr),
+        'yiaddr': socket.inet_ntoa(yiaddr),
+        'siaddr': socket.inet_ntoa(siaddr),
+        'chaddr': ':'.join(f'{b:02x}' for b in chaddr[:6]),
+        'options': options
+    }
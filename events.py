@@ -0,0 +1,97 @@
+"""
+Event broker for the Server-Sent Events channel
+Worker threads and request handlers publish lab session events; every open
+dashboard gets its own bounded queue so a slow tab never blocks the publisher.
+Each open stream also holds a server thread for as long as the tab is open,
+so the number of subscribers can be capped; past the cap subscribe() raises
+SubscribersFull and the dashboard falls back to polling.
+"""
+
+import json
+import queue
+import threading
+
+
+class SubscribersFull(RuntimeError):
+    """The broker already has max_subscribers open streams"""
+
+
+class EventBroker:
+    """Fan-out of named events to subscriber queues, at most max_subscribers of them (None: no cap)"""
+
+    def __init__(self, queue_size=1000, max_subscribers=None):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """Register a new subscriber and return its queue"""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                raise SubscribersFull(f"{self.max_subscribers} event streams already open")
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Remove a subscriber queue"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, name, data=None):
+        """Deliver an event to every subscriber without blocking"""
+        event = (name, data or {})
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Subscriber fell behind - drop its backlog and ask it to resync
+                self._drain(subscriber)
+                try:
+                    subscriber.put_nowait(('resync', {}))
+                except queue.Full:
+                    pass
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    @staticmethod
+    def _drain(subscriber):
+        try:
+            while True:
+                subscriber.get_nowait()
+        except queue.Empty:
+            pass
+
+
+def format_sse(name, data):
+    """Encode an event in text/event-stream format"""
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_events(broker, keepalive=15, subscriber=None):
+    """Generator yielding SSE frames for one subscriber until the client disconnects
+
+    Pass a queue from broker.subscribe() to find out about SubscribersFull
+    before the response starts; otherwise one is subscribed on first next().
+    """
+    if subscriber is None:
+        subscriber = broker.subscribe()
+    try:
+        yield "retry: 2000\n\n"
+        while True:
+            try:
+                name, data = subscriber.get(timeout=keepalive)
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(name, data)
+    finally:
+        broker.unsubscribe(subscriber)
@@ -0,0 +1,97 @@
+"""
+Lease expiry scheduler
+A min-heap of (deadline, key) served by one timer thread, so thousands of
+leases cost one sleeping thread instead of one timer each. Rescheduling or
+cancelling a key leaves its old heap entry behind; stale entries are
+skipped when they reach the top.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger('starve.expiry')
+
+
+class ExpiryScheduler:
+    """Calls on_expire(key, deadline) once a key's deadline has passed"""
+
+    def __init__(self, on_expire, clock=time.time):
+        self.on_expire = on_expire
+        self.clock = clock
+        self._heap = []          # (deadline, order, key)
+        self._deadlines = {}     # key -> (deadline, order) of its live heap entry
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._generation = 0     # Bumped by stop() so an old timer thread exits
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def schedule(self, key, deadline):
+        """Expire `key` at `deadline` (clock time), replacing any earlier schedule"""
+        with self._cond:
+            order = next(self._order)
+            self._deadlines[key] = (deadline, order)
+            heapq.heappush(self._heap, (deadline, order, key))
+            # Wake the timer only if this is now the earliest deadline
+            if self._heap[0][1] == order:
+                self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, args=(self._generation,), daemon=True)
+                self._thread.start()
+
+    def cancel(self, key):
+        with self._cond:
+            self._deadlines.pop(key, None)
+            self._compact()
+
+    def clear(self):
+        with self._cond:
+            self._deadlines.clear()
+            self._heap = []
+
+    def deadline(self, key):
+        entry = self._deadlines.get(key)
+        return entry[0] if entry else None
+
+    def stop(self):
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread and thread is not threading.current_thread():
+            thread.join(1.0)
+
+    def _compact(self):
+        # Caller holds the condition. Rebuild once stale entries dominate the heap
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._deadlines):
+            self._heap = [(deadline, order, key) for key, (deadline, order) in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def _run(self, generation):
+        while True:
+            due = []
+            with self._cond:
+                while generation == self._generation:
+                    now = self.clock()
+                    while self._heap and self._heap[0][0] <= now:
+                        deadline, order, key = heapq.heappop(self._heap)
+                        if self._deadlines.get(key) == (deadline, order):
+                            del self._deadlines[key]
+                            due.append((key, deadline))
+                    if due:
+                        break
+                    self._cond.wait(self._heap[0][0] - now if self._heap else None)
+                if generation != self._generation:
+                    return
+
+            # Callbacks run without the lock so they may reschedule or cancel
+            for key, deadline in due:
+                try:
+                    self.on_expire(key, deadline)
+                except Exception as e:
+                    logger.exception("[-] Expiry callback error for %s: %s", key, e)
@@ -0,0 +1,66 @@
+"""
+Lease export as CSV or JSON lines
+Rows come from a generator (the ledger snapshot or history.iter_leases) and
+go out one line at a time, so an export of any length uses the same memory.
+"""
+
+import csv
+import json
+from datetime import datetime
+
+from history import FIELDS
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson'
+}
+
+
+def parse_time(value):
+    """Epoch seconds or an ISO 8601 timestamp as epoch seconds; None passes through"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def ledger_rows(leases, session=None, server=None, since=None, until=None):
+    """Leases currently held, shaped like history rows and filtered the same way"""
+    for entry in leases:
+        acquired = entry.get('acquired')
+        if session is not None and entry.get('session') != session:
+            continue
+        if server is not None and entry.get('server') != server:
+            continue
+        if since is not None and (acquired is None or acquired < since):
+            continue
+        if until is not None and (acquired is None or acquired >= until):
+            continue
+        row = {field: entry.get(field) for field in FIELDS}
+        row['outcome'] = 'held'
+        yield row
+
+
+class _Line:
+    """File-like target for csv.writer that hands back what was written"""
+
+    def write(self, text):
+        return text
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in FIELDS])
+
+
+def stream_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def stream(rows, format):
+    return stream_csv(rows) if format == 'csv' else stream_jsonl(rows)
@@ -0,0 +1,134 @@
+"""
+Session history
+Every attack session and every lease it won is kept in SQLite next to the
+lease journal. Unlike the journal this table is never compacted: it is the
+audit trail that /api/export reads, one batch of rows at a time.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger('starve.history')
+
+FIELDS = ('session', 'ip', 'mac', 'server', 'acquired', 'lease_time', 'expires', 'released', 'outcome')
+
+
+class SessionHistory:
+    """Sessions and the leases they acquired, with how each lease ended"""
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                interface TEXT,
+                server TEXT,
+                started REAL NOT NULL,
+                stopped REAL,
+                leases INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS lease_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session TEXT,
+                ip TEXT NOT NULL,
+                mac TEXT,
+                server TEXT,
+                acquired REAL,
+                lease_time INTEGER,
+                expires REAL,
+                released REAL,
+                outcome TEXT
+            );
+            CREATE INDEX IF NOT EXISTS lease_history_acquired ON lease_history (acquired);
+            CREATE INDEX IF NOT EXISTS lease_history_open ON lease_history (ip) WHERE released IS NULL;
+        """)
+
+    def start_session(self, session_id, interface, server):
+        self._execute("INSERT OR REPLACE INTO sessions (id, interface, server, started) VALUES (?, ?, ?, ?)",
+                      (session_id, interface, server, self.clock()))
+
+    def end_session(self, session_id, leases):
+        self._execute("UPDATE sessions SET stopped = ?, leases = ? WHERE id = ?",
+                      (self.clock(), leases, session_id))
+
+    def record_lease(self, entry):
+        self._execute(
+            "INSERT INTO lease_history (session, ip, mac, server, acquired, lease_time, expires) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (entry.get('session'), entry['ip'], entry.get('mac'), entry.get('server'),
+             entry.get('acquired'), entry.get('lease_time'), entry.get('expires'))
+        )
+
+    def end_lease(self, ip, outcome):
+        """Close the open history row for ip; later calls for the same lease are no-ops"""
+        self._execute("UPDATE lease_history SET released = ?, outcome = ? WHERE ip = ? AND released IS NULL",
+                      (self.clock(), outcome, ip))
+
+    def on_ledger_change(self, op, payload):
+        """LeaseLedger listener; removals not already explained count as releases"""
+        if op == 'add':
+            self.record_lease(payload)
+        elif op == 'remove':
+            self.end_lease(payload, 'released')
+        elif op == 'clear':
+            kept = [entry['ip'] for entry in payload or ()]
+            self._execute(
+                "UPDATE lease_history SET released = ?, outcome = 'cleared' WHERE released IS NULL "
+                f"AND ip NOT IN ({','.join('?' * len(kept))})",
+                [self.clock()] + kept
+            )
+
+    def sessions(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, interface, server, started, stopped, leases FROM sessions ORDER BY started"
+            ).fetchall()
+        return [dict(zip(('id', 'interface', 'server', 'started', 'stopped', 'leases'), row)) for row in rows]
+
+    def iter_leases(self, session=None, server=None, since=None, until=None, batch_size=500):
+        """Yield lease history dicts in acquisition order, fetching `batch_size` rows at a time
+
+        Uses its own connection, so a slow export never holds up the writers.
+        """
+        clauses, params = [], []
+        for clause, value in (('session = ?', session), ('server = ?', server),
+                              ('acquired >= ?', since), ('acquired < ?', until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+
+        conn = self._connect()
+        try:
+            cursor = conn.execute(f"SELECT {', '.join(FIELDS)} FROM lease_history{where} ORDER BY id", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(zip(FIELDS, row))
+        finally:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _execute(self, sql, params):
+        try:
+            with self._lock:
+                self._conn.execute(sql, params)
+        except sqlite3.Error as e:
+            # The history is an audit aid; never let it break the attack loop
+            logger.error("[-] Session history write failed: %s", e)
@@ -0,0 +1,138 @@
+"""
+HTTP validators, static asset versioning and response compression
+JSON endpoints build their ETag from version counters they already keep
+(the ledger seq, the interface registry version), so a 304 costs no
+serialisation and no hashing. Static URLs carry a content hash (?v=...) and
+may be cached for a year. Bodies above a threshold are gzip (or brotli, when
+the module is installed) compressed; compressed bodies that have an ETag
+are kept in a small LRU so unchanged assets are compressed once.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Part of every version ETag, so tags from before a restart never match
+BOOT_ID = uuid.uuid4().hex[:8]
+
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE = ('text/html', 'text/css', 'text/plain', 'text/csv', 'application/json',
+                'application/javascript', 'text/javascript', 'application/x-ndjson', 'image/svg+xml')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def version_etag(*parts):
+    """ETag value for a response fully determined by `parts`"""
+    return '-'.join([BOOT_ID] + [str(part) for part in parts])
+
+
+def is_fresh(request, etag):
+    """True if the client's If-None-Match already names this version"""
+    return request.if_none_match.contains_weak(etag)
+
+
+class StaticVersions:
+    """Content hashes of static files, recomputed only when a file changes"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._hashes = {}  # filename -> (mtime, size, hash)
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        path = os.path.join(self.folder, filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._hashes.get(filename)
+            if cached and cached[:2] == (stat.st_mtime, stat.st_size):
+                return cached[2]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()[:12]
+        with self._lock:
+            self._hashes[filename] = (stat.st_mtime, stat.st_size, digest)
+        return digest
+
+
+class Compressor:
+    """Compresses eligible responses in place according to Accept-Encoding"""
+
+    def __init__(self, min_size=MIN_COMPRESS_SIZE, level=6, cache_size=64):
+        self.min_size = min_size
+        self.level = level
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (etag, encoding) -> body
+        self._lock = threading.Lock()
+
+    def choose(self, accept_encodings):
+        """Best encoding we can produce that the client accepts, or None"""
+        if brotli is not None and accept_encodings['br']:
+            return 'br'
+        if accept_encodings['gzip']:
+            return 'gzip'
+        return None
+
+    def compress(self, response, accept_encodings):
+        if (response.status_code != 200 or response.mimetype not in COMPRESSIBLE
+                or 'Content-Encoding' in response.headers):
+            return response
+        # Generators (the event stream, exports) are never buffered; files are
+        if response.is_streamed and not response.direct_passthrough:
+            return response
+        if response.content_length is not None and response.content_length < self.min_size:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        encoding = self.choose(accept_encodings)
+        if encoding is None:
+            return response
+
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        etag, _ = response.get_etag()
+        body = self._cached(etag, encoding)
+        if body is None:
+            body = self._encode(data, encoding)
+            self._store(etag, encoding, body)
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            # Same representation semantics, different bytes: weak validator
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _encode(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=min(self.level, 11))
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def _cached(self, etag, encoding):
+        if not etag:
+            return None
+        with self._lock:
+            body = self._cache.get((etag, encoding))
+            if body is not None:
+                self._cache.move_to_end((etag, encoding))
+            return body
+
+    def _store(self, etag, encoding, body):
+        if not etag:
+            return
+        with self._lock:
+            self._cache[(etag, encoding)] = body
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
@@ -0,0 +1,160 @@
+"""
+Cached network interface inventory
+Enumerating interfaces through netifaces or psutil is slow on hosts with
+many veth/bridge/container links, so the result is cached. On Linux the
+cache is invalidated by rtnetlink link/address notifications; elsewhere (or
+if netlink is unavailable) it simply expires after a short TTL.
+"""
+
+import logging
+import socket
+import sys
+import threading
+import time
+
+# Try to import netifaces, fall back to psutil if not available
+try:
+    import netifaces
+    USE_NETIFACES = True
+except ImportError:
+    netifaces = None
+    USE_NETIFACES = False
+    print("Note: Using psutil for network interface detection (netifaces not available)")
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger('starve.interfaces')
+
+LOOPBACK_NAMES = ('lo', 'lo0', 'Loopback Pseudo-Interface 1')
+
+# rtnetlink multicast groups (linux/rtnetlink.h)
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+
+
+def is_loopback(name):
+    return name in LOOPBACK_NAMES or 'loopback' in name.lower()
+
+
+def enumerate_interfaces():
+    """Enumerate non-loopback interfaces with an IPv4 address (cross-platform)
+
+    Each entry has name, ip, netmask, mac, mtu and up. Link details come
+    from a single psutil.net_if_stats() call when psutil is installed.
+    """
+    stats = psutil.net_if_stats() if psutil else {}
+    interfaces = []
+
+    if USE_NETIFACES:
+        # Use netifaces (Linux/macOS preferred)
+        for iface in netifaces.interfaces():
+            try:
+                if is_loopback(iface):
+                    continue
+                addrs = netifaces.ifaddresses(iface)
+                if netifaces.AF_INET not in addrs:
+                    continue
+                inet = addrs[netifaces.AF_INET][0]
+                link = addrs.get(netifaces.AF_LINK, [{}])[0]
+                interfaces.append(_describe(iface, inet['addr'], inet.get('netmask'), link.get('addr'), stats))
+            except Exception:
+                pass
+    else:
+        # Use psutil (Windows fallback)
+        for iface, addr_list in psutil.net_if_addrs().items():
+            if is_loopback(iface):
+                continue
+            inet = None
+            mac = None
+            for addr in addr_list:
+                if addr.family == socket.AF_INET and inet is None and not addr.address.startswith('127.'):
+                    inet = addr  # Only keep the first IPv4 address
+                elif addr.family == psutil.AF_LINK:
+                    mac = addr.address
+            if inet:
+                interfaces.append(_describe(iface, inet.address, inet.netmask, mac, stats))
+
+    return interfaces
+
+
+def _describe(name, ip, netmask, mac, stats):
+    link = stats.get(name)
+    return {
+        'name': name,
+        'ip': ip,
+        'netmask': netmask,
+        'mac': mac,
+        'mtu': link.mtu if link else None,
+        'up': link.isup if link else None
+    }
+
+
+class InterfaceRegistry:
+    """Caches enumerate_interfaces() until netlink reports a change or the TTL runs out"""
+
+    def __init__(self, enumerate=enumerate_interfaces, ttl=5.0, use_netlink=True, clock=time.monotonic):
+        self.enumerate = enumerate
+        self.ttl = ttl
+        self.clock = clock
+        self.version = 0  # Bumped whenever the inventory actually changes
+        self._interfaces = None
+        self._stale = True
+        self._expires = 0.0
+        self._lock = threading.Lock()
+        self._watching = False
+        self._use_netlink = use_netlink and sys.platform.startswith('linux') and hasattr(socket, 'AF_NETLINK')
+
+    def list(self):
+        """Return the cached interface list, refreshing it if stale"""
+        with self._lock:
+            if self._stale or (not self._watching and self.clock() >= self._expires):
+                self._refresh()
+            return self._interfaces
+
+    def get(self, name):
+        for iface in self.list():
+            if iface['name'] == name:
+                return iface
+        return None
+
+    def invalidate(self):
+        """Force the next list() to re-enumerate"""
+        self._stale = True
+
+    def _refresh(self):
+        # Caller holds the lock
+        if self._use_netlink and not self._watching:
+            self._start_watcher()
+        # Clear the flag first so a notification during enumeration isn't lost
+        self._stale = False
+        interfaces = self.enumerate()
+        if interfaces != self._interfaces:
+            self.version += 1
+        self._interfaces = interfaces
+        self._expires = self.clock() + self.ttl
+
+    def _start_watcher(self):
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR))
+        except OSError as e:
+            logger.warning("[-] Netlink unavailable, interface cache falls back to a %ss TTL: %s", self.ttl, e)
+            self._use_netlink = False
+            return
+        self._watching = True
+        threading.Thread(target=self._watch, args=(sock,), daemon=True).start()
+
+    def _watch(self, sock):
+        try:
+            while True:
+                # Any link or address message means the inventory may have changed
+                sock.recv(65536)
+                self.invalidate()
+        except OSError:
+            self._watching = False
+            self._stale = True
+        finally:
+            sock.close()
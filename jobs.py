@@ -0,0 +1,163 @@
+"""
+Background jobs for long-running operations
+A job runs in its own daemon thread and exposes progress that the API can
+return while the HTTP request that started it has long since completed
+"""
+
+import threading
+import time
+import uuid
+
+
+class Job:
+    """Progress and outcome of one background operation"""
+
+    def __init__(self, kind, total=0):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.state = 'pending'
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.state in ('done', 'failed')
+
+    def advance(self, succeeded=1, failed=0):
+        """Record progress on the job's items"""
+        with self._lock:
+            self.completed += succeeded
+            self.failed += failed
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'state': self.state,
+                'total': self.total,
+                'completed': self.completed,
+                'failed': self.failed,
+                'progress': (self.completed + self.failed) / self.total if self.total else (1.0 if self.done else 0.0),
+                'result': self.result,
+                'error': self.error,
+                'created': self.created,
+                'started': self.started,
+                'finished': self.finished
+            }
+
+
+class JobRegistry:
+    """Starts jobs in background threads and keeps recent ones for polling"""
+
+    def __init__(self, max_jobs=50):
+        self.max_jobs = max_jobs
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def start(self, kind, target, args=(), total=0, executor=None):
+        """Run target(job, *args) in a daemon thread; its return value becomes job.result
+
+        With an executor (see workers.PacketExecutor) the job runs on its
+        pool instead, and ExecutorBusy propagates before the job is registered.
+        """
+        job = Job(kind, total=total)
+        if executor is not None:
+            executor.submit(self._run, job, target, args)
+        else:
+            thread = threading.Thread(target=self._run, args=(job, target, args), daemon=True)
+            thread.start()
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def active(self, kind):
+        """Return the unfinished job of this kind, if any"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.kind == kind and not job.done:
+                    return job
+        return None
+
+    def _run(self, job, target, args):
+        job.state = 'running'
+        job.started = time.time()
+        try:
+            job.result = target(job, *args)
+            job.state = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.state = 'failed'
+        finally:
+            job.finished = time.time()
+
+    def _prune(self):
+        # Caller holds the lock; drop the oldest finished jobs beyond the limit
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        for job_id in [job.id for job in self._jobs.values() if job.done][:excess]:
+            del self._jobs[job_id]
+
+
+class JobCache:
+    """One job per key, shared by every caller
+
+    A caller asking for a key whose job is still running gets that job
+    rather than a duplicate. A successful job is reused until `ttl` seconds
+    after it finished, or until invalidate() drops it. Failed jobs are not
+    cached, so the next call retries.
+    """
+
+    def __init__(self, registry, ttl=300.0, clock=time.time):
+        self.registry = registry
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The running or still-fresh job for key, or None"""
+        with self._lock:
+            return self._live(key)
+
+    def get_or_start(self, key, kind, target, args=(), executor=None):
+        """Return (job, shared): the existing job for key, or a newly started one"""
+        with self._lock:
+            job = self._live(key)
+            if job is not None:
+                return job, True
+            job = self._entries[key] = self.registry.start(kind, target, args=args, executor=executor)
+            return job, False
+
+    def invalidate(self, key=None):
+        """Forget one key's result, or every key's; running jobs carry on but are not shared"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _live(self, key):
+        # Caller holds the lock
+        job = self._entries.get(key)
+        if job is None:
+            return None
+        if not job.done:
+            return job
+        if job.state == 'done' and self.clock() - job.finished < self.ttl:
+            return job
+        del self._entries[key]
+        return None
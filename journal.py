@@ -0,0 +1,162 @@
+"""
+Durable lease journal
+Every lease and release is appended to a SQLite database in WAL mode so the
+leases held by spoofed MACs survive a crash or restart and can be released
+by the next run
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger('starve.journal')
+
+
+class LeaseJournal:
+    """Append-only record of ledger changes with replay and compaction
+
+    Compaction runs on the journal's own thread and only deletes dead rows
+    up to a fixed id, so rows appended meanwhile keep their order. Appends
+    run in the ledger listener, under the ledger lock (as SessionHistory's
+    writes to the same database do), and do wait for compaction's write
+    transaction. Deletes are therefore split into transactions of at most
+    `compact_batch` rows, so an append waits for one short commit, not the
+    whole compaction.
+    """
+
+    def __init__(self, path, compact_threshold=1000, compact_batch=500):
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self.compact_batch = compact_batch
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._appended = 0  # Rows written since the last compaction
+
+        self._conn = self._connect()
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS journal (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                op TEXT NOT NULL,
+                ip TEXT,
+                data TEXT,
+                recorded REAL NOT NULL
+            )
+        """)
+        self._compact_conn = self._connect()
+
+        self._wake = threading.Event()
+        self._closed = False
+        self._compactor = threading.Thread(target=self._compact_loop, daemon=True)
+        self._compactor.start()
+
+    def record_lease(self, entry):
+        self._append('lease', entry['ip'], json.dumps(entry))
+
+    def record_release(self, ip):
+        self._append('release', ip, None)
+
+    def record_clear(self, kept=()):
+        """Record a clear; leases in `kept` survive it"""
+        self._append('clear', None, None)
+        for entry in kept:
+            self.record_lease(entry)
+
+    def on_ledger_change(self, op, payload):
+        """LeaseLedger listener that mirrors every change into the journal"""
+        if op == 'add':
+            self.record_lease(payload)
+        elif op == 'remove':
+            self.record_release(payload)
+        elif op == 'clear':
+            self.record_clear(payload or ())
+
+    def replay(self):
+        """Fold the journal into the leases still held, in acquisition order"""
+        with self._lock:
+            leases = self._fold(self._conn)
+        return [json.loads(data) for _, data in leases.values()]
+
+    def compact(self):
+        """Delete every row that no longer describes an active lease"""
+        with self._compact_lock:
+            conn = self._compact_conn
+            upto = conn.execute("SELECT COALESCE(MAX(id), 0) FROM journal").fetchone()[0]
+            survivors = self._fold(conn, upto)
+            self._appended = 0
+
+            keep = {row_id for row_id, _ in survivors.values()}
+            dead = [row_id for (row_id,) in conn.execute("SELECT id FROM journal WHERE id <= ? ORDER BY id", (upto,))
+                    if row_id not in keep]
+            # Oldest first: a dead row is always outlived by the later row that
+            # made it dead, so the journal replays the same between batches
+            for start in range(0, len(dead), self.compact_batch):
+                batch = dead[start:start + self.compact_batch]
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute(f"DELETE FROM journal WHERE id IN ({','.join('?' * len(batch))})", batch)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        return len(survivors)
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._compactor.join(timeout=5)
+        with self._compact_lock:
+            self._compact_conn.close()
+        with self._lock:
+            self._conn.close()
+
+    def _connect(self):
+        # Appends and compaction use separate connections; the busy timeout
+        # lets one wait for the other's short write transaction
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _fold(conn, upto=None):
+        # ip -> (row id, data) of the lease row that is still in effect
+        if upto is None:
+            rows = conn.execute("SELECT id, op, ip, data FROM journal ORDER BY id")
+        else:
+            rows = conn.execute("SELECT id, op, ip, data FROM journal WHERE id <= ? ORDER BY id", (upto,))
+
+        leases = {}
+        for row_id, op, ip, data in rows:
+            if op == 'lease':
+                leases.pop(ip, None)  # Re-leased IPs move to the end
+                leases[ip] = (row_id, data)
+            elif op == 'release':
+                leases.pop(ip, None)
+            elif op == 'clear':
+                leases.clear()
+        return leases
+
+    def _append(self, op, ip, data):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO journal (op, ip, data, recorded) VALUES (?, ?, ?, ?)",
+                (op, ip, data, time.time())
+            )
+            self._appended += 1
+            # A clear makes every earlier row dead, and so does a long run of churn
+            if op == 'clear' or self._appended >= self.compact_threshold:
+                self._wake.set()
+
+    def _compact_loop(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.compact()
+            except Exception as e:
+                logger.exception("[-] Journal compaction error: %s", e)
@@ -0,0 +1,155 @@
+"""
+Lease ledger shared by the attack thread and the Flask handlers
+Leases are indexed by IP and by MAC, iterate in acquisition order, and every
+mutation is recorded in a bounded change log for incremental status polling
+"""
+
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger('starve.ledger')
+
+
+class LeaseLedger:
+    """Thread-safe, insertion-ordered store of acquired leases
+
+    Each lease is a dict with at least 'ip' and 'mac' keys. Lease dicts are
+    treated as immutable once added, so snapshots can share them.
+    """
+
+    def __init__(self, change_log_size=4096):
+        self._lock = threading.Lock()
+        self._by_ip = {}    # dicts keep insertion order
+        self._by_mac = {}
+        self._seq = 0
+        self._floor = 0     # Oldest seq a client can resume from without a full reset
+        self._changes = deque(maxlen=change_log_size)
+        self._snapshot = (0, [])
+        self._listeners = []
+
+    def __len__(self):
+        return len(self._by_ip)
+
+    def __contains__(self, ip):
+        return ip in self._by_ip
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def add_listener(self, callback):
+        """Call callback(op, payload) after every add/remove/clear
+
+        Listeners run under the ledger lock, so they see changes in order
+        and must not call back into the ledger.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    def add(self, entry):
+        """Add a lease; returns its change seq, or None if the IP is already held"""
+        with self._lock:
+            if entry['ip'] in self._by_ip:
+                return None
+            self._by_ip[entry['ip']] = entry
+            self._by_mac[entry['mac']] = entry
+            return self._record('add', entry)
+
+    def get(self, ip):
+        """Look up a lease by IP"""
+        return self._by_ip.get(ip)
+
+    def get_by_mac(self, mac):
+        """Look up a lease by spoofed MAC"""
+        return self._by_mac.get(mac)
+
+    def remove(self, ip):
+        """Remove a lease by IP; returns (entry, seq) or None if not held"""
+        with self._lock:
+            entry = self._by_ip.pop(ip, None)
+            if entry is None:
+                return None
+            if self._by_mac.get(entry['mac']) is entry:
+                del self._by_mac[entry['mac']]
+            return entry, self._record('remove', ip)
+
+    def clear(self, keep=None):
+        """Drop leases and force clients to resync; returns the removed leases
+
+        Leases for which keep(entry) is true stay in the ledger; listeners
+        get them as the payload of the 'clear' notification.
+        """
+        with self._lock:
+            kept = [entry for entry in self._by_ip.values() if keep and keep(entry)]
+            removed = [entry for entry in self._by_ip.values() if not (keep and keep(entry))]
+            self._by_ip = {entry['ip']: entry for entry in kept}
+            self._by_mac = {entry['mac']: entry for entry in kept}
+            self._seq += 1
+            self._floor = self._seq
+            self._changes.clear()
+            self._notify('clear', kept)
+            return removed
+
+    def mark_network_changed(self):
+        """Record that network_info changed so incremental clients refetch it"""
+        with self._lock:
+            return self._record('network', None)
+
+    def snapshot(self):
+        """Return (seq, leases) as a consistent, insertion-ordered list
+
+        The list is rebuilt at most once per change and shared between
+        callers, so it must not be mutated.
+        """
+        with self._lock:
+            if self._snapshot[0] != self._seq:
+                self._snapshot = (self._seq, list(self._by_ip.values()))
+            return self._snapshot
+
+    def changes_since(self, since):
+        """Collapse changes after `since` into adds/removals, or None if a full resync is needed"""
+        with self._lock:
+            if since < self._floor or since > self._seq:
+                return None
+
+            added = {}
+            removed = set()
+            network_changed = False
+            for seq, op, payload in self._changes:
+                if seq <= since:
+                    continue
+                if op == 'add':
+                    added[payload['ip']] = payload
+                elif op == 'remove':
+                    added.pop(payload, None)
+                    removed.add(payload)
+                elif op == 'network':
+                    network_changed = True
+
+            return {
+                'seq': self._seq,
+                'added': list(added.values()),
+                'removed': sorted(removed),
+                'network_changed': network_changed
+            }
+
+    def _record(self, op, payload):
+        # Caller holds the lock
+        self._seq += 1
+        if len(self._changes) == self._changes.maxlen:
+            # The oldest entry is about to fall off the log
+            self._floor = self._changes[0][0]
+        self._changes.append((self._seq, op, payload))
+        if op != 'network':
+            self._notify(op, payload)
+        return self._seq
+
+    def _notify(self, op, payload):
+        for callback in self._listeners:
+            try:
+                callback(op, payload)
+            except Exception as e:
+                logger.exception("[-] Ledger listener error: %s", e)
@@ -0,0 +1,163 @@
+"""
+Logging setup: records go through a queue so the session and packet threads
+never wait on a slow terminal or pipe; a listener thread does the writing
+Settings come from the environment:
+
+    STARVE_LOG_LEVEL   DEBUG, INFO (default), WARNING, ...
+    STARVE_LOG_FORMAT  text (default, same lines the tool always printed)
+                       or json (one object per line)
+
+Call sites attach an event name and fields for machine parsing:
+
+    logger.info("[+] DHCP Request sent for %s", ip, extra=fields('request-sent', ip=ip))
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+
+LOGGER_NAME = 'starve'
+MARKER = re.compile(r'^\[[^\]]{1,2}\] ')  # The "[*] " style prefix of text lines
+
+_listener = None
+
+
+def fields(event, **values):
+    """`extra` for a log call: an event name plus structured fields"""
+    return {'event': event, 'fields': values}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        data = {
+            'ts': round(record.created, 6),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'event': getattr(record, 'event', None),
+            'msg': MARKER.sub('', record.getMessage())
+        }
+        data.update(getattr(record, 'fields', {}))
+        if getattr(record, 'suppressed', 0):
+            data['suppressed'] = record.suppressed
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The plain message, noting how many similar records were rate limited"""
+
+    def format(self, record):
+        text = super().format(record)
+        if getattr(record, 'suppressed', 0):
+            text += f" ({record.suppressed} similar messages suppressed)"
+        return text
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per event: at most `burst` records at once, `rate` per second after
+
+    Errors always pass. The first record let through after a quiet spell
+    carries the number that were dropped in `suppressed`.
+    """
+
+    def __init__(self, rate=20.0, burst=50, clock=time.monotonic, max_keys=1024):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> [tokens, last refill, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        key = getattr(record, 'event', None) or (record.name, record.msg)
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.clear()
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Same process, no pickling: merge the args but keep exc_info for the formatter
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level=None, format=None, stream=None, queue_size=10000, rate=20.0, burst=50):
+    """Route the 'starve' loggers through a queue to `stream` (stdout by default)
+
+    Calling it again replaces the previous configuration.
+    """
+    global _listener
+
+    level = (level or os.environ.get('STARVE_LOG_LEVEL') or 'INFO').upper()
+    format = (format or os.environ.get('STARVE_LOG_FORMAT') or 'text').lower()
+
+    if _listener:
+        _listener.stop()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if format == 'json' else TextFormatter('%(message)s'))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(RateLimitFilter(rate=rate, burst=burst))
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    logger.handlers = [handler]
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,240 @@
+"""
+In-process metrics with a Prometheus text-format exporter
+Counters and histograms are sharded per thread: a thread only ever writes
+its own shard, so the hot path takes no lock. Shards are summed when
+/metrics is scraped. Shards of threads that have exited (the server spawns
+one per request) are folded into a base shard on scrape and whenever the
+shard list grows past a bound, so they don't pile up when nothing scrapes.
+
+    from metrics import REGISTRY
+    SENT = REGISTRY.counter('starve_discovers_sent_total', 'DHCP DISCOVERs sent')
+    SENT.inc()
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds (+Inf is implicit)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Fold dead-thread shards once this many shards are registered
+PRUNE_THRESHOLD = 64
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"expected labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Sharded:
+    """Per-thread dicts of label key -> value, merged on collect"""
+
+    def __init__(self, merge):
+        self._merge = merge
+        self._local = threading.local()
+        self._shards = []        # (thread, dict) for live writers
+        self._base = {}          # Values folded in from finished threads
+        self._prune_at = PRUNE_THRESHOLD
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) >= self._prune_at:
+                    self._fold_dead()
+                    # Many live threads: back off so registration stays amortised O(1)
+                    self._prune_at = max(PRUNE_THRESHOLD, 2 * len(self._shards))
+        return shard
+
+    def _fold_dead(self):
+        # Caller holds the lock; dead threads can no longer write their shards
+        merge = self._merge
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for key, value in shard.items():
+                    self._base[key] = merge(self._base.get(key), value)
+        self._shards = live
+
+    def _collect(self):
+        merge = self._merge
+        with self._lock:
+            self._fold_dead()
+            totals = {key: merge(None, value) for key, value in self._base.items()}
+            shards = [dict(shard) for _, shard in self._shards]  # dict() copies atomically
+        for shard in shards:
+            for key, value in shard.items():
+                totals[key] = merge(totals.get(key), value)
+        return totals
+
+
+class Counter(_Sharded):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(_add)
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._collect().get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self):
+        for key, value in sorted(self._collect().items()):
+            yield self.name + _format_labels(self.labelnames, key), value
+
+
+class Histogram(_Sharded):
+    """Fixed-bucket distribution with sum and count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(_add_lists)
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        shard = self._shard()
+        state = shard.get(key)
+        if state is None:
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels):
+        """(bucket counts, sum) for one label set; counts are not cumulative"""
+        state = self._collect().get(_label_key(self.labelnames, labels))
+        if state is None:
+            return [0] * (len(self.buckets) + 1), 0.0
+        return state[:-1], state[-1]
+
+    def samples(self):
+        for key, state in sorted(self._collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state):
+                cumulative += count
+                yield self.name + '_bucket' + _format_labels(self.labelnames, key, [('le', _format_value(bound))]), cumulative
+            yield self.name + '_sum' + _format_labels(self.labelnames, key), state[-1]
+            yield self.name + '_count' + _format_labels(self.labelnames, key), cumulative
+
+
+class Gauge:
+    """Current value, either set directly or read from a callback at scrape time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help, function=None):
+        self.name = name
+        self.help = help
+        self.function = function
+        self._value = 0
+
+    def set(self, value):
+        self._value = value
+
+    def value(self):
+        return self.function() if self.function else self._value
+
+    def samples(self):
+        yield self.name, self.value()
+
+
+def _add(current, value):
+    return value if current is None else current + value
+
+
+def _add_lists(current, value):
+    if current is None:
+        return list(value)
+    return [a + b for a, b in zip(current, value)]
+
+
+class Registry:
+    """Named metrics and the text exposition of all of them"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"metric {name} already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help, labelnames, buckets)
+
+    def gauge(self, name, help, function=None):
+        return self._register(Gauge, name, help, function)
+
+    def render(self):
+        """Prometheus text format (version 0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample, value in metric.samples():
+                lines.append(f"{sample} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
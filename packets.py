@@ -0,0 +1,47 @@
+"""
+Lazy access to the Scapy layers and functions the app uses
+`from scapy.all import *` loads every layer and contrib module, which costs
+over a second at startup even for routes that never touch a packet. Names
+here are resolved on first attribute access, importing only the Scapy
+module that defines them.
+
+    import packets
+    frame = packets.Ether(dst="ff:ff:ff:ff:ff:ff") / packets.ARP()
+"""
+
+import importlib
+
+_SOURCES = {
+    'Ether': 'scapy.layers.l2',
+    'ARP': 'scapy.layers.l2',
+    'IP': 'scapy.layers.inet',
+    'UDP': 'scapy.layers.inet',
+    'BOOTP': 'scapy.layers.dhcp',
+    'DHCP': 'scapy.layers.dhcp',
+    'RandMAC': 'scapy.volatile',
+    'mac2str': 'scapy.utils',
+    'str2mac': 'scapy.utils',
+    # scapy.config alone leaves conf.L2socket/L2listen/L3socket as None; they
+    # are filled in when scapy.arch loads, which scapy.sendrecv imports
+    'conf': 'scapy.sendrecv',
+    'send': 'scapy.sendrecv',
+    'sendp': 'scapy.sendrecv',
+    'sniff': 'scapy.sendrecv',
+    'sr1': 'scapy.sendrecv',
+}
+
+__all__ = sorted(_SOURCES)
+
+
+def __getattr__(name):
+    module = _SOURCES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def loaded():
+    """True once any Scapy module has been imported through this module"""
+    return any(name in globals() for name in _SOURCES)
@@ -0,0 +1,164 @@
+"""
+Subnet model and pool occupancy bitmap
+The subnet comes from the offered address and subnet mask seen during
+discovery. Each host address maps to one bit, so membership is an index
+computation and occupancy counts are popcounts over the byte array. The
+dashboard gets the map run-length encoded rather than as per-IP dicts.
+"""
+
+import ipaddress
+import threading
+
+# Larger subnets are narrowed to the /16 around the offered address
+MIN_PREFIX = 16
+
+if hasattr(int, 'bit_count'):
+    def popcount(value):
+        return value.bit_count()
+else:  # Python < 3.10
+    def popcount(value):
+        return bin(value).count('1')
+
+
+class PoolMap:
+    """One bit per host address of an IPv4 subnet"""
+
+    def __init__(self, network):
+        self.network = ipaddress.IPv4Network(network)
+        if self.network.prefixlen >= 31:
+            self.first = int(self.network.network_address)
+            self.size = self.network.num_addresses
+        else:
+            # Skip the network and broadcast addresses
+            self.first = int(self.network.network_address) + 1
+            self.size = self.network.num_addresses - 2
+        self.bits = bytearray((self.size + 7) // 8)
+        self.occupied = 0
+        self.version = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_offer(cls, offered_ip, subnet_mask):
+        """Build the map for the subnet an OFFER describes"""
+        network = ipaddress.IPv4Interface(f"{offered_ip}/{subnet_mask or '255.255.255.0'}").network
+        if network.prefixlen < MIN_PREFIX:
+            network = ipaddress.IPv4Interface(f"{offered_ip}/{MIN_PREFIX}").network
+        return cls(network)
+
+    def index(self, ip):
+        """Bit index of an address, or None if it is not a host of this subnet"""
+        try:
+            offset = int(ipaddress.IPv4Address(ip)) - self.first
+        except ValueError:
+            return None
+        return offset if 0 <= offset < self.size else None
+
+    def address(self, index):
+        return str(ipaddress.IPv4Address(self.first + index))
+
+    def __contains__(self, ip):
+        i = self.index(ip)
+        return i is not None and bool(self.bits[i >> 3] & (1 << (i & 7)))
+
+    def add(self, ip):
+        """Mark an address leased; returns True if it was free before"""
+        i = self.index(ip)
+        if i is None:
+            return False
+        with self._lock:
+            mask = 1 << (i & 7)
+            if self.bits[i >> 3] & mask:
+                return False
+            self.bits[i >> 3] |= mask
+            self.occupied += 1
+            self.version += 1
+            return True
+
+    def remove(self, ip):
+        """Mark an address free; returns True if it was leased"""
+        i = self.index(ip)
+        if i is None:
+            return False
+        with self._lock:
+            mask = 1 << (i & 7)
+            if not self.bits[i >> 3] & mask:
+                return False
+            self.bits[i >> 3] &= ~mask & 0xFF
+            self.occupied -= 1
+            self.version += 1
+            return True
+
+    def reset(self, ips=()):
+        """Clear the map, then mark `ips` leased"""
+        with self._lock:
+            self.bits = bytearray(len(self.bits))
+            self.occupied = 0
+            self.version += 1
+        for ip in ips:
+            self.add(ip)
+
+    def count(self, start=0, stop=None):
+        """Leased addresses with bit index in [start, stop), by popcount"""
+        stop = self.size if stop is None else min(stop, self.size)
+        if start >= stop:
+            return 0
+        with self._lock:
+            chunk = int.from_bytes(self.bits[start >> 3:(stop + 7) >> 3], 'little')
+        chunk >>= start & 7
+        return popcount(chunk & ((1 << (stop - start)) - 1))
+
+    def runs(self):
+        """Run-length encoding: alternating free/leased run lengths, starting with free
+
+        [3, 2, 5] means 3 free, 2 leased, 5 free addresses.
+        """
+        with self._lock:
+            bits = bytes(self.bits)
+        runs = []
+        current = 0   # Value of the run being counted
+        length = 0
+        remaining = self.size
+        for byte in bits:
+            width = min(8, remaining)
+            remaining -= width
+            if byte == 0 or byte == 0xFF:
+                value = byte & 1
+                if value == current:
+                    length += width
+                    continue
+                runs.append(length)
+                current, length = value, width
+                continue
+            for bit in range(width):
+                value = (byte >> bit) & 1
+                if value == current:
+                    length += 1
+                else:
+                    runs.append(length)
+                    current, length = value, 1
+        runs.append(length)
+        return runs
+
+    def range(self):
+        """(lowest, highest) leased address, or None when empty"""
+        with self._lock:
+            bits = bytes(self.bits)
+        value = int.from_bytes(bits, 'little')
+        if not value:
+            return None
+        low = (value & -value).bit_length() - 1
+        return self.address(low), self.address(value.bit_length() - 1)
+
+    def to_dict(self):
+        observed = self.range()
+        return {
+            'network': str(self.network),
+            'first': self.address(0),
+            'size': self.size,
+            'occupied': self.occupied,
+            'free': self.size - self.occupied,
+            'utilisation': round(self.occupied / self.size, 4) if self.size else 0.0,
+            'observed_range': list(observed) if observed else None,
+            'version': self.version,
+            'runs': self.runs()
+        }
@@ -0,0 +1,117 @@
+"""
+Bulk DHCP release
+Frames are stamped from a precompiled template instead of being rebuilt
+layer by layer in Scapy, and all of them go out through one L2 socket
+"""
+
+import logging
+import random
+import socket
+import struct
+import time
+
+import packets
+from logconfig import fields
+
+logger = logging.getLogger('starve.release')
+
+# Byte offsets inside Ether / IPv4 (no options) / UDP / BOOTP
+ETHER_SRC = slice(6, 12)
+IP_HEADER = slice(14, 34)
+IP_CHECKSUM = slice(24, 26)
+IP_SRC = slice(26, 30)
+UDP_CHECKSUM = slice(40, 42)
+BOOTP_XID = slice(46, 50)
+BOOTP_CIADDR = slice(54, 58)
+BOOTP_CHADDR = slice(70, 76)
+
+
+def ip_checksum(header):
+    """RFC 1071 checksum of an IPv4 header"""
+    total = sum(struct.unpack(f"!{len(header) // 2}H", header))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+class ReleaseFrameTemplate:
+    """DHCP RELEASE frame for one server, patched per lease"""
+
+    def __init__(self, server_ip):
+        self.server_ip = server_ip
+
+        frame = packets.Ether(src="00:00:00:00:00:00", dst="ff:ff:ff:ff:ff:ff")
+        frame /= packets.IP(src="0.0.0.0", dst=server_ip)
+        frame /= packets.UDP(sport=68, dport=67)
+        frame /= packets.BOOTP(chaddr=b"\x00" * 16, ciaddr="0.0.0.0", xid=0)
+        frame /= packets.DHCP(options=[
+            ("message-type", "release"),
+            ("server_id", server_ip),
+            "end"
+        ])
+        self._frame = bytearray(bytes(frame))
+
+    def build(self, ip_address, mac_address, xid=None):
+        """Return the raw release frame for one lease"""
+        frame = self._frame[:]
+        addr = socket.inet_aton(ip_address)
+
+        frame[ETHER_SRC] = packets.mac2str(mac_address)
+        frame[IP_SRC] = addr
+        frame[IP_CHECKSUM] = b"\x00\x00"
+        frame[IP_CHECKSUM] = struct.pack("!H", ip_checksum(frame[IP_HEADER]))
+        frame[UDP_CHECKSUM] = b"\x00\x00"  # Optional over IPv4
+        frame[BOOTP_XID] = struct.pack("!I", xid if xid is not None else random.randint(1, 1000000000))
+        frame[BOOTP_CIADDR] = addr
+        frame[BOOTP_CHADDR] = packets.mac2str(mac_address)
+        return bytes(frame)
+
+
+def release_leases(job, leases, server_ip, interface, transport, on_batch=None, batch_size=64, pacing=0.001,
+                   sleep=time.sleep):
+    """Send a RELEASE for every lease through a single L2 socket
+
+    Each lease is released to the server recorded in its 'server' field,
+    falling back to server_ip, so leases recovered from an earlier run go
+    back to the server that granted them. on_batch(entries) is called with each group of successfully released
+    leases so callers can update shared state while the job is running.
+    `sleep` does the pacing, so a virtual clock can skip it.
+    """
+    templates = {}
+    sock = transport.l2socket(interface)
+    batch = []
+
+    logger.info("[*] Releasing %d IP addresses...", len(leases), extra=fields('release-started', total=len(leases)))
+
+    try:
+        for entry in leases:
+            try:
+                server = entry.get('server') or server_ip
+                if server not in templates:
+                    templates[server] = ReleaseFrameTemplate(server)
+                sock.send(templates[server].build(entry['ip'], entry['mac']))
+            except Exception as e:
+                logger.warning("[-] DHCP Release error for %s: %s", entry['ip'], e,
+                               extra=fields('release-error', ip=entry['ip']))
+                job.advance(succeeded=0, failed=1)
+                continue
+
+            job.advance()
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                if on_batch:
+                    on_batch(batch)
+                batch = []
+
+            # Keep a small gap so the server isn't flooded
+            if pacing:
+                sleep(pacing)
+    finally:
+        sock.close()
+        if batch and on_batch:
+            on_batch(batch)
+
+    logger.info("[✓] Release complete: %d successful, %d failed", job.completed, job.failed,
+                extra=fields('release-finished', released=job.completed, failed=job.failed))
+
+    return {'total': len(leases), 'released': job.completed, 'failed': job.failed}
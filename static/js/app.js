@@ -1,16 +1,34 @@
 // App State
 let attackRunning = false;
 let updateInterval = null;
+let statusSeq = null;          // Last change sequence received from /api/attack/status
+let eventSource = null;
+let eventsConnected = false;   // Polling only runs while the event stream is down
+let monitorRunning = false;
+let monitorInterval = null;
+const leases = new Map();      // IP -> lease, in acquisition order
+let leaseList = [];            // leases as an array for windowing; rebuilt after removals
+let leaseListStale = false;
+const renderedRows = new Map(); // IP -> <tr> inside the visible window
+const freshIps = new Set();    // Added since the last render; these rows animate in
+let leaseRenderPending = false;
+let rowHeight = 0;             // Measured from the first rendered row
+let poolState = null;          // { first, size, network, bits } from the status API's pool map
+let poolDrawPending = false;
 
 // DOM Elements
 const interfaceSelect = document.getElementById('interfaceSelect');
 const dhcpServerInput = document.getElementById('dhcpServer');
 const discoverBtn = document.getElementById('discoverBtn');
+const captureToggle = document.getElementById('captureToggle');
+const captureLink = document.getElementById('captureLink');
 const attackBtn = document.getElementById('attackBtn');
 const releaseAllBtn = document.getElementById('releaseAllBtn');
 const statusIndicator = document.getElementById('statusIndicator');
 const statusText = statusIndicator.querySelector('.status-text');
 const themeToggle = document.getElementById('themeToggle');
+const monitorBtn = document.getElementById('monitorBtn');
+const monitorAlerts = document.getElementById('monitorAlerts');
 
 // Network Info Elements
 const routerIpEl = document.getElementById('routerIp');
@@ -20,6 +38,7 @@ const poolRangeEl = document.getElementById('poolRange');
 
 // Table Elements
 const stolenIpsTable = document.getElementById('stolenIpsTable');
+const tableContainer = stolenIpsTable.closest('.table-container');
 const ipCounter = document.getElementById('ipCounter');
 
 // Initialize
@@ -27,8 +46,101 @@ document.addEventListener('DOMContentLoaded', () => {
     loadInterfaces();
     initTheme();
     setupEventListeners();
+    connectEvents();
+    updateMonitorStatus();
 });
 
+// Server-Sent Events
+function connectEvents() {
+    if (!window.EventSource) {
+        return;
+    }
+
+    eventSource = new EventSource('/api/events');
+
+    eventSource.addEventListener('open', () => {
+        eventsConnected = true;
+        stopStatusUpdates();
+        stopMonitorUpdates();
+        // Catch up on anything missed while disconnected
+        updateAttackStatus();
+    });
+
+    eventSource.addEventListener('error', () => {
+        // EventSource reconnects on its own; poll in the meantime
+        eventsConnected = false;
+        if (attackRunning) {
+            startStatusUpdates();
+        }
+        if (monitorRunning) {
+            startMonitorUpdates();
+        }
+        // A 503 (too many streams open) closes it for good; try again later
+        if (eventSource.readyState === EventSource.CLOSED) {
+            setTimeout(connectEvents, 30000);
+        }
+    });
+
+    eventSource.addEventListener('lease-added', event => {
+        const data = JSON.parse(event.data);
+        applyLeaseChanges([data.lease], []);
+    });
+
+    eventSource.addEventListener('lease-released', event => {
+        const data = JSON.parse(event.data);
+        applyLeaseChanges([], data.ips);
+    });
+
+    eventSource.addEventListener('lease-expired', event => {
+        const data = JSON.parse(event.data);
+        applyLeaseChanges([], data.ips);
+    });
+
+    eventSource.addEventListener('session-started', () => {
+        if (!attackRunning) {
+            attackRunning = true;
+            updateAttackUI(true);
+            updateStatus('attacking', 'Attack in progress...');
+        }
+        updateAttackStatus();
+    });
+
+    eventSource.addEventListener('session-stopped', () => {
+        if (attackRunning) {
+            attackRunning = false;
+            updateAttackUI(false);
+            updateStatus('idle', 'Attack completed');
+        }
+        stopStatusUpdates();
+        showLatestCapture();
+    });
+
+    eventSource.addEventListener('discovery-result', event => {
+        const data = JSON.parse(event.data);
+        if (!dhcpServerInput.value) {
+            dhcpServerInput.value = data.server_ip;
+        }
+        updateNetworkInfo(data.network_info);
+        // Picks up the new subnet's pool map
+        updateAttackStatus();
+    });
+
+    eventSource.addEventListener('monitor-stats', event => {
+        updateMonitorStats(JSON.parse(event.data));
+    });
+
+    eventSource.addEventListener('monitor-alert', event => {
+        const alert = JSON.parse(event.data);
+        addMonitorAlert(alert);
+        showNotification(alert.message, 'error');
+    });
+
+    eventSource.addEventListener('resync', () => {
+        updateAttackStatus();
+        updateMonitorStatus();
+    });
+}
+
 // Theme Management
 function initTheme() {
     const savedTheme = localStorage.getItem('theme') || 'light';
@@ -48,6 +160,16 @@ function setupEventListeners() {
     discoverBtn.addEventListener('click', discoverDHCPServer);
     attackBtn.addEventListener('click', toggleAttack);
     releaseAllBtn.addEventListener('click', releaseAllIPs);
+    monitorBtn.addEventListener('click', toggleMonitor);
+    tableContainer.addEventListener('scroll', scheduleLeaseRender, { passive: true });
+    window.addEventListener('resize', scheduleLeaseRender);
+    // One delegated handler instead of one per row
+    stolenIpsTable.addEventListener('click', event => {
+        const button = event.target.closest('.btn-release-single');
+        if (button && !button.disabled) {
+            releaseSingleIP(button.closest('tr').dataset.ip);
+        }
+    });
 }
 
 // Load Network Interfaces
@@ -61,7 +183,7 @@ async function loadInterfaces() {
         interfaces.forEach(iface => {
             const option = document.createElement('option');
             option.value = iface.name;
-            option.textContent = `${iface.name} (${iface.ip})`;
+            option.textContent = `${iface.name} (${iface.ip})${iface.up === false ? ' - down' : ''}`;
             interfaceSelect.appendChild(option);
         });
     } catch (error) {
@@ -70,8 +192,8 @@ async function loadInterfaces() {
     }
 }
 
-// Discover DHCP Server
-async function discoverDHCPServer() {
+// Discover DHCP Server (shift-click skips the cached result)
+async function discoverDHCPServer(event) {
     const interface = interfaceSelect.value;
 
     if (!interface) {
@@ -87,18 +209,27 @@ async function discoverDHCPServer() {
         const response = await fetch('/api/discover', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ interface })
+            body: JSON.stringify({ interface, refresh: Boolean(event && event.shiftKey) })
         });
+        const started = await response.json();
 
-        if (response.ok) {
-            const data = await response.json();
-            dhcpServerInput.value = data.server_ip;
-            updateNetworkInfo(data.network_info);
-            showNotification('DHCP server discovered successfully', 'success');
+        if (!response.ok) {
+            showNotification(started.error || 'DHCP server not found', 'error');
+            updateStatus('idle', 'Idle');
+            return;
+        }
+
+        const job = started.state === 'done' ? started : await waitForDiscoveryJob(started.id);
+        if (job.state === 'done') {
+            dhcpServerInput.value = job.result.server_ip;
+            updateNetworkInfo(job.result.network_info);
+            updateAttackStatus();
+            showNotification(started.cached && started.state === 'done'
+                ? 'DHCP server found (cached result, shift-click to rescan)'
+                : 'DHCP server discovered successfully', 'success');
             updateStatus('idle', 'Ready');
         } else {
-            const error = await response.json();
-            showNotification(error.error || 'DHCP server not found', 'error');
+            showNotification(job.error || 'DHCP server not found', 'error');
             updateStatus('idle', 'Idle');
         }
     } catch (error) {
@@ -110,6 +241,19 @@ async function discoverDHCPServer() {
     }
 }
 
+// Poll a discovery job until the census window closes
+async function waitForDiscoveryJob(jobId) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 300));
+        const response = await fetch(`/api/discover/jobs/${jobId}`);
+        const job = await response.json();
+
+        if (!response.ok || job.state === 'done' || job.state === 'failed') {
+            return job;
+        }
+    }
+}
+
 // Update Network Info Display
 function updateNetworkInfo(info) {
     if (info.router_ip) {
@@ -120,10 +264,46 @@ function updateNetworkInfo(info) {
         subnetMaskEl.textContent = info.subnet_mask;
     }
     if (info.dhcp_pool_start) {
-        poolRangeEl.textContent = `${info.dhcp_pool_start} - ${info.dhcp_pool_end}`;
+        poolRangeEl.textContent = info.dhcp_pool_end
+            ? `${info.dhcp_pool_start} - ${info.dhcp_pool_end}`
+            : `${info.network || info.dhcp_pool_start} (detected during attack)`;
+    }
+    if (info.servers) {
+        updateServerCensus(info.servers);
     }
 }
 
+// One row per server that answered the discovery probe, fastest first
+function updateServerCensus(servers) {
+    const census = document.getElementById('serverCensus');
+    const table = document.getElementById('censusTable');
+
+    census.style.display = servers.length > 0 ? 'block' : 'none';
+    document.getElementById('censusCount').textContent =
+        servers.length > 1 ? `(${servers.length} - possible rogue server)` : '';
+
+    table.innerHTML = '';
+    servers.forEach((server, index) => {
+        const row = document.createElement('tr');
+        if (index > 0) {
+            row.classList.add('census-rogue');
+        }
+        [
+            server.server_ip,
+            server.server_mac || '—',
+            server.offered_ip,
+            server.router_ip || '—',
+            server.lease_time ? `${server.lease_time}s` : '—',
+            `${server.latency_ms.toFixed(1)} ms`
+        ].forEach(value => {
+            const cell = document.createElement('td');
+            cell.textContent = value;
+            row.appendChild(cell);
+        });
+        table.appendChild(row);
+    });
+}
+
 // Toggle Attack
 async function toggleAttack() {
     if (attackRunning) {
@@ -152,10 +332,11 @@ async function startAttack() {
         const response = await fetch('/api/attack/start', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ interface, dhcp_server: dhcpServer })
+            body: JSON.stringify({ interface, dhcp_server: dhcpServer, capture: captureToggle.checked })
         });
 
         if (response.ok) {
+            captureLink.style.display = 'none';
             attackRunning = true;
             updateAttackUI(true);
             updateStatus('attacking', 'Attack in progress...');
@@ -171,6 +352,23 @@ async function startAttack() {
     }
 }
 
+// Offer the most recent session capture for download
+async function showLatestCapture() {
+    try {
+        const response = await fetch('/api/captures');
+        const sessions = await response.json();
+        const latest = sessions[0];
+        if (!latest || !latest.stopped) {
+            return;
+        }
+        captureLink.href = `/api/captures/${latest.id}.pcap`;
+        captureLink.textContent = `Download capture (${latest.frames} frames)`;
+        captureLink.style.display = '';
+    } catch (error) {
+        console.error('Capture list error:', error);
+    }
+}
+
 // Stop Attack
 async function stopAttack() {
     try {
@@ -219,8 +417,11 @@ function updateAttackUI(attacking) {
     }
 }
 
-// Start Status Updates
+// Start Status Updates (fallback when the event stream is unavailable)
 function startStatusUpdates() {
+    if (eventsConnected || updateInterval) {
+        return;
+    }
     updateInterval = setInterval(updateAttackStatus, 500);
 }
 
@@ -235,7 +436,8 @@ function stopStatusUpdates() {
 // Update Attack Status
 async function updateAttackStatus() {
     try {
-        const response = await fetch('/api/attack/status');
+        const url = statusSeq === null ? '/api/attack/status' : `/api/attack/status?since=${statusSeq}`;
+        const response = await fetch(url);
         const data = await response.json();
 
         if (!data.running && attackRunning) {
@@ -246,30 +448,88 @@ async function updateAttackStatus() {
             stopStatusUpdates();
         }
 
-        // Update stolen IPs table
-        updateStolenIpsTable(data.stolen_ips);
+        // Full snapshot on first poll or when the server asks for a resync,
+        // otherwise only apply what changed since the last poll
+        if (data.stolen_ips) {
+            updateStolenIpsTable(data.stolen_ips);
+        } else {
+            applyLeaseChanges(data.added, data.removed);
+        }
+        statusSeq = data.seq;
 
         // Update network info if available
         if (data.network_info && Object.keys(data.network_info).length > 0) {
             updateNetworkInfo(data.network_info);
         }
+        if (data.pool) {
+            applyPoolMap(data.pool);
+        }
     } catch (error) {
         console.error('Status update error:', error);
     }
 }
 
-// Update Stolen IPs Table
+// Replace the Stolen IPs Table with a full snapshot
 function updateStolenIpsTable(ips) {
-    ipCounter.textContent = `${ips.length} IP${ips.length !== 1 ? 's' : ''}`;
+    const backendIps = new Set(ips.map(ip => ip.ip));
+    const removed = [];
+    leases.forEach((lease, ipAddress) => {
+        if (!backendIps.has(ipAddress)) {
+            removed.push(ipAddress);
+        }
+    });
 
-    // Show/hide Release All button
-    if (ips.length > 0) {
-        releaseAllBtn.style.display = 'flex';
-    } else {
-        releaseAllBtn.style.display = 'none';
+    applyLeaseChanges(ips.filter(ip => !leases.has(ip.ip)), removed);
+}
+
+// Apply incremental adds/removals; the DOM catches up on the next animation frame
+function applyLeaseChanges(added, removed) {
+    removed.forEach(ipAddress => {
+        if (leases.delete(ipAddress)) {
+            freshIps.delete(ipAddress);
+            leaseListStale = true;
+        }
+        setPoolBit(ipAddress, 0);
+    });
+
+    added.forEach(ip => {
+        setPoolBit(ip.ip, 1);
+        if (!leases.has(ip.ip)) {
+            leases.set(ip.ip, ip);
+            freshIps.add(ip.ip);
+            if (!leaseListStale) {
+                leaseList.push(ip);
+            }
+        }
+    });
+
+    scheduleLeaseRender();
+}
+
+function scheduleLeaseRender() {
+    if (!leaseRenderPending) {
+        leaseRenderPending = true;
+        requestAnimationFrame(renderLeaseTable);
     }
+}
 
-    if (ips.length === 0) {
+// Virtualised table: only rows in (or near) the scrolled viewport exist in the
+// DOM, with spacer rows standing in for the rest. One keyed pass per frame:
+// rows that stay visible are left in place, new ones go in as fragments.
+const topSpacer = spacerRow();
+const bottomSpacer = spacerRow();
+
+function renderLeaseTable() {
+    leaseRenderPending = false;
+    if (leaseListStale) {
+        leaseList = Array.from(leases.values());
+        leaseListStale = false;
+    }
+    updateLeaseCounter();
+
+    if (leaseList.length === 0) {
+        renderedRows.clear();
+        freshIps.clear();
         stolenIpsTable.innerHTML = `
             <tr class="empty-state">
                 <td colspan="4">No IPs exhausted yet. Start an attack to see results.</td>
@@ -277,58 +537,180 @@ function updateStolenIpsTable(ips) {
         `;
         return;
     }
+    if (topSpacer.parentNode !== stolenIpsTable) {
+        stolenIpsTable.replaceChildren(topSpacer, bottomSpacer);
+    }
 
-    // Get current IPs in table for comparison
-    const currentIps = new Map();
-    Array.from(stolenIpsTable.querySelectorAll('tr:not(.empty-state)')).forEach(row => {
-        const ipAddress = row.cells[0]?.textContent;
-        if (ipAddress) {
-            currentIps.set(ipAddress, row);
+    const height = rowHeight || 49;
+    const overscan = 10;
+    const visible = Math.ceil(tableContainer.clientHeight / height) + 2 * overscan;
+    // scrollTop can still point past a list that just shrank
+    const first = Math.max(0, Math.min(Math.floor(tableContainer.scrollTop / height) - overscan,
+                                       leaseList.length - visible));
+    const last = Math.min(leaseList.length, first + visible);
+
+    const wanted = new Map();
+    for (let i = first; i < last; i++) {
+        const lease = leaseList[i];
+        let row = renderedRows.get(lease.ip);
+        if (!row) {
+            row = createLeaseRow(lease);
+            if (freshIps.has(lease.ip)) {
+                row.classList.add('ip-row-enter');
+            }
+        }
+        wanted.set(lease.ip, row);
+    }
+    renderedRows.forEach((row, ip) => {
+        if (wanted.get(ip) !== row) {
+            row.remove();
         }
     });
 
-    // Get IPs from backend
-    const backendIps = new Set(ips.map(ip => ip.ip));
-
-    // Remove rows that no longer exist in backend (were released)
-    currentIps.forEach((row, ipAddress) => {
-        if (!backendIps.has(ipAddress)) {
-            row.classList.add('ip-row-exit');
-            setTimeout(() => row.remove(), 300);
+    // Rows that stayed are already in order; slot the new ones in between
+    let cursor = topSpacer.nextSibling;
+    let fragment = document.createDocumentFragment();
+    wanted.forEach(row => {
+        if (row === cursor) {
+            stolenIpsTable.insertBefore(fragment, cursor);
+            cursor = cursor.nextSibling;
+        } else {
+            fragment.appendChild(row);
         }
     });
+    stolenIpsTable.insertBefore(fragment, bottomSpacer);
+    topSpacer.style.height = `${first * height}px`;
+    bottomSpacer.style.height = `${(leaseList.length - last) * height}px`;
 
-    // Add new IPs that aren't in the table yet
-    const fragment = document.createDocumentFragment();
-
-    ips.forEach(ip => {
-        if (!currentIps.has(ip.ip)) {
-            const row = document.createElement('tr');
-            row.classList.add('ip-row-enter');
-            row.setAttribute('data-ip', ip.ip);
-            row.innerHTML = `
-                <td>${ip.ip}</td>
-                <td>${ip.mac}</td>
-                <td>${ip.time}</td>
-                <td>
-                    <button class="btn-release-single" onclick="releaseSingleIP('${ip.ip}')">
-                        <svg width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                            <polyline points="3 6 5 6 21 6"></polyline>
-                            <path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a2 2 0 0 1 2-2h4a2 2 0 0 1 2 2v2"></path>
-                        </svg>
-                        Release
-                    </button>
-                </td>
-            `;
-            fragment.appendChild(row);
+    renderedRows.clear();
+    wanted.forEach((row, ip) => renderedRows.set(ip, row));
+    freshIps.clear();
+
+    if (!rowHeight && wanted.size > 0) {
+        rowHeight = wanted.values().next().value.getBoundingClientRect().height;
+    }
+}
+
+function spacerRow() {
+    const row = document.createElement('tr');
+    row.className = 'spacer-row';
+    row.innerHTML = '<td colspan="4"></td>';
+    return row;
+}
+
+function createLeaseRow(ip) {
+    const row = document.createElement('tr');
+    row.setAttribute('data-ip', ip.ip);
+    row.innerHTML = `
+        <td>${ip.ip}</td>
+        <td>${ip.mac}</td>
+        <td title="${ip.expires ? 'Expires ' + new Date(ip.expires * 1000).toLocaleTimeString() : ''}">${ip.time}</td>
+        <td>
+            <button class="btn-release-single">
+                <svg width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+                    <polyline points="3 6 5 6 21 6"></polyline>
+                    <path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a2 2 0 0 1 2-2h4a2 2 0 0 1 2 2v2"></path>
+                </svg>
+                Release
+            </button>
+        </td>
+    `;
+    return row;
+}
+
+// Update counter and Release All button from the lease count
+function updateLeaseCounter() {
+    const count = leases.size;
+    ipCounter.textContent = `${count} IP${count !== 1 ? 's' : ''}`;
+
+    // Show/hide Release All button
+    releaseAllBtn.style.display = count > 0 ? 'flex' : 'none';
+}
+
+// Pool occupancy map
+function ipToInt(ip) {
+    return ip.split('.').reduce((value, octet) => value * 256 + Number(octet), 0);
+}
+
+function intToIp(value) {
+    return [24, 16, 8, 0].map(shift => Math.floor(value / 2 ** shift) % 256).join('.');
+}
+
+// Decode the run-length map: alternating free/leased runs, starting with free
+function applyPoolMap(pool) {
+    const bits = new Uint8Array(pool.size);
+    let offset = 0;
+    pool.runs.forEach((length, index) => {
+        if (index % 2 === 1) {
+            bits.fill(1, offset, offset + length);
         }
+        offset += length;
     });
+    poolState = { first: ipToInt(pool.first), size: pool.size, network: pool.network, bits };
+    document.getElementById('poolMap').style.display = 'block';
+    schedulePoolDraw();
+}
+
+function setPoolBit(ipAddress, value) {
+    if (!poolState) {
+        return;
+    }
+    const index = ipToInt(ipAddress) - poolState.first;
+    if (index >= 0 && index < poolState.size) {
+        poolState.bits[index] = value;
+        schedulePoolDraw();
+    }
+}
+
+// Redraw at most once per frame however many leases changed
+function schedulePoolDraw() {
+    if (!poolDrawPending) {
+        poolDrawPending = true;
+        requestAnimationFrame(drawPoolMap);
+    }
+}
 
-    if (fragment.childNodes.length > 0) {
-        if (stolenIpsTable.querySelector('.empty-state')) {
-            stolenIpsTable.innerHTML = '';
+function drawPoolMap() {
+    poolDrawPending = false;
+    if (!poolState) {
+        return;
+    }
+
+    const canvas = document.getElementById('poolCanvas');
+    const { size, bits } = poolState;
+    const columns = size <= 1024 ? 32 : 256;
+    const rows = Math.ceil(size / columns);
+    const cell = Math.max(2, Math.floor(canvas.clientWidth / columns));
+    canvas.width = columns * cell;
+    canvas.height = rows * cell;
+
+    const styles = getComputedStyle(document.documentElement);
+    const freeColor = styles.getPropertyValue('--bg-tertiary');
+    const usedColor = styles.getPropertyValue('--accent-primary');
+    const gap = cell > 4 ? 1 : 0;
+    const ctx = canvas.getContext('2d');
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+
+    let occupied = 0;
+    let low = -1;
+    let high = -1;
+    for (let i = 0; i < size; i++) {
+        if (bits[i]) {
+            occupied++;
+            if (low < 0) {
+                low = i;
+            }
+            high = i;
         }
-        stolenIpsTable.appendChild(fragment);
+        ctx.fillStyle = bits[i] ? usedColor : freeColor;
+        ctx.fillRect((i % columns) * cell, Math.floor(i / columns) * cell, cell - gap, cell - gap);
+    }
+
+    const percent = size ? (occupied / size * 100).toFixed(1) : '0.0';
+    document.getElementById('poolStats').textContent =
+        `${poolState.network} - ${occupied}/${size} leased (${percent}%)`;
+    if (low >= 0) {
+        poolRangeEl.textContent = `${intToIp(poolState.first + low)} - ${intToIp(poolState.first + high)}`;
     }
 }
 
@@ -343,7 +725,7 @@ async function releaseSingleIP(ipAddress) {
     }
 
     // Disable the button
-    const row = stolenIpsTable.querySelector(`tr[data-ip="${ipAddress}"]`);
+    const row = renderedRows.get(ipAddress);
     if (row) {
         const btn = row.querySelector('.btn-release-single');
         if (btn) {
@@ -367,24 +749,8 @@ async function releaseSingleIP(ipAddress) {
             const data = await response.json();
             showNotification(`IP ${ipAddress} released successfully`, 'success');
 
-            // Remove the row from table
-            if (row) {
-                row.classList.add('ip-row-exit');
-                setTimeout(() => row.remove(), 300);
-            }
-
-            // Update counter
-            ipCounter.textContent = `${data.remaining} IP${data.remaining !== 1 ? 's' : ''}`;
-
-            // Hide Release All button if no IPs left
-            if (data.remaining === 0) {
-                releaseAllBtn.style.display = 'none';
-                stolenIpsTable.innerHTML = `
-                    <tr class="empty-state">
-                        <td colspan="4">No IPs exhausted yet. Start an attack to see results.</td>
-                    </tr>
-                `;
-            }
+            // Remove the row from table and update counter
+            applyLeaseChanges([], [ipAddress]);
         } else {
             const error = await response.json();
             showNotification(error.error || 'Failed to release IP', 'error');
@@ -448,18 +814,17 @@ async function releaseAllIPs() {
 
         if (response.ok) {
             const data = await response.json();
-            showNotification(`Released ${data.released} IP(s) successfully`, 'success');
-
-            // Clear table
-            stolenIpsTable.innerHTML = `
-                <tr class="empty-state">
-                    <td colspan="4">No IPs exhausted yet. Start an attack to see results.</td>
-                </tr>
-            `;
-
-            // Update counter and hide button
-            ipCounter.textContent = '0 IPs';
-            releaseAllBtn.style.display = 'none';
+            const job = await waitForReleaseJob(data.job_id);
+
+            if (job.state === 'done') {
+                showNotification(`Released ${job.result.released} IP(s) successfully`, 'success');
+            } else {
+                showNotification(job.error || 'Failed to release IPs', 'error');
+            }
+
+            // Rows are removed as the job releases them; resync in case
+            // the event stream missed any
+            await updateAttackStatus();
         } else {
             const error = await response.json();
             showNotification(error.error || 'Failed to release IPs', 'error');
@@ -473,6 +838,137 @@ async function releaseAllIPs() {
     }
 }
 
+// Poll a background release job until it finishes, showing progress on the button
+async function waitForReleaseJob(jobId) {
+    while (true) {
+        const response = await fetch(`/api/release/jobs/${jobId}`);
+        const job = await response.json();
+
+        if (!response.ok || job.state === 'done' || job.state === 'failed') {
+            return job;
+        }
+
+        releaseAllBtn.innerHTML = `
+            <svg width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" class="spinning">
+                <circle cx="12" cy="12" r="10"></circle>
+                <polyline points="12 6 12 12 16 14"></polyline>
+            </svg>
+            Releasing ${job.completed + job.failed}/${job.total}...
+        `;
+        await new Promise(resolve => setTimeout(resolve, 250));
+    }
+}
+
+// Passive Starvation Monitor
+async function toggleMonitor() {
+    const url = monitorRunning ? '/api/monitor/stop' : '/api/monitor/start';
+    const interface = interfaceSelect.value;
+
+    if (!monitorRunning && !interface) {
+        showNotification('Please select a network interface first', 'error');
+        return;
+    }
+
+    monitorBtn.disabled = true;
+    try {
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ interface })
+        });
+
+        if (response.ok) {
+            updateMonitorUI(!monitorRunning);
+        } else {
+            const error = await response.json();
+            showNotification(error.error || 'Monitor request failed', 'error');
+        }
+    } catch (error) {
+        console.error('Monitor error:', error);
+        showNotification('Monitor request failed', 'error');
+    } finally {
+        monitorBtn.disabled = false;
+    }
+}
+
+function updateMonitorUI(running) {
+    monitorRunning = running;
+    monitorBtn.classList.toggle('monitoring', running);
+    monitorBtn.lastChild.textContent = running ? ' Stop Monitor ' : ' Start Monitor ';
+    if (running) {
+        startMonitorUpdates();
+    } else {
+        stopMonitorUpdates();
+    }
+}
+
+// Poll monitor stats only while the event stream is down
+function startMonitorUpdates() {
+    if (eventsConnected || monitorInterval) {
+        return;
+    }
+    monitorInterval = setInterval(updateMonitorStatus, 2000);
+}
+
+function stopMonitorUpdates() {
+    if (monitorInterval) {
+        clearInterval(monitorInterval);
+        monitorInterval = null;
+    }
+}
+
+async function updateMonitorStatus() {
+    try {
+        const response = await fetch('/api/monitor/status');
+        const data = await response.json();
+
+        if (data.running !== monitorRunning) {
+            updateMonitorUI(data.running);
+        }
+        if (data.stats) {
+            updateMonitorStats(data.stats);
+        }
+        monitorAlerts.innerHTML = '';
+        if (data.alerts.length === 0) {
+            monitorAlerts.innerHTML = '<li class="alert-empty">No alerts</li>';
+        }
+        data.alerts.forEach(addMonitorAlert);
+    } catch (error) {
+        console.error('Monitor status error:', error);
+    }
+}
+
+function updateMonitorStats(stats) {
+    const ratio = value => value === null || value === undefined ? '—' : value.toFixed(2);
+    document.getElementById('monDiscoverRate').textContent = stats.discover_rate.toFixed(1);
+    document.getElementById('monUniqueClients').textContent = stats.unique_clients;
+    document.getElementById('monOuiEntropy').textContent = `${stats.oui_entropy.toFixed(1)} bits`;
+    document.getElementById('monMismatch').textContent = `${(stats.mismatch_ratio * 100).toFixed(0)}%`;
+    document.getElementById('monOfferRatio').textContent = ratio(stats.offer_ratio);
+    document.getElementById('monNakRatio').textContent = ratio(stats.nak_ratio);
+}
+
+// Newest alert first; the server keeps the full history
+function addMonitorAlert(alert) {
+    const empty = monitorAlerts.querySelector('.alert-empty');
+    if (empty) {
+        empty.remove();
+    }
+
+    const item = document.createElement('li');
+    item.className = `alert-item alert-${alert.severity}`;
+    const time = document.createElement('span');
+    time.className = 'alert-time';
+    time.textContent = new Date(alert.time * 1000).toLocaleTimeString();
+    item.appendChild(time);
+    item.appendChild(document.createTextNode(alert.message));
+    monitorAlerts.insertBefore(item, monitorAlerts.firstChild);
+
+    while (monitorAlerts.children.length > 50) {
+        monitorAlerts.lastChild.remove();
+    }
+}
+
 // Update Status Indicator
 function updateStatus(state, text) {
     statusIndicator.className = `status-indicator status-${state}`;
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the wire-level DHCP decoder and the offline pcap analyzer
+"""
+
+import pytest
+from scapy.layers.dhcp import DHCP, BOOTP
+from scapy.layers.inet import IP, UDP
+from scapy.layers.l2 import Ether
+from scapy.utils import mac2str, wrpcap
+
+from analyze import analyze, main
+from dhcpwire import parse_frame, summarize_options
+
+SERVER = '192.168.50.1'
+
+
+def client_frame(mac, message_type, xid, **options):
+    frame = Ether(src=mac, dst="ff:ff:ff:ff:ff:ff")
+    frame /= IP(src=options.pop('ciaddr', '0.0.0.0'), dst="255.255.255.255")
+    frame /= UDP(sport=68, dport=67)
+    frame /= BOOTP(chaddr=mac2str(mac), xid=xid, ciaddr=frame[IP].src)
+    frame /= DHCP(options=[("message-type", message_type)] + list(options.items()) + ["end"])
+    return frame
+
+
+def server_frame(mac, message_type, xid, yiaddr, lease_time=3600):
+    frame = Ether(src="02:00:00:00:00:01", dst="ff:ff:ff:ff:ff:ff")
+    frame /= IP(src=SERVER, dst="255.255.255.255")
+    frame /= UDP(sport=67, dport=68)
+    frame /= BOOTP(op=2, chaddr=mac2str(mac), xid=xid, yiaddr=yiaddr)
+    options = [("message-type", message_type), ("server_id", SERVER)]
+    if message_type != 'nak':
+        options += [("lease_time", lease_time), ("subnet_mask", "255.255.255.0"), ("router", SERVER)]
+    frame /= DHCP(options=options + ["end"])
+    return frame
+
+
+def at(frame, timestamp):
+    frame.time = timestamp
+    return frame
+
+
+def test_parse_frame_matches_scapy():
+    frame = server_frame('02:aa:00:00:00:01', 'offer', 42, '192.168.50.100', lease_time=600)
+    info = parse_frame(bytes(frame))
+
+    assert info['xid'] == 42 and info['yiaddr'] == '192.168.50.100'
+    assert info['chaddr'] == '02:aa:00:00:00:01'
+    assert summarize_options(info['options']) == summarize_options(Ether(bytes(frame))[DHCP].options)
+    assert summarize_options(info['options'])['lease_time'] == 600
+
+
+def test_parse_frame_skips_non_dhcp():
+    assert parse_frame(bytes(Ether() / IP() / UDP(sport=53, dport=53))) is None
+    assert parse_frame(b"\x00" * 10) is None
+
+
+@pytest.fixture
+def capture(tmp_path):
+    mac_a, mac_b = '02:aa:00:00:00:01', '02:aa:00:00:00:02'
+    frames = [
+        at(client_frame(mac_a, 'discover', 1), 100.000),
+        at(server_frame(mac_a, 'offer', 1, '192.168.50.100'), 100.004),
+        at(client_frame(mac_a, 'request', 2, server_id=SERVER, requested_addr='192.168.50.100'), 100.010),
+        at(server_frame(mac_a, 'ack', 2, '192.168.50.100', lease_time=30), 100.012),
+        at(client_frame(mac_b, 'discover', 3), 101.000),
+        at(server_frame(mac_b, 'offer', 3, '192.168.50.101'), 101.050),
+        at(client_frame(mac_b, 'request', 4, server_id=SERVER, requested_addr='192.168.50.150'), 101.060),
+        at(server_frame(mac_b, 'nak', 4, '0.0.0.0'), 101.061),
+        at(client_frame(mac_b, 'decline', 5, server_id=SERVER, requested_addr='192.168.50.101'), 102.000),
+        at(client_frame(mac_a, 'release', 6, server_id=SERVER, ciaddr='192.168.50.100'), 125.000),
+        at(Ether() / IP() / UDP(sport=53, dport=53), 126.000),
+    ]
+    path = tmp_path / 'session.pcap'
+    wrpcap(str(path), frames)
+    return str(path)
+
+
+def test_analyze_capture(capture):
+    report = analyze(capture, interval=10, timelines=True, batch_size=3)
+
+    assert report['capture']['frames'] == 11
+    assert report['capture']['dhcp_frames'] == 10
+    assert report['message_counts'] == {'discover': 2, 'offer': 2, 'request': 2, 'ack': 1,
+                                        'nak': 1, 'decline': 1, 'release': 1}
+
+    server = report['servers'][SERVER]
+    assert (server['offers'], server['acks'], server['naks'], server['declines'], server['releases']) == (2, 1, 1, 1, 1)
+    assert server['peak_active_leases'] == 1 and server['active_leases'] == 0
+    latency = server['offer_latency']
+    assert latency['count'] == 2
+    assert latency['min'] == pytest.approx(0.004, abs=1e-5)
+    assert latency['max'] == pytest.approx(0.050, abs=1e-5)
+
+    samples = [sample['active'] for sample in report['pool_utilisation']]
+    assert samples[0] == 1 and samples[-1] == 0
+
+    timeline = report['clients']['02:aa:00:00:00:01']
+    assert [event['type'] for event in timeline] == ['discover', 'offer', 'request', 'ack', 'release']
+
+
+def test_cli_rejects_non_pcap(tmp_path, capsys):
+    path = tmp_path / 'bogus.pcap'
+    path.write_bytes(b"not a capture at all....")
+    assert main([str(path)]) == 1
+    assert 'not a pcap file' in capsys.readouterr().err
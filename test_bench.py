@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Smoke tests for the benchmark harness: tiny sizes, checking the JSON shape
+"""
+
+import json
+
+from scapy.utils import wrpcap
+
+import app
+from bench import compare, main, recorded_frames
+from test_analyze import client_frame, server_frame
+
+
+def test_main_writes_json_report(tmp_path):
+    out = tmp_path / 'bench.json'
+    assert main(['--only', 'status,ledger,release', '--sizes', '5,20', '--repeat', '3', '--json', str(out)]) == 0
+
+    report = json.loads(out.read_text())
+    assert set(report['meta']) >= {'commit', 'timestamp', 'python'}
+    results = report['results']
+    assert set(results) == {'status', 'ledger', 'release'}
+
+    small, large = results['status']['5'], results['status']['20']
+    assert small['full']['n'] == 3
+    assert small['full_bytes'] < large['full_bytes']
+    assert large['gzip_bytes'] < large['full_bytes']
+    assert results['ledger']['20']['add_per_s'] > 0
+    assert results['release']['20']['leases_per_s'] > 0
+
+    # The status benchmark leaves the shared ledger as it found it
+    assert len(app.ledger) == 0
+
+
+def test_parse_benchmark_reads_pcap(tmp_path):
+    pcap = tmp_path / 'dhcp.pcap'
+    mac = '02:00:00:00:00:0a'
+    wrpcap(str(pcap), [client_frame(mac, 'discover', 1), server_frame(mac, 'offer', 1, '192.168.50.100')])
+
+    assert len(recorded_frames(str(pcap))) == 2
+
+    out = tmp_path / 'parse.json'
+    main(['--only', 'parse', '--pcap', str(pcap), '--repeat', '1', '--json', str(out)])
+    parse = json.loads(out.read_text())['results']['parse']
+    assert parse['frames'] == 2 and parse['source'] == str(pcap)
+    assert parse['dhcpwire_frames_per_s'] > 0
+
+
+def test_compare_reports_relative_change():
+    before = {'results': {'status': {'100': {'full': {'n': 10, 'p50_ms': 2.0}, 'full_bytes': 1000}}}}
+    after = {'results': {'status': {'100': {'full': {'n': 20, 'p50_ms': 1.0}, 'full_bytes': 1100}}}}
+
+    assert compare(before, after) == [
+        'status.100.full.p50_ms: 2.0 -> 1.0 (-50.0%)',
+        'status.100.full_bytes: 1000 -> 1100 (+10.0%)'
+    ]
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped session capture ring
+"""
+
+import io
+import os
+
+from analyze import PcapReader
+from capture import CaptureSession, PcapRing
+
+
+def read_pcap(ring):
+    return list(PcapReader(io.BytesIO(b''.join(ring.export()))))
+
+
+def test_ring_wraps_and_exports_oldest_first(tmp_path):
+    path = str(tmp_path / 'session.ring')
+    ring = PcapRing(path, size=64 + 3 * (16 + 100), snaplen=100)
+    assert ring.slots == 3
+    size = os.path.getsize(path)
+
+    for i in range(5):
+        ring.write(bytes([i]) * (60 + i), 1000.0 + i)
+
+    records = read_pcap(ring)
+    assert [data[0] for _, data in records] == [2, 3, 4]
+    assert [len(data) for _, data in records] == [62, 63, 64]
+    assert records[0][0] == 1002.0
+    assert ring.dropped == 2
+    # The file never grows past its preallocated size
+    assert os.path.getsize(path) == size
+    ring.close()
+
+
+def test_long_frames_are_truncated_to_snaplen(tmp_path):
+    ring = PcapRing(str(tmp_path / 'session.ring'), size=4096, snaplen=64)
+    ring.write(b'\xaa' * 200, 5.5)
+    header = b''.join(ring.export())[24:40]
+    assert header == (5).to_bytes(4, 'little') + (500000).to_bytes(4, 'little') + \
+        (64).to_bytes(4, 'little') + (200).to_bytes(4, 'little')
+    ring.close()
+
+
+def test_session_writes_in_the_background(tmp_path):
+    session = CaptureSession('s1', str(tmp_path / 's1.ring'), size=65536)
+    session.record(b'\x01' * 42)
+    session.record(b'\x45' + bytes(27), layer3=True)
+    session.stop()
+
+    frames = [data for _, data in read_pcap(session.ring)]
+    assert frames[0] == b'\x01' * 42
+    # Layer 3 packets get a placeholder Ethernet header
+    assert frames[1][12:14] == b'\x08\x00' and frames[1][14] == 0x45
+    assert session.to_dict()['frames'] == 2
+    session.close()
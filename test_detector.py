@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the passive starvation detector
+"""
+
+import random
+import socket
+
+import pytest
+from scapy.layers.dhcp import DHCP, BOOTP
+from scapy.layers.inet import IP, UDP
+from scapy.layers.l2 import Ether
+from scapy.utils import mac2str
+
+from detector import HyperLogLog, PassiveMonitor, RawCapture, StarvationDetector
+
+
+def dhcp_frame(message_type, chaddr, src=None, op=1):
+    frame = Ether(src=src or chaddr, dst="ff:ff:ff:ff:ff:ff")
+    frame /= IP(src="0.0.0.0" if op == 1 else "192.168.50.1", dst="255.255.255.255")
+    frame /= UDP(sport=68 if op == 1 else 67, dport=67 if op == 1 else 68)
+    frame /= BOOTP(op=op, chaddr=mac2str(chaddr), xid=random.randint(1, 2 ** 31))
+    frame /= DHCP(options=[("message-type", message_type), "end"])
+    return bytes(frame)
+
+
+def random_mac(rng):
+    return ':'.join(f'{rng.randrange(256):02x}' for _ in range(6))
+
+
+def test_hyperloglog_estimate():
+    sketch, other = HyperLogLog(), HyperLogLog()
+    for i in range(3000):
+        (sketch if i % 2 else other).add(f"client-{i}".encode())
+    sketch.merge(other)
+    assert abs(sketch.count() - 3000) < 3000 * 0.1
+    assert HyperLogLog().count() == 0
+
+
+def test_normal_traffic_raises_nothing():
+    detector = StarvationDetector(window=10)
+    clients = [f'00:1a:2b:00:00:{i:02x}' for i in range(5)]
+    records = []
+    for second in range(10):
+        for mac in clients:
+            records.append((1000 + second, dhcp_frame('discover', mac)))
+            records.append((1000 + second, dhcp_frame('offer', mac, src='02:00:00:00:00:01', op=2)))
+    detector.observe_batch(records)
+
+    stats, raised = detector.evaluate(now=1009.5)
+    assert raised == []
+    assert stats['unique_clients'] == 5
+    assert stats['offer_ratio'] == 1.0
+    assert stats['mismatch_ratio'] == 0.0
+
+
+def test_starvation_flood_raises_alerts_once():
+    rng = random.Random(1)
+    detector = StarvationDetector(window=10)
+    records = [(2000 + i // 50, dhcp_frame('discover', random_mac(rng))) for i in range(500)]
+    assert detector.observe_batch(records) == 500
+
+    stats, raised = detector.evaluate(now=2009.5)
+    kinds = {alert['kind'] for alert in raised}
+    assert {'discover-flood', 'client-churn', 'random-macs', 'pool-depletion'} <= kinds
+    assert stats['discover_rate'] == 50.0
+    assert abs(stats['unique_clients'] - 500) < 50
+
+    # Still flooding: no duplicate alerts; once the window empties they clear
+    assert detector.evaluate(now=2009.6)[1] == []
+    stats, raised = detector.evaluate(now=2030)
+    assert raised == [] and stats['active_alerts'] == []
+    assert len(detector.recent_alerts()) == len(kinds)
+
+
+def test_chaddr_spoofing_detected():
+    detector = StarvationDetector(window=10)
+    sender = '00:1a:2b:3c:4d:5e'
+    records = [(3000, dhcp_frame('discover', f'00:1a:2b:00:00:{i:02x}', src=sender)) for i in range(10)]
+    detector.observe_batch(records)
+
+    stats, raised = detector.evaluate(now=3001)
+    assert stats['mismatch_ratio'] == 1.0
+    assert [alert['kind'] for alert in raised] == ['chaddr-spoofing']
+
+
+def test_monitor_feeds_detector_and_reports():
+    rng = random.Random(2)
+    frames = [dhcp_frame('discover', random_mac(rng)) for _ in range(300)]
+
+    class FakeCapture:
+        def __init__(self, interface):
+            self.pending = [(None, frame) for frame in frames]
+            self.closed = False
+
+        def recv_batch(self, size, timeout):
+            batch, self.pending = self.pending[:size], self.pending[size:]
+            return batch
+
+        def close(self):
+            self.closed = True
+
+    alerts = []
+    monitor = PassiveMonitor('eth-test', detector=StarvationDetector(window=5),
+                             on_alert=alerts.append, capture_factory=FakeCapture,
+                             batch_size=64, interval=0.05)
+    monitor.start()
+    try:
+        for _ in range(100):
+            if alerts:
+                break
+            monitor._stop.wait(0.02)
+    finally:
+        monitor.stop()
+
+    assert not monitor.running
+    assert monitor.detector.frames == 300
+    assert 'discover-flood' in {alert['kind'] for alert in alerts}
+
+
+def test_kernel_filter_only_passes_dhcp():
+    try:
+        capture = RawCapture('lo')
+    except (PermissionError, OSError) as e:
+        pytest.skip(f"raw sockets unavailable: {e}")
+    try:
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.sendto(b"dns", ('127.0.0.1', 53))
+        sender.sendto(b"dhcp", ('127.0.0.1', 67))
+        sender.close()
+        frames = capture.recv_batch(16, timeout=1.0)
+    finally:
+        capture.close()
+
+    assert frames
+    assert all(frame[-4:] == b"dhcp" for _, frame in frames)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+End-to-end tests against the in-process DHCP server stand-in
+Runs discover -> offer -> request -> release without root or a real LAN
+"""
+
+import io
+import threading
+import time
+
+import pytest
+from scapy.layers.dhcp import DHCP, BOOTP
+from scapy.layers.inet import IP, UDP
+from scapy.layers.l2 import Ether
+from scapy.utils import mac2str
+
+import app
+from analyze import PcapReader
+from capture import RecordingTransport
+from dhcpsim import SimulatedDhcpServer, SimulatedTransport
+from dhcpwire import MESSAGE_TYPES, parse_frame, summarize_options
+from jobs import Job, JobCache
+from release import release_leases
+
+
+def use_server(monkeypatch, extra_servers=(), **kwargs):
+    """Route app.py's packet I/O through a fresh simulated server"""
+    server = SimulatedDhcpServer(**kwargs)
+    transport = SimulatedTransport(server, max_wait=5, extra_servers=extra_servers)
+    monkeypatch.setattr(app, 'transport', transport)
+    monkeypatch.setattr(app, 'pool_map', None)
+    return server, transport
+
+
+def discover_frame(mac):
+    frame = Ether(src=mac, dst="ff:ff:ff:ff:ff:ff")
+    frame /= IP(src="0.0.0.0", dst="255.255.255.255")
+    frame /= UDP(sport=68, dport=67)
+    frame /= BOOTP(chaddr=mac2str(mac), xid=1)
+    frame /= DHCP(options=[("message-type", "discover"), "end"])
+    return frame
+
+
+@pytest.fixture
+def sim(monkeypatch):
+    server, _ = use_server(monkeypatch, pool_size=5, seed=1)
+    app.ledger.clear()
+    yield server
+    app.attack_running = False
+    app.stop_attack_flag.set()
+    app.ledger.clear()
+
+
+def run_attack_until(server, leases, timeout=10):
+    """Run the starvation loop, stopping once `leases` are held
+
+    The loop only ends on its own after the first lease, so it runs in a
+    thread and a server that never answers fails the test instead of hanging.
+    """
+    def stop_when_full(op, payload):
+        if op == 'add' and len(app.ledger) >= leases:
+            app.stop_attack_flag.set()
+
+    app.ledger.add_listener(stop_when_full)
+    app.attack_running = True
+    thread = threading.Thread(target=app.dhcp_starvation_attack, args=('sim0', server.server_ip), daemon=True)
+    try:
+        thread.start()
+        thread.join(timeout)
+    finally:
+        app.ledger.remove_listener(stop_when_full)
+
+    if thread.is_alive():
+        app.attack_running = False
+        app.stop_attack_flag.set()
+        pytest.fail(f"attack did not acquire {leases} lease(s) within {timeout}s")
+
+
+def test_discover_reports_server(sim):
+    assert app.discover_dhcp_server('sim0') == sim.server_ip
+    assert app.network_info['router_ip'] == sim.router_ip
+    assert app.network_info['subnet_mask'] == '255.255.255.0'
+    assert app.network_info['dhcp_pool_start'] == sim.pool[0]
+
+
+def test_census_lists_every_server(monkeypatch):
+    rogue = SimulatedDhcpServer(server_ip='192.168.50.2', server_mac='02:00:00:00:00:02',
+                                pool_start=200, pool_size=5, offer_latency=0.05)
+    server, transport = use_server(monkeypatch, pool_size=5, extra_servers=[rogue])
+    # Another client's transaction on the same segment must be ignored
+    transport._deliver([(0, server._reply(discover_frame('02:00:00:00:09:09'), 'offer', '192.168.50.150'))])
+
+    started = time.monotonic()
+    servers = app.dhcp_census('sim0', window=5, idle=0.2)
+    elapsed = time.monotonic() - started
+
+    assert [entry['server_ip'] for entry in servers] == [server.server_ip, rogue.server_ip]
+    assert [entry['offered_ip'] for entry in servers] == [server.pool[0], rogue.pool[0]]
+    assert servers[1]['server_mac'] == '02:00:00:00:00:02'
+    assert servers[1]['latency_ms'] >= 50
+    assert servers[0]['lease_time'] == 3600
+    # Stops once OFFERs stop arriving instead of waiting out the window
+    assert elapsed < 1.0
+
+
+def wait_for_discovery(client, started):
+    deadline = time.monotonic() + 5
+    job = started
+    while job['state'] not in ('done', 'failed') and time.monotonic() < deadline:
+        time.sleep(0.02)
+        job = client.get(f"/api/discover/jobs/{started['id']}").json
+    return job
+
+
+def test_discover_endpoint_returns_server_table(monkeypatch):
+    rogue = SimulatedDhcpServer(server_ip='192.168.50.2', server_mac='02:00:00:00:00:02', pool_start=200)
+    server, _ = use_server(monkeypatch, pool_size=5, extra_servers=[rogue])
+    monkeypatch.setattr(app, 'discoveries', JobCache(app.jobs))
+    client = app.app.test_client()
+
+    response = client.post('/api/discover', json={'interface': 'sim0', 'idle': 0.1})
+    assert response.status_code == 202
+
+    job = wait_for_discovery(client, response.json)
+    assert job['state'] == 'done'
+    assert job['result']['server_ip'] == server.server_ip
+    assert {entry['server_ip'] for entry in job['result']['network_info']['servers']} == {
+        server.server_ip, rogue.server_ip}
+
+
+def test_discovery_is_shared_and_cached_per_interface(monkeypatch):
+    server, _ = use_server(monkeypatch, pool_size=5)
+    monkeypatch.setattr(app, 'discoveries', JobCache(app.jobs))
+    client = app.app.test_client()
+
+    first = client.post('/api/discover', json={'interface': 'sim0', 'idle': 0.1}).json
+    joined = client.post('/api/discover', json={'interface': 'sim0', 'idle': 0.1}).json
+    assert joined['id'] == first['id'] and joined['cached']
+    wait_for_discovery(client, first)
+
+    cached = client.post('/api/discover', json={'interface': 'sim0'})
+    assert cached.status_code == 200 and cached.json['id'] == first['id']
+    assert server.stats['discover'] == 1
+
+    # An explicit refresh broadcasts again
+    refreshed = client.post('/api/discover', json={'interface': 'sim0', 'idle': 0.1, 'refresh': True}).json
+    assert refreshed['id'] != first['id'] and not refreshed['cached']
+    assert wait_for_discovery(client, refreshed)['state'] == 'done'
+    assert server.stats['discover'] == 2
+
+
+
+def test_discover_reports_fast_failure_as_job(monkeypatch):
+    class NoPermission(SimulatedTransport):
+        def listen(self, iface=None, filter=None):
+            raise PermissionError('Operation not permitted')
+
+    monkeypatch.setattr(app, 'transport', NoPermission(SimulatedDhcpServer()))
+    cache = JobCache(app.jobs)
+    get_or_start = cache.get_or_start
+
+    def finished_before_returning(*args, **kwargs):
+        job, shared = get_or_start(*args, **kwargs)
+        while not job.done:
+            time.sleep(0.005)
+        return job, shared
+
+    monkeypatch.setattr(cache, 'get_or_start', finished_before_returning)
+    monkeypatch.setattr(app, 'discoveries', cache)
+
+    response = app.app.test_client().post('/api/discover', json={'interface': 'sim0', 'idle': 0.1})
+    assert response.status_code == 200
+    assert response.json['state'] == 'failed' and response.json['result'] is None
+
+
+@pytest.mark.parametrize('body', [{'window': 'soon'}, {'idle': None}, {'idle': -1}, {'window': 'nan'}])
+def test_discover_rejects_bad_timing(body):
+    response = app.app.test_client().post('/api/discover', json=dict(body, interface='sim0'))
+    assert response.status_code == 400
+
+def test_attack_leases_whole_pool(sim):
+    run_attack_until(sim, len(sim.pool))
+
+    _, leases = app.ledger.snapshot()
+    assert [entry['ip'] for entry in leases] == sim.pool
+    assert sim.free_addresses == 0
+    # The ledger records the MAC that actually holds each lease
+    assert {entry['mac'] for entry in leases} == {holder for holder, _ in sim.leases.values()}
+
+
+def test_status_reports_pool_occupancy(sim):
+    app.discover_dhcp_server('sim0', idle=0.1)
+    run_attack_until(sim, 3)
+
+    pool = app.app.test_client().get('/api/attack/status').json['pool']
+
+    assert pool['network'] == '192.168.50.0/24'
+    assert pool['occupied'] == 3 and pool['size'] == 254
+    # Discovery's own OFFER holds .100, so the attack leased .101-.103
+    assert pool['runs'] == [100, 3, 151]
+    assert pool['observed_range'] == ['192.168.50.101', '192.168.50.103']
+
+    app.ledger.clear()
+    assert app.pool_map.occupied == 0
+
+
+def test_release_returns_pool(sim):
+    run_attack_until(sim, len(sim.pool))
+    _, leases = app.ledger.snapshot()
+
+    job = Job('release', total=len(leases))
+    result = release_leases(job, leases, sim.server_ip, 'sim0', app.transport, pacing=0)
+
+    assert result == {'total': 5, 'released': 5, 'failed': 0}
+    assert sim.stats['release'] == 5
+    assert sim.free_addresses == len(sim.pool)
+
+
+def test_single_release_endpoint(sim):
+    run_attack_until(sim, 2)
+    ip = app.ledger.snapshot()[1][0]['ip']
+
+    response = app.app.test_client().post('/api/attack/release', json={
+        'ip': ip, 'interface': 'sim0', 'dhcp_server': sim.server_ip
+    })
+
+    assert response.status_code == 200
+    assert response.json['remaining'] == 1
+    assert ip not in sim.leases
+
+
+def test_nak_for_address_not_offered(monkeypatch):
+    server, transport = use_server(monkeypatch, pool_size=2)
+
+    app.dhcp_send_request('192.168.50.101', '02:aa:bb:cc:dd:ee', server.server_ip, 'sim0')
+
+    reply = transport.sniff('sim0', count=1, timeout=1)[0]
+    assert reply['DHCP'].options[0] == ('message-type', 6)
+    assert server.stats['nak'] == 1
+
+
+def test_loss_rate_is_repeatable(monkeypatch):
+    def offers(seed):
+        server, transport = use_server(monkeypatch, pool_size=50, loss_rate=0.3, seed=seed)
+        for i in range(40):
+            app.dhcp_send_discover(f'02:00:00:00:01:{i:02x}', 'sim0')
+        return [p['BOOTP'].yiaddr for p in transport.sniff('sim0', timeout=0)]
+
+    assert offers(7) == offers(7)
+    assert 0 < len(offers(7)) < 40
+
+
+def test_lost_offers_do_not_drain_pool():
+    now = [0.0]
+    server = SimulatedDhcpServer(pool_size=3, offer_hold=5, clock=lambda: now[0])
+    transport = SimulatedTransport(server, sleep=lambda seconds: None)
+
+    # Offers that are never requested hold their address only briefly
+    for i in range(3):
+        transport.sendp(discover_frame(f'02:00:00:00:02:{i:02x}'))
+    assert server.free_addresses == 0
+    now[0] += 6
+    assert server.free_addresses == 3
+
+
+def test_silent_server_times_out(monkeypatch):
+    _, transport = use_server(monkeypatch, pool_size=1)
+    transport.max_wait = 0.05
+
+    with pytest.raises(TimeoutError):
+        transport.sniff('sim0', count=1)
+
+
+def test_leases_expire_after_lease_time(monkeypatch):
+    server, _ = use_server(monkeypatch, pool_size=5, lease_time=1)
+    app.ledger.clear()
+    app.discover_dhcp_server('sim0', idle=0.1)
+    try:
+        run_attack_until(server, 2)
+        _, leases = app.ledger.snapshot()
+        assert all(entry['lease_time'] == 1 for entry in leases)
+        assert all(entry['expires'] == entry['acquired'] + 1 for entry in leases)
+        assert app.pool_map.occupied == 2
+
+        deadline = time.monotonic() + 3
+        while len(app.ledger) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert len(app.ledger) == 0
+        assert app.pool_map.occupied == 0
+    finally:
+        app.attack_running = False
+        app.stop_attack_flag.set()
+        app.ledger.clear()
+
+
+def test_nak_does_not_record_lease(monkeypatch):
+    server, _ = use_server(monkeypatch, pool_size=5)
+    monkeypatch.setattr(server, '_handle_request', lambda frame, chaddr, options: server._reply(frame, 'nak', '0.0.0.0'))
+    app.ledger.clear()
+    before = app.REQUEST_OUTCOMES.value(result='nak')
+
+    app.attack_running = True
+    thread = threading.Thread(target=app.dhcp_starvation_attack, args=('sim0', server.server_ip), daemon=True)
+    thread.start()
+    time.sleep(0.5)
+    app.attack_running = False
+    app.stop_attack_flag.set()
+    thread.join(5)
+
+    assert len(app.ledger) == 0
+    assert app.REQUEST_OUTCOMES.value(result='nak') > before
+
+
+def test_session_capture_records_the_exchange(sim, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'CAPTURE_DIR', str(tmp_path))
+    monkeypatch.setattr(app, 'captures', {})
+    session = app.start_capture('test')
+    assert isinstance(app.transport, RecordingTransport)
+
+    run_attack_until(sim, 2)
+    deadline = time.monotonic() + 5
+    while app.capture_session is not None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    # The transport is unwrapped once the session ends
+    assert not isinstance(app.transport, RecordingTransport)
+
+    response = app.app.test_client().get(f'/api/captures/{session.id}.pcap')
+    assert response.status_code == 200
+    kinds = []
+    for _, frame in PcapReader(io.BytesIO(response.data)):
+        info = parse_frame(frame)
+        if info:
+            kinds.append(MESSAGE_TYPES[summarize_options(info['options'])['message_type']])
+    for kind in ('discover', 'offer', 'request', 'ack'):
+        assert kinds.count(kind) >= 2
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the Server-Sent Events broker
+"""
+
+import pytest
+
+from events import EventBroker, SubscribersFull, format_sse, stream_events
+
+
+def test_publish_fans_out_to_subscribers():
+    broker = EventBroker()
+    first, second = broker.subscribe(), broker.subscribe()
+
+    broker.publish('lease-added', {'seq': 1})
+
+    assert first.get_nowait() == ('lease-added', {'seq': 1})
+    assert second.get_nowait() == ('lease-added', {'seq': 1})
+
+
+def test_slow_subscriber_gets_resync_instead_of_blocking():
+    broker = EventBroker(queue_size=2)
+    subscriber = broker.subscribe()
+
+    for seq in range(5):
+        broker.publish('lease-added', {'seq': seq})
+
+    events = [subscriber.get_nowait() for _ in range(subscriber.qsize())]
+    assert ('resync', {}) in events
+    assert len(events) <= 2
+
+
+def test_stream_formats_and_unsubscribes():
+    broker = EventBroker()
+    stream = stream_events(broker, keepalive=0.01)
+
+    assert next(stream) == "retry: 2000\n\n"
+    assert broker.subscriber_count == 1
+    assert next(stream) == ": keepalive\n\n"
+    broker.publish('session-stopped', {'total': 3})
+    assert next(stream) == format_sse('session-stopped', {'total': 3})
+    assert format_sse('x', {'a': 1}) == 'event: x\ndata: {"a": 1}\n\n'
+
+    stream.close()
+    assert broker.subscriber_count == 0
+
+
+def test_subscribers_are_capped():
+    broker = EventBroker(max_subscribers=1)
+    first = broker.subscribe()
+
+    with pytest.raises(SubscribersFull):
+        broker.subscribe()
+
+    broker.unsubscribe(first)
+    broker.subscribe()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the heap-ordered lease expiry scheduler
+"""
+
+import threading
+import time
+
+from expiry import ExpiryScheduler
+
+
+def collect():
+    expired = []
+    done = threading.Event()
+
+    def on_expire(key, deadline):
+        expired.append(key)
+        done.set()
+    return expired, done, on_expire
+
+
+def test_keys_expire_in_deadline_order():
+    expired, _, on_expire = collect()
+    scheduler = ExpiryScheduler(on_expire)
+    now = time.time()
+    for key, delay in (('c', 0.15), ('a', 0.05), ('b', 0.1)):
+        scheduler.schedule(key, now + delay)
+
+    deadline = time.monotonic() + 2
+    while len(expired) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scheduler.stop()
+
+    assert expired == ['a', 'b', 'c']
+    assert len(scheduler) == 0
+
+
+def test_reschedule_and_cancel_skip_stale_entries():
+    expired, done, on_expire = collect()
+    scheduler = ExpiryScheduler(on_expire)
+    now = time.time()
+    scheduler.schedule('moved', now + 0.05)
+    scheduler.schedule('moved', now + 60)
+    scheduler.schedule('cancelled', now + 0.05)
+    scheduler.cancel('cancelled')
+    scheduler.schedule('due', now + 0.1)
+
+    assert done.wait(2)
+    time.sleep(0.1)
+    scheduler.stop()
+
+    assert expired == ['due']
+    assert scheduler.deadline('moved') == now + 60
+
+
+def test_cancelled_entries_are_compacted():
+    scheduler = ExpiryScheduler(lambda key, deadline: None)
+    far = time.time() + 3600
+    for i in range(200):
+        scheduler.schedule(i, far + i)
+    for i in range(150):
+        scheduler.cancel(i)
+    scheduler.stop()
+
+    assert len(scheduler) == 50
+    assert len(scheduler._heap) <= 100
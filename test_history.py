@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the session history and the streaming export formats
+"""
+
+import csv
+import io
+import json
+
+from export import ledger_rows, parse_time, stream
+from history import SessionHistory
+
+
+def lease(ip, session='s1', server='10.0.0.1', acquired=100.0):
+    return {'ip': ip, 'mac': '02:00:00:00:00:01', 'server': server, 'session': session,
+            'acquired': acquired, 'lease_time': 60, 'expires': acquired + 60}
+
+
+def test_history_outlives_ledger_changes(tmp_path):
+    now = [500.0]
+    history = SessionHistory(str(tmp_path / 'leases.db'), clock=lambda: now[0])
+    history.start_session('s1', 'eth0', '10.0.0.1')
+    for i, ip in enumerate(['10.0.0.10', '10.0.0.11', '10.0.0.12', '10.0.0.13']):
+        history.on_ledger_change('add', lease(ip, acquired=100.0 + i))
+
+    history.end_lease('10.0.0.10', 'expired')
+    history.on_ledger_change('remove', '10.0.0.10')  # Already expired: stays expired
+    history.on_ledger_change('remove', '10.0.0.11')
+    history.on_ledger_change('clear', [lease('10.0.0.13')])
+    history.end_session('s1', 1)
+
+    rows = list(history.iter_leases(batch_size=2))
+    assert [(row['ip'], row['outcome']) for row in rows] == [
+        ('10.0.0.10', 'expired'), ('10.0.0.11', 'released'), ('10.0.0.12', 'cleared'), ('10.0.0.13', None)]
+    assert rows[0]['released'] == 500.0
+    assert history.sessions()[0]['leases'] == 1
+
+    assert [row['ip'] for row in history.iter_leases(since=101, until=103)] == ['10.0.0.11', '10.0.0.12']
+    assert list(history.iter_leases(session='other')) == []
+    history.close()
+
+
+def test_export_formats_stream_rows():
+    rows = list(ledger_rows([lease('10.0.0.5'), lease('10.0.0.6', server='10.0.0.2')], server='10.0.0.1'))
+    assert [row['ip'] for row in rows] == ['10.0.0.5'] and rows[0]['outcome'] == 'held'
+
+    table = list(csv.DictReader(io.StringIO(''.join(stream(iter(rows), 'csv')))))
+    assert table[0]['ip'] == '10.0.0.5' and table[0]['expires'] == '160.0'
+    lines = ''.join(stream(iter(rows), 'jsonl')).splitlines()
+    assert json.loads(lines[0])['session'] == 's1'
+
+    assert parse_time('1700000000') == 1700000000.0
+    assert parse_time('2023-11-14T22:13:20+00:00') == 1700000000.0
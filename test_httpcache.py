@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for conditional GETs, hashed static URLs and response compression
+"""
+
+import gzip
+import re
+
+import app
+from httpcache import Compressor
+
+
+def test_status_revalidates_until_ledger_changes():
+    app.ledger.clear()
+    client = app.app.test_client()
+
+    first = client.get('/api/attack/status')
+    etag = first.headers['ETag']
+    again = client.get('/api/attack/status', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+
+    app.ledger.add({'ip': '10.0.0.5', 'mac': '02:00:00:00:00:05'})
+    try:
+        changed = client.get('/api/attack/status', headers={'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+        assert changed.json['stolen_ips'][0]['ip'] == '10.0.0.5'
+    finally:
+        app.ledger.clear()
+
+
+def test_static_urls_are_hashed_and_immutable():
+    client = app.app.test_client()
+    page = client.get('/').get_data(as_text=True)
+    url = re.search(r'src="(/static/js/app\.js\?v=[0-9a-f]+)"', page).group(1)
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert 'immutable' in response.headers['Cache-Control']
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'].startswith('W/')
+    with open('static/js/app.js', 'rb') as f:
+        assert gzip.decompress(response.data) == f.read()
+
+    # The weakened ETag still revalidates, and a stale hash isn't cached for a year
+    revalidated = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    stale = client.get('/static/js/app.js?v=0000', headers={'Accept-Encoding': 'gzip'})
+    assert 'immutable' not in stale.headers.get('Cache-Control', '')
+
+
+def test_small_and_streamed_responses_are_left_alone():
+    client = app.app.test_client()
+    small = client.get('/api/monitor/status', headers={'Accept-Encoding': 'gzip'})
+    assert small.status_code == 200 and 'Content-Encoding' not in small.headers
+
+    compressor = Compressor(min_size=10)
+    with app.app.test_request_context(headers={'Accept-Encoding': 'gzip'}) as context:
+        accept = context.request.accept_encodings
+        stream = app.Response(iter([b'data: x\n\n'] * 100), mimetype='text/event-stream')
+        assert 'Content-Encoding' not in compressor.compress(stream, accept).headers
+        generated = app.Response(iter([b'{"ip": "10.0.0.1"}\n'] * 100), mimetype='application/x-ndjson')
+        assert 'Content-Encoding' not in compressor.compress(generated, accept).headers
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached interface registry
+"""
+
+from interfaces import InterfaceRegistry, enumerate_interfaces
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def counting_enumerator(results):
+    calls = []
+
+    def enumerate():
+        calls.append(1)
+        return results[min(len(calls), len(results)) - 1]
+    return enumerate, calls
+
+
+def test_cached_until_ttl_expires():
+    clock = FakeClock()
+    enumerate, calls = counting_enumerator([[{'name': 'eth0'}]])
+    registry = InterfaceRegistry(enumerate=enumerate, ttl=5, use_netlink=False, clock=clock)
+
+    assert registry.list() == [{'name': 'eth0'}]
+    registry.list()
+    assert len(calls) == 1
+
+    clock.now = 5
+    registry.list()
+    assert len(calls) == 2
+
+
+def test_invalidate_and_version():
+    enumerate, calls = counting_enumerator([[{'name': 'eth0'}], [{'name': 'eth0'}], [{'name': 'eth1'}]])
+    registry = InterfaceRegistry(enumerate=enumerate, ttl=60, use_netlink=False, clock=FakeClock())
+
+    registry.list()
+    version = registry.version
+    registry.invalidate()
+    registry.list()
+    # Same inventory, so clients' cached copies stay valid
+    assert len(calls) == 2 and registry.version == version
+
+    registry.invalidate()
+    assert registry.get('eth1') == {'name': 'eth1'}
+    assert registry.version == version + 1
+
+
+def test_enumerate_reports_link_details():
+    for iface in enumerate_interfaces():
+        assert set(iface) == {'name', 'ip', 'netmask', 'mac', 'mtu', 'up'}
+        assert not iface['ip'].startswith('127.')
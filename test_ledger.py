@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for the lease ledger and the incremental ?since= status API
+"""
+
+import app
+from ledger import LeaseLedger
+
+
+def lease(i):
+    return {'ip': f'10.0.0.{i}', 'mac': f'02:00:00:00:00:{i:02x}', 'time': '00:00:00'}
+
+
+def test_indexes_and_duplicates():
+    ledger = LeaseLedger()
+    assert ledger.add(lease(1)) == 1
+    assert ledger.add(dict(lease(1), mac='02:ff:ff:ff:ff:ff')) is None
+    assert ledger.get('10.0.0.1') == lease(1)
+    assert ledger.get_by_mac('02:00:00:00:00:01') == lease(1)
+
+    entry, seq = ledger.remove('10.0.0.1')
+    assert entry == lease(1) and seq == 2
+    assert ledger.get_by_mac('02:00:00:00:00:01') is None
+    assert ledger.remove('10.0.0.1') is None
+
+
+def test_snapshot_is_ordered_and_shared_until_change():
+    ledger = LeaseLedger()
+    for i in (3, 1, 2):
+        ledger.add(lease(i))
+    seq, leases = ledger.snapshot()
+    assert [entry['ip'] for entry in leases] == ['10.0.0.3', '10.0.0.1', '10.0.0.2']
+    assert ledger.snapshot()[1] is leases
+
+    ledger.remove('10.0.0.1')
+    assert ledger.snapshot()[0] == seq + 1
+    assert ledger.snapshot()[1] is not leases
+
+
+def test_changes_since_collapses_adds_and_removals():
+    ledger = LeaseLedger()
+    ledger.add(lease(1))
+    since = ledger.seq
+    ledger.add(lease(2))
+    ledger.add(lease(3))
+    ledger.remove('10.0.0.2')   # Added and removed inside the window
+    ledger.remove('10.0.0.1')   # Added before the window
+    ledger.mark_network_changed()
+
+    delta = ledger.changes_since(since)
+    assert [entry['ip'] for entry in delta['added']] == ['10.0.0.3']
+    assert delta['removed'] == ['10.0.0.1', '10.0.0.2']
+    assert delta['network_changed']
+    assert ledger.changes_since(ledger.seq) == {
+        'seq': ledger.seq, 'added': [], 'removed': [], 'network_changed': False
+    }
+
+
+def test_changes_since_requires_resync_past_floor():
+    ledger = LeaseLedger(change_log_size=3)
+    for i in range(5):
+        ledger.add(lease(i))
+    # Only seqs 3..5 are still in the log, so a client at 2 can resume
+    assert ledger.changes_since(2) is not None
+    assert ledger.changes_since(1) is None
+    # A seq from the future (e.g. after a server restart) also resyncs
+    assert ledger.changes_since(ledger.seq + 1) is None
+
+    seq = ledger.seq
+    ledger.clear()
+    assert ledger.changes_since(seq) is None
+    assert ledger.changes_since(ledger.seq) is not None
+
+
+def test_status_endpoint_deltas(monkeypatch):
+    monkeypatch.setattr(app, 'ledger', LeaseLedger())
+    client = app.app.test_client()
+
+    full = client.get('/api/attack/status').json
+    assert full['stolen_ips'] == [] and not full['reset']
+
+    app.ledger.add(lease(1))
+    delta = client.get(f"/api/attack/status?since={full['seq']}").json
+    assert delta['added'] == [lease(1)]
+    assert delta['summary'] == {'total': 1}
+    assert 'stolen_ips' not in delta
+
+    app.ledger.clear()
+    reset = client.get(f"/api/attack/status?since={delta['seq']}").json
+    assert reset['reset'] and reset['stolen_ips'] == []
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for queue-backed structured logging
+"""
+
+import io
+import json
+import logging
+import queue
+import time
+
+import pytest
+
+from logconfig import DroppingQueueHandler, RateLimitFilter, fields, setup_logging, shutdown_logging
+
+
+def make_record(event, level=logging.INFO, msg="[*] message %s", args=(1,)):
+    record = logging.LogRecord('starve.test', level, __file__, 1, msg, args, None)
+    record.event = event
+    return record
+
+
+@pytest.fixture
+def output():
+    stream = io.StringIO()
+    yield stream
+    shutdown_logging()
+    logging.getLogger('starve').handlers = []
+
+
+def test_rate_limit_per_event():
+    now = [0.0]
+    limiter = RateLimitFilter(rate=1.0, burst=2, clock=lambda: now[0])
+
+    passed = [limiter.filter(make_record('discover-sent')) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert limiter.filter(make_record('lease-acquired'))  # Separate bucket
+    assert limiter.filter(make_record('discover-sent', level=logging.ERROR))  # Errors always pass
+
+    now[0] = 1.0
+    record = make_record('discover-sent')
+    assert limiter.filter(record)
+    assert record.suppressed == 3
+
+
+def test_json_lines(output):
+    setup_logging(level='info', format='json', stream=output)
+    logger = logging.getLogger('starve.app')
+
+    logger.info("[+] DHCP Request sent for %s", '10.0.0.5', extra=fields('request-sent', ip='10.0.0.5'))
+    logger.debug("[*] hidden")
+    shutdown_logging()
+
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 1
+    data = json.loads(lines[0])
+    assert data['event'] == 'request-sent'
+    assert data['msg'] == 'DHCP Request sent for 10.0.0.5'
+    assert data['ip'] == '10.0.0.5'
+    assert data['level'] == 'info' and data['logger'] == 'starve.app'
+
+
+def test_text_format_keeps_markers(output):
+    setup_logging(level='debug', format='text', stream=output, burst=1, rate=0.001)
+    logger = logging.getLogger('starve.app')
+
+    for i in range(3):
+        logger.info("[*] DHCP Discover sent from %s", i, extra=fields('discover-sent'))
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError as e:
+        logger.exception("[-] Attack error: %s", e)
+    shutdown_logging()
+
+    text = output.getvalue()
+    assert text.startswith("[*] DHCP Discover sent from 0\n")
+    assert "sent from 1" not in text
+    assert "[-] Attack error: boom" in text and "Traceback" in text
+
+
+def test_slow_output_does_not_block_callers(output):
+    class SlowStream(io.StringIO):
+        def write(self, text):
+            time.sleep(0.02)
+            return super().write(text)
+
+    setup_logging(level='info', stream=SlowStream(), rate=1000, burst=1000)
+    logger = logging.getLogger('starve.app')
+
+    started = time.perf_counter()
+    for i in range(20):
+        logger.info("[*] packet %d", i, extra=fields(f'packet-{i}'))
+    assert time.perf_counter() - started < 0.2
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.emit(make_record('x'))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    assert handler.queue.get_nowait().msg == "[*] message 1"
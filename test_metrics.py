@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the metrics registry and the /metrics endpoint
+"""
+
+import threading
+
+import pytest
+
+import app
+import metrics
+from metrics import Registry
+from test_dhcpsim import run_attack_until, sim  # noqa: F401 (fixture)
+
+
+def test_counter_sums_thread_shards():
+    registry = Registry()
+    counter = registry.counter('test_total', 'Test counter', ('result',))
+
+    def work():
+        for _ in range(1000):
+            counter.inc(result='ok')
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc(5, result='failed')
+
+    assert counter.value(result='ok') == 4000
+    assert counter.value(result='failed') == 5
+    # Finished threads are folded into the base shard on collect
+    assert len(counter._shards) == 1
+    assert counter.value(result='ok') == 4000
+
+    with pytest.raises(ValueError):
+        counter.inc(status='ok')
+    assert registry.counter('test_total', 'Test counter', ('result',)) is counter
+    with pytest.raises(ValueError):
+        registry.histogram('test_total', 'Clash')
+
+
+
+def test_dead_thread_shards_are_pruned_without_scraping():
+    registry = Registry()
+    counter = registry.counter('test_requests_total', 'Test counter')
+    histogram = registry.histogram('test_request_seconds', 'Test latency')
+
+    # One short-lived thread per request, as the threaded server does
+    for _ in range(2000):
+        thread = threading.Thread(target=lambda: (counter.inc(), histogram.observe(0.01)))
+        thread.start()
+        thread.join()
+
+    # Never scraped, yet the shard lists stay bounded
+    assert len(counter._shards) < metrics.PRUNE_THRESHOLD
+    assert len(histogram._shards) < metrics.PRUNE_THRESHOLD
+    assert counter.value() == 2000
+    assert histogram.snapshot()[1] == pytest.approx(20.0)
+
+def test_text_format():
+    registry = Registry()
+    histogram = registry.histogram('test_seconds', 'Test latency', ('path',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, path='/a"b')
+    histogram.observe(0.5, path='/a"b')
+    histogram.observe(5, path='/a"b')
+    registry.gauge('test_items', 'Items', lambda: 3)
+
+    text = registry.render()
+
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{path="/a\\"b",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{path="/a\\"b",le="1"} 2' in text
+    assert 'test_seconds_bucket{path="/a\\"b",le="+Inf"} 3' in text
+    assert 'test_seconds_sum{path="/a\\"b"} 5.55' in text
+    assert 'test_seconds_count{path="/a\\"b"} 3' in text
+    assert '# TYPE test_items gauge\ntest_items 3' in text
+    assert histogram.snapshot(path='/a"b') == ([1, 1, 1], 5.55)
+
+
+def test_attack_and_http_are_instrumented(sim):
+    acquired = app.LEASES_ACQUIRED.value()
+    offers = sum(app.OFFER_LATENCY.snapshot()[0])
+
+    run_attack_until(sim, 3)
+
+    assert app.LEASES_ACQUIRED.value() == acquired + 3
+    assert sum(app.OFFER_LATENCY.snapshot()[0]) >= offers + 3
+    assert sum(app.ARP_RESOLUTION.snapshot(result='resolved')[0]) >= 1
+
+    client = app.app.test_client()
+    client.get('/api/attack/status')
+    response = client.get('/metrics')
+    text = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'starve_leases_held 3' in text
+    assert 'starve_http_request_duration_seconds_count{method="GET",endpoint="/api/attack/status",status="200"}' in text
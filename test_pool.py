@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the subnet model and pool occupancy bitmap
+"""
+
+from pool import PoolMap
+
+
+def expand(runs):
+    bits = []
+    for index, length in enumerate(runs):
+        bits += [index % 2] * length
+    return bits
+
+
+def test_subnet_from_offer():
+    pool = PoolMap.from_offer('192.168.50.100', '255.255.255.0')
+    assert str(pool.network) == '192.168.50.0/24'
+    assert pool.size == 254
+    assert pool.index('192.168.50.1') == 0
+    assert pool.index('192.168.50.255') is None
+    assert pool.index('10.0.0.1') is None
+
+    # Huge subnets are narrowed around the offered address
+    assert str(PoolMap.from_offer('10.20.30.40', '255.0.0.0').network) == '10.20.0.0/16'
+
+
+def test_membership_and_counts():
+    pool = PoolMap('192.168.50.0/24')
+    for host in (100, 101, 102, 200):
+        assert pool.add(f'192.168.50.{host}')
+    assert not pool.add('192.168.50.100')
+    assert not pool.add('172.16.0.1')
+
+    assert '192.168.50.101' in pool and '192.168.50.103' not in pool
+    assert pool.occupied == 4
+    assert pool.count() == 4
+    assert pool.count(pool.index('192.168.50.101'), pool.index('192.168.50.200')) == 2
+    assert pool.range() == ('192.168.50.100', '192.168.50.200')
+
+    assert pool.remove('192.168.50.101')
+    assert not pool.remove('192.168.50.101')
+    assert pool.occupied == pool.count() == 3
+
+
+def test_run_length_map_round_trips():
+    pool = PoolMap('192.168.50.0/24')
+    leased = {0, 7, 8, 9, 15, 16, 100, 253} | set(range(120, 140))
+    for index in leased:
+        pool.add(pool.address(index))
+
+    runs = pool.runs()
+    assert sum(runs) == pool.size
+    assert {i for i, bit in enumerate(expand(runs)) if bit} == leased
+
+    pool.reset(['192.168.50.50'])
+    assert pool.occupied == 1
+    assert pool.runs() == [49, 1, 204]
+    assert PoolMap('10.0.0.0/24').runs() == [254]
+    assert PoolMap('10.0.0.0/24').to_dict()['observed_range'] is None
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk release path and background jobs
+"""
+
+import threading
+import time
+
+from scapy.layers.dhcp import DHCP, BOOTP
+from scapy.layers.inet import IP, UDP
+from scapy.layers.l2 import Ether
+from scapy.utils import mac2str
+
+from jobs import Job, JobCache, JobRegistry
+from release import ReleaseFrameTemplate, release_leases
+
+
+def scapy_release(ip_address, mac_address, server_ip, xid):
+    """The frame dhcp_send_release would build layer by layer"""
+    frame = Ether(src=mac_address, dst="ff:ff:ff:ff:ff:ff")
+    frame /= IP(src=ip_address, dst=server_ip)
+    frame /= UDP(sport=68, dport=67)
+    frame /= BOOTP(chaddr=mac2str(mac_address), ciaddr=ip_address, xid=xid)
+    frame /= DHCP(options=[("message-type", "release"), ("server_id", server_ip), "end"])
+    return frame
+
+
+def test_template_matches_scapy_frame():
+    template = ReleaseFrameTemplate('192.168.1.1')
+    for ip, mac, xid in [('192.168.1.77', 'de:ad:be:ef:00:01', 1234),
+                         ('192.168.1.200', '02:11:22:33:44:55', 999999999)]:
+        built = template.build(ip, mac, xid=xid)
+        expected = scapy_release(ip, mac, '192.168.1.1', xid)
+        # The template leaves the optional UDP checksum at zero
+        expected[UDP].chksum = 0
+        assert built == bytes(expected)
+
+
+class RecordingSocket:
+    def __init__(self, fail_on=()):
+        self.frames = []
+        self.fail_on = fail_on
+        self.closed = False
+
+    def send(self, frame):
+        if Ether(frame)[BOOTP].ciaddr in self.fail_on:
+            raise OSError('send failed')
+        self.frames.append(frame)
+
+    def close(self):
+        self.closed = True
+
+
+class RecordingTransport:
+    def __init__(self, sock):
+        self.sock = sock
+        self.opened = 0
+
+    def l2socket(self, iface):
+        self.opened += 1
+        return self.sock
+
+
+def test_release_leases_reuses_socket_and_batches():
+    sock = RecordingSocket(fail_on={'10.0.0.3'})
+    transport = RecordingTransport(sock)
+    leases = [{'ip': f'10.0.0.{i}', 'mac': f'02:00:00:00:00:{i:02x}'} for i in range(5)]
+    leases[4]['server'] = '10.0.0.253'
+    batches = []
+
+    job = Job('release', total=len(leases))
+    result = release_leases(job, leases, '10.0.0.254', 'eth0', transport,
+                            on_batch=batches.append, batch_size=2, pacing=0)
+
+    assert result == {'total': 5, 'released': 4, 'failed': 1}
+    assert transport.opened == 1 and sock.closed
+    assert [[entry['ip'] for entry in batch] for batch in batches] == [
+        ['10.0.0.0', '10.0.0.1'], ['10.0.0.2', '10.0.0.4']]
+    # Each lease goes to the server that granted it
+    assert [Ether(frame)[IP].dst for frame in sock.frames] == ['10.0.0.254'] * 3 + ['10.0.0.253']
+
+
+def wait_for(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert job.done
+
+
+def test_job_registry_reports_progress_and_errors():
+    registry = JobRegistry()
+    gate = threading.Event()
+
+    def work(job, items):
+        for _ in items:
+            job.advance()
+        gate.wait(5)
+        return 'ok'
+
+    job = registry.start('release', work, args=([1, 2],), total=2)
+    assert registry.active('release') is job
+    gate.set()
+    wait_for(job)
+    assert job.to_dict()['state'] == 'done' and job.result == 'ok'
+    assert job.to_dict()['progress'] == 1.0
+    assert registry.active('release') is None
+
+    def broken(job):
+        raise RuntimeError('no socket')
+
+    failed = registry.start('release', broken)
+    wait_for(failed)
+    assert failed.state == 'failed' and failed.error == 'no socket'
+
+
+def test_job_cache_shares_and_expires_results():
+    now = [1000.0]
+    cache = JobCache(JobRegistry(), ttl=60, clock=lambda: now[0])
+    gate = threading.Event()
+    runs = []
+
+    def work(job, key):
+        runs.append(key)
+        gate.wait(5)
+        return key.upper()
+
+    first, shared = cache.get_or_start('eth0', 'discovery', work, args=('eth0',))
+    second, shared_again = cache.get_or_start('eth0', 'discovery', work, args=('eth0',))
+    assert second is first and (shared, shared_again) == (False, True)
+
+    gate.set()
+    wait_for(first)
+    first.finished = now[0]
+    assert cache.get('eth0') is first and first.result == 'ETH0'
+
+    # Stale after the TTL, gone at once when invalidated
+    now[0] += 61
+    assert cache.get('eth0') is None
+    fresh, _ = cache.get_or_start('eth0', 'discovery', work, args=('eth0',))
+    wait_for(fresh)
+    cache.invalidate('eth0')
+    assert cache.get('eth0') is None
+    assert runs == ['eth0', 'eth0']
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Hermetic tests of the attack session state machine and its API
+A VirtualClock drives the attack loop and the simulated server, so offer,
+ACK and saturation timeouts elapse instantly and no test needs root
+"""
+
+import csv
+import io
+import json
+import time
+
+import pytest
+
+import app
+from clock import VirtualClock
+from dhcpsim import SimulatedDhcpServer, SimulatedTransport
+from history import SessionHistory
+
+# Virtual seconds after which a runaway session is stopped
+GUARD = 600
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """(server, clock) with app.py's packets and time routed through them"""
+    vclock = VirtualClock()
+    server = SimulatedDhcpServer(pool_size=5, seed=1, clock=vclock.monotonic)
+    monkeypatch.setattr(app, 'clock', vclock)
+    monkeypatch.setattr(app, 'transport', SimulatedTransport(server, sleep=vclock.sleep))
+    monkeypatch.setattr(app, 'pool_map', None)
+    app.ledger.clear()
+    vclock.call_at(vclock.now + GUARD, app.stop_attack_flag.set)
+    yield server, vclock
+    app.attack_running = False
+    app.stop_attack_flag.set()
+    if app.attack_thread:
+        app.attack_thread.join(2)
+    app.ledger.clear()
+
+
+def run_session(server):
+    """Run the attack loop in this thread until it stops by itself"""
+    app.attack_running = True
+    started = time.perf_counter()
+    app.dhcp_starvation_attack('sim0', server.server_ip)
+    return time.perf_counter() - started
+
+
+def stop_after(vclock, seconds):
+    vclock.call_at(vclock.now + seconds, app.stop_attack_flag.set)
+
+
+def test_session_stops_once_pool_is_saturated(session):
+    server, vclock = session
+    started = vclock.now
+
+    elapsed = run_session(server)
+
+    assert len(app.ledger) == len(server.pool) and server.free_addresses == 0
+    assert not app.attack_running
+    # Three 3 s offer timeouts pass the 5 s saturation limit - virtually
+    assert vclock.now - started > app.SATURATION_TIMEOUT
+    assert elapsed < 1.0
+
+
+def test_stop_flag_ends_session_mid_pool(session):
+    server, _ = session
+
+    def stop_at_two(op, payload):
+        if op == 'add' and len(app.ledger) == 2:
+            app.stop_attack_flag.set()
+
+    app.ledger.add_listener(stop_at_two)
+    try:
+        run_session(server)
+    finally:
+        app.ledger.remove_listener(stop_at_two)
+
+    assert len(app.ledger) == 2
+    assert server.stats['request'] == 2
+
+
+def test_silent_server_retries_every_round(session):
+    server, vclock = session
+    server.loss_rate = 1.0
+    timeouts = app.SNIFF_TIMEOUTS.value(phase='offer')
+    stop_after(vclock, 30)
+
+    run_session(server)
+
+    # Each round: OFFER_RETRIES DISCOVERs, each given OFFER_TIMEOUT seconds
+    round_time = app.OFFER_RETRIES * app.OFFER_TIMEOUT + app.ROUND_DELAY
+    rounds = server.stats['dropped'] // app.OFFER_RETRIES
+    assert rounds == pytest.approx(30 / round_time, abs=1)
+    assert app.SNIFF_TIMEOUTS.value(phase='offer') - timeouts == server.stats['dropped']
+    assert len(app.ledger) == 0
+
+
+def test_nak_is_retried_not_recorded(session, monkeypatch):
+    server, vclock = session
+    monkeypatch.setattr(server, '_handle_request', lambda frame, chaddr, options: server._reply(frame, 'nak', '0.0.0.0'))
+    naks = app.REQUEST_OUTCOMES.value(result='nak')
+    stop_after(vclock, 8)
+
+    run_session(server)
+
+    assert len(app.ledger) == 0
+    # One NAK per address until the unclaimed offers tie up the whole pool
+    assert app.REQUEST_OUTCOMES.value(result='nak') - naks == len(server.pool)
+
+
+def test_missing_ack_times_out(session, monkeypatch):
+    server, vclock = session
+    monkeypatch.setattr(server, '_handle_request', lambda frame, chaddr, options: None)
+    timeouts = app.SNIFF_TIMEOUTS.value(phase='ack')
+    stop_after(vclock, 10)
+
+    run_session(server)
+
+    assert len(app.ledger) == 0
+    assert app.SNIFF_TIMEOUTS.value(phase='ack') > timeouts
+
+
+def test_api_session_then_release(session):
+    server, _ = session
+    client = app.app.test_client()
+
+    started = client.post('/api/attack/start', json={'interface': 'sim0', 'dhcp_server': server.server_ip})
+    assert started.status_code == 200
+    assert client.post('/api/attack/start', json={'interface': 'sim0', 'dhcp_server': server.server_ip}).status_code in (200, 400)
+    app.attack_thread.join(2)
+
+    status = client.get('/api/attack/status').json
+    assert not status['running'] and status['summary']['total'] == 5
+    assert client.post('/api/attack/stop').status_code == 400
+
+    ip = status['stolen_ips'][0]['ip']
+    released = client.post('/api/attack/release', json={'ip': ip, 'interface': 'sim0', 'dhcp_server': server.server_ip})
+    assert released.json['remaining'] == 4
+    assert client.post('/api/attack/release', json={'ip': ip, 'interface': 'sim0',
+                                                    'dhcp_server': server.server_ip}).status_code == 404
+
+    job_id = client.post('/api/attack/release-all', json={'interface': 'sim0', 'dhcp_server': server.server_ip}).json['job_id']
+    deadline = time.monotonic() + 2
+    job = client.get(f'/api/release/jobs/{job_id}').json
+    while job['state'] not in ('done', 'failed') and time.monotonic() < deadline:
+        time.sleep(0.01)
+        job = client.get(f'/api/release/jobs/{job_id}').json
+
+    assert job['result'] == {'total': 4, 'released': 4, 'failed': 0}
+    assert len(app.ledger) == 0 and server.free_addresses == 5
+
+
+def test_stop_endpoint_ends_running_session(session):
+    server, _ = session
+    server.loss_rate = 1.0  # Never saturates, so only the stop request ends it
+    client = app.app.test_client()
+
+    client.post('/api/attack/start', json={'interface': 'sim0', 'dhcp_server': server.server_ip})
+    assert client.post('/api/attack/stop').status_code == 200
+    app.attack_thread.join(2)
+
+    assert not app.attack_thread.is_alive()
+    assert not client.get('/api/attack/status').json['running']
+
+
+def test_history_export_keeps_past_sessions(session, monkeypatch, tmp_path):
+    server, vclock = session
+    history = SessionHistory(str(tmp_path / 'leases.db'), clock=vclock.time)
+    monkeypatch.setattr(app, 'history', history)
+    app.ledger.add_listener(history.on_ledger_change)
+    client = app.app.test_client()
+    try:
+        sessions = []
+        for _ in range(2):
+            started = client.post('/api/attack/start', json={'interface': 'sim0', 'dhcp_server': server.server_ip})
+            sessions.append(started.json['session'])
+            app.attack_thread.join(2)
+            vclock.advance(2)  # Distinct session ids
+            server.leases.clear()
+    finally:
+        app.ledger.remove_listener(history.on_ledger_change)
+
+    assert [entry['id'] for entry in client.get('/api/sessions').json] == sessions
+
+    # The second start cleared the first session's leases, but history keeps them
+    response = client.get(f'/api/export?scope=history&format=csv&session={sessions[0]}')
+    assert response.mimetype == 'text/csv' and response.is_streamed
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 5 and {row['outcome'] for row in rows} == {'cleared'}
+
+    current = client.get('/api/export?format=jsonl').get_data(as_text=True).splitlines()
+    assert len(current) == 5
+    assert {json.loads(line)['session'] for line in current} == {sessions[1]}
+
+    assert client.get('/api/export?format=xml').status_code == 400
+    history.close()
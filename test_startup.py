@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Startup-time guard: importing app.py must not load Scapy
+Packet layers are resolved lazily through packets.py on first use
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Cold import of app.py in seconds; `from scapy.all import *` alone took ~1.4 s
+STARTUP_BUDGET = float(os.environ.get('STARVE_STARTUP_BUDGET', '1.0'))
+
+
+def run_python(code):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], cwd=HERE, capture_output=True, text=True)
+    return result, time.perf_counter() - start
+
+
+def test_app_import_does_not_load_scapy():
+    result, _ = run_python(
+        "import sys, app\n"
+        "print(sorted(m for m in sys.modules if m.startswith('scapy')))"
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == '[]'
+
+
+def test_app_import_within_budget():
+    # Best of three to smooth out a noisy machine
+    timings = []
+    for _ in range(3):
+        result, elapsed = run_python("import app")
+        assert result.returncode == 0, result.stderr
+        timings.append(elapsed)
+    assert min(timings) < STARTUP_BUDGET, f"cold import took {min(timings):.2f}s"
+
+
+def test_layers_load_on_first_use():
+    result, _ = run_python(
+        "import sys, packets\n"
+        "assert not packets.loaded()\n"
+        "frame = packets.Ether() / packets.ARP()\n"
+        "assert packets.loaded() and 'scapy.layers.l2' in sys.modules\n"
+        "assert 'scapy.all' not in sys.modules"
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_conf_has_socket_classes():
+    # Release All can be the first packet operation after a restart
+    result, _ = run_python(
+        "import packets\n"
+        "assert packets.conf.L2socket is not None\n"
+        "assert packets.conf.L2listen is not None\n"
+        "assert packets.conf.L3socket is not None"
+    )
+    assert result.returncode == 0, result.stderr
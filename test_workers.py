@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for the packet worker pool and how the app sheds load with it
+"""
+
+import threading
+import time
+
+import pytest
+
+import app
+from jobs import JobCache
+from workers import ExecutorBusy, PacketExecutor
+
+
+def test_admission_is_bounded():
+    executor = PacketExecutor(workers=1, backlog=1)
+    gate = threading.Event()
+    futures = [executor.submit(gate.wait, 5) for _ in range(2)]
+
+    with pytest.raises(ExecutorBusy):
+        executor.submit(gate.wait, 5)
+    assert executor.in_flight == 2
+
+    gate.set()
+    assert [future.result(1) for future in futures] == [True, True]
+    executor.submit(lambda: None).result(1)
+    assert executor.in_flight == 0
+    executor.shutdown()
+
+
+def test_slow_discovery_does_not_block_status(monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setattr(app, 'packet_executor', PacketExecutor(workers=1, backlog=0))
+    monkeypatch.setattr(app, 'discoveries', JobCache(app.jobs))
+    monkeypatch.setattr(app, 'discover_dhcp_server', lambda interface, **kwargs: gate.wait(5) and None)
+    client = app.app.test_client()
+
+    try:
+        assert client.post('/api/discover', json={'interface': 'sim0'}).status_code == 202
+
+        # A second packet-bound operation is shed at once...
+        busy = client.post('/api/discover', json={'interface': 'sim1'})
+        assert busy.status_code == 503
+        assert busy.headers['Retry-After']
+
+        # ...while read-only routes answer normally
+        started = time.perf_counter()
+        assert client.get('/api/attack/status').status_code == 200
+        assert time.perf_counter() - started < 0.5
+    finally:
+        gate.set()
+        app.packet_executor.shutdown()
+
+
+def test_event_streams_are_capped(monkeypatch):
+    monkeypatch.setattr(app.event_broker, 'max_subscribers', 1)
+    client = app.app.test_client()
+
+    stream = client.get('/api/events')
+    assert stream.status_code == 200
+
+    # The next tab is told to poll instead of taking another server thread
+    refused = client.get('/api/events')
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After']
+    assert client.get('/api/attack/status').status_code == 200
+
+    stream.close()
+    assert app.event_broker.subscriber_count == 0
+    monkeypatch.delenv('STARVE_MAX_STREAMS', raising=False)
+    assert app.stream_limit(16) == 4
+
+def test_create_app_initialises_once(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(app, '_app_initialized', False)
+    monkeypatch.setattr(app, 'setup_logging', lambda: calls.append('logging'))
+    monkeypatch.setattr(app, 'init_journal', lambda path: calls.append(path))
+    monkeypatch.setattr(app, 'init_history', lambda path: calls.append('history'))
+    monkeypatch.setattr(app.event_broker, 'max_subscribers', None)
+
+    path = str(tmp_path / 'leases.db')
+    assert app.create_app(path) is app.app
+    assert app.create_app(path) is app.app
+    assert calls == ['logging', path, 'history']
@@ -0,0 +1,52 @@
+"""
+Packet transport used by the attack, discovery and release code
+ScapyTransport talks to a real interface; dhcpsim.SimulatedTransport offers
+the same methods backed by an in-process DHCP server
+"""
+
+import packets
+
+
+class ScapyTransport:
+    """Sends and receives frames through Scapy on a real interface"""
+
+    def sendp(self, frame, iface):
+        """Send a layer 2 frame"""
+        packets.sendp(frame, iface=iface, verbose=0)
+
+    def send(self, packet, iface):
+        """Send a layer 3 packet"""
+        packets.send(packet, iface=iface, verbose=0)
+
+    def sniff(self, iface, filter=None, count=0, timeout=None, **kwargs):
+        """Capture frames; returns a list-like of packets"""
+        return packets.sniff(iface=iface, filter=filter, count=count, timeout=timeout, **kwargs)
+
+    def sr1(self, packet, timeout=None, iface=None):
+        """Send a packet and return the first answer, or None"""
+        if iface:
+            return packets.sr1(packet, timeout=timeout, iface=iface, verbose=0)
+        return packets.sr1(packet, timeout=timeout, verbose=0)
+
+    def l2socket(self, iface):
+        """Open a reusable layer 2 socket with send() and close()"""
+        return packets.conf.L2socket(iface=iface)
+
+    def listen(self, iface, filter=None):
+        """Open a capture socket before sending a probe, so no reply is missed"""
+        return ListenSocket(packets.conf.L2listen(iface=iface, filter=filter))
+
+
+class ListenSocket:
+    """Capture socket with recv(timeout) returning the next frame or None"""
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def recv(self, timeout):
+        if not self.sock.select([self.sock], max(timeout, 0)):
+            return None
+        return self.sock.recv()
+
+    def close(self):
+        self.sock.close()
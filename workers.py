@@ -0,0 +1,60 @@
+"""
+Worker pool for request handlers that block on packet I/O
+Discovery can sit in a sniff for seconds. Routes that send and wait on
+packets hand that work to a small fixed pool here. A handler that waits on
+run() still holds its server thread, but admission is bounded: a request
+that finds every slot taken gets a 503 straight away, so at most
+workers + backlog server threads are ever waiting on packets. The status
+polls and static files never touch this pool; event streams are capped
+separately (events.EventBroker).
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorBusy(RuntimeError):
+    """Every worker and queue slot is taken"""
+
+
+class PacketExecutor:
+    """Thread pool with bounded admission: `workers` running plus `backlog` queued"""
+
+    def __init__(self, workers=2, backlog=4):
+        self.workers = workers
+        self.backlog = backlog
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='packet')
+        self._slots = threading.BoundedSemaphore(workers + backlog)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self):
+        """Operations running or queued"""
+        return self._in_flight
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs); raises ExecutorBusy rather than waiting for a slot"""
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorBusy(f"{self.workers + self.backlog} packet operations already in flight")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """submit() and wait for the result"""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def _done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for production servers, run as root in a single process:
+
+    waitress-serve --threads=16 --port=5000 wsgi:application
+    gunicorn --workers 1 --threads 16 --bind 0.0.0.0:5000 wsgi:application
+"""
+
+from app import create_app
+
+application = create_app()